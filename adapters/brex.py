@@ -2,6 +2,8 @@ import requests
 import pandas as pd
 from datetime import datetime, timedelta
 
+from utils import cassette, trace
+
 BREX_API_URL = "https://platform.brexapis.com/v2"
 REQUEST_TIMEOUT = 30  # seconds — without this a hung connection stalls the whole cron run
 
@@ -9,7 +11,8 @@ def fetch_brex_transactions(api_key, days_back=30):
     """
     Fetches Brex transactions (Card) for the last N days.
     """
-    if not api_key:
+    # A replayed run serves the recorded responses, so it needs no key
+    if not api_key and cassette.mode() != "replay":
         print("Brex: No API Key provided.")
         return pd.DataFrame()
 
@@ -34,7 +37,9 @@ def fetch_brex_transactions(api_key, days_back=30):
     
     try:
         while url:
-            response = requests.get(url, headers=headers, params=params, timeout=REQUEST_TIMEOUT)
+            with trace.span("http.brex", "page") as sp:
+                response = cassette.call("http.brex", requests.get, url, headers=headers, params=dict(params), timeout=REQUEST_TIMEOUT)
+                sp.update(status=response.status_code, bytes=len(response.content))
 
             if response.status_code != 200:
                 print(f"Brex Error {response.status_code}: {response.text}")
@@ -2,6 +2,8 @@ import requests
 import pandas as pd
 from datetime import datetime, timedelta
 
+from utils import cassette, trace
+
 MERCURY_API_URL = "https://api.mercury.com/api/v1"
 REQUEST_TIMEOUT = 30  # seconds — without this a hung connection stalls the whole cron run
 
@@ -9,7 +11,8 @@ def fetch_mercury_transactions(api_key, days_back=30):
     """
     Fetches Mercury transactions for the last N days.
     """
-    if not api_key:
+    # A replayed run serves the recorded responses, so it needs no key
+    if not api_key and cassette.mode() != "replay":
         print("Mercury: No API Key provided.")
         return pd.DataFrame()
 
@@ -32,7 +35,9 @@ def fetch_mercury_transactions(api_key, days_back=30):
     all_txns = []
     
     try:
-        response = requests.get(url, headers=headers, params=params, timeout=REQUEST_TIMEOUT)
+        with trace.span("http.mercury", "page") as sp:
+            response = cassette.call("http.mercury", requests.get, url, headers=headers, params=params, timeout=REQUEST_TIMEOUT)
+            sp.update(status=response.status_code, bytes=len(response.content))
 
         if response.status_code != 200:
             print(f"Mercury Error {response.status_code}: {response.text}")
@@ -1,6 +1,8 @@
 import requests
 import pandas as pd
 
+from utils import cassette, trace
+
 RIPPLING_API_URL = "https://api.rippling.com/platform/api"
 REQUEST_TIMEOUT = 30  # seconds
 
@@ -8,7 +10,8 @@ def fetch_rippling_expenses(api_key, days_back=30):
     """
     Fetches Rippling Employee Expenses (Reimbursements).
     """
-    if not api_key:
+    # A replayed run serves the recorded responses, so it needs no key
+    if not api_key and cassette.mode() != "replay":
         print("Rippling: No API Key provided.")
         return pd.DataFrame()
 
@@ -24,7 +27,9 @@ def fetch_rippling_expenses(api_key, days_back=30):
     print(f"Rippling: Fetching expenses...")
     
     try:
-        response = requests.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+        with trace.span("http.rippling", "request") as sp:
+            response = cassette.call("http.rippling", requests.get, url, headers=headers, timeout=REQUEST_TIMEOUT)
+            sp.update(status=response.status_code, bytes=len(response.content))
         if response.status_code == 404:
             print("Rippling: '/expenses' endpoint not found. Please verify correct endpoint in API docs.")
             return pd.DataFrame()
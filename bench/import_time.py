@@ -0,0 +1,74 @@
+"""
+Import-time benchmark for the entry points.
+
+Each module is imported in a fresh interpreter (so nothing is cached in
+sys.modules) several times; the median wall time is reported along with
+which heavy SDKs the import dragged in. Run from the repo root:
+
+    python bench/import_time.py
+    python bench/import_time.py --repeat 10 weekly_report sales_bot
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = [
+    "weekly_report",
+    "sales_bot",
+    "spend_bot",
+    "inventory_bot",
+    "monthly_zeni_report",
+    "inventory_internal_report",
+    "utils.docx_generator",
+]
+
+# Dependencies that should only load when a run actually needs them
+HEAVY = [
+    "snowflake.connector", "anthropic", "openai", "imap_tools",
+    "docx", "htmldocx", "cryptography", "googleapiclient", "pandas",
+]
+
+_PROBE = """
+import json, sys, time
+t = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - t
+print(json.dumps({{"seconds": elapsed, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def measure(module, repeat):
+    runs = []
+    for _ in range(repeat):
+        out = subprocess.run(
+            [sys.executable, "-c", _PROBE.format(module=module, heavy=HEAVY)],
+            cwd=ROOT, capture_output=True, text=True,
+        )
+        if out.returncode != 0:
+            return None, out.stderr.strip().splitlines()[-1:]
+        runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    return statistics.median(r["seconds"] for r in runs), runs[-1]["loaded"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Median cold-import time per entry point")
+    parser.add_argument("modules", nargs="*", default=MODULES)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'module':<28} {'median':>9}  heavy deps loaded at import")
+    for module in args.modules:
+        seconds, loaded = measure(module, args.repeat)
+        if seconds is None:
+            print(f"{module:<28} {'error':>9}  {' '.join(loaded)}")
+            continue
+        print(f"{module:<28} {seconds * 1000:>7.0f}ms  {', '.join(loaded) or '—'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Sales-path benchmark on the offline DuckDB stand-in (SALES_BACKEND=duckdb).
+
+Synthetic Shopify line items are generated at each volume scale (1x ≈ 40
+orders/day, 4 weeks) and written to a temporary Parquet file. fetch_sales_data
+then runs end to end, with no cache, on each path:
+
+    sql      the weekly summary + daily breakdown SQL on the line items
+    rollup   the same metrics from the per-day rollup (first run builds it)
+    mirror   the local Parquet mirror (first run syncs it)
+
+The first run and the median of the warm runs are reported. Run from the repo
+root (needs duckdb):
+
+    python bench/sales_duckdb.py
+    python bench/sales_duckdb.py --scale 1 10 --repeat 5 --mode sql rollup
+"""
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import sales_bot                                   # noqa: E402
+from utils import sales_duckdb, sales_mirror, trace  # noqa: E402
+from utils.history import get_week_monday          # noqa: E402
+
+BASE_ORDERS_PER_DAY = 40
+
+MODES = {
+    "sql": {"SALES_MIRROR": False, "SALES_ROLLUP_TABLE": ""},
+    "rollup": {"SALES_MIRROR": False, "SALES_ROLLUP_TABLE": "sales_rollup"},
+    "mirror": {"SALES_MIRROR": True, "SALES_ROLLUP_TABLE": ""},
+}
+
+
+def _timed_fetch():
+    trace.reset()
+    t = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        summary, _ = sales_bot.fetch_sales_data()
+    if summary.empty:
+        raise RuntimeError("fetch_sales_data returned no rows")
+    return time.perf_counter() - t
+
+
+def run(scale, mode, repeat, tmp):
+    source = Path(tmp) / f"items_{scale}x.parquet"
+    if not source.exists():
+        items = sales_duckdb.synthetic_line_items(get_week_monday(), orders_per_day=BASE_ORDERS_PER_DAY * scale)
+        items.to_parquet(source)
+    settings = {"SALES_BACKEND": "duckdb", "SALES_DUCKDB_SOURCE": str(source), **MODES[mode]}
+    with contextlib.ExitStack() as stack:
+        for name, value in settings.items():
+            stack.enter_context(patch.object(sales_bot, name, value))
+        stack.enter_context(patch.object(sales_mirror, "MIRROR_DIR", Path(tmp) / f"mirror_{scale}x"))
+        sales_bot.close_snowflake_session()
+        sales_bot.snowflake_session()               # load the table outside the timings
+        try:
+            first = _timed_fetch()
+            warm = [_timed_fetch() for _ in range(repeat)]
+        finally:
+            sales_bot.close_snowflake_session()
+    return first, statistics.median(warm)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time fetch_sales_data on the DuckDB stand-in")
+    parser.add_argument("--scale", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--mode", nargs="+", choices=list(MODES), default=list(MODES))
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'scale':>6} {'orders/day':>11} {'mode':<8} {'first':>9} {'warm':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in args.scale:
+            for mode in args.mode:
+                first, warm = run(scale, mode, args.repeat, tmp)
+                print(f"{scale:>5}x {BASE_ORDERS_PER_DAY * scale:>11,} {mode:<8} "
+                      f"{first * 1000:>7.0f}ms {warm * 1000:>7.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
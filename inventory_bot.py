@@ -3,14 +3,14 @@ import io
 import sys
 from datetime import datetime, timedelta
 import pandas as pd
-from imap_tools import MailBox, AND
-from openai import OpenAI
 from dotenv import load_dotenv
 
 # Shared utilities
 from utils.email_sender import send_report_email
 from utils.docx_generator import html_to_docx
 from utils.history import get_week_monday, save_weekly_snapshot, load_history, build_inventory_comparison
+from utils import cassette, trace
+import skus
 
 # Load environment variables from the .env file next to this script
 load_dotenv(os.path.join(os.path.dirname(os.path.abspath(__file__)), '.env'))
@@ -25,87 +25,8 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 EMAIL_SUBJECT_KEYWORD = os.getenv("EMAIL_SUBJECT_KEYWORD", "Inventory")
 EMAIL_SENDER = os.getenv("EMAIL_SENDER")
 
-# --- SKU MAPPINGS (Full Daylight catalog) ---
-SKU_MAP = {
-    # Paid Units
-    '1': 'Daylight DC-1',
-    '300': 'Daylight DC-1 Amber Sunday Bundle',
-    '301': 'Amber Sunday Bundle (2025)',
-    '302': 'Keyboard Case Bundle',
-    '303': 'Winter Solstice Bundle',
-    '400': 'Daylight Kids Bundle (Ages 3-7)',
-    '401': 'Daylight Kids Bundle (Ages 8-14)',
-    '6': 'Daylight DC-1 POS',
-    '6-k': 'Kids Daylight DC-1 POS',
-    '7': 'Daylight Kids',
-    '100': 'Daylight DC-1 Amber Sunday Bundle',
-    '200': 'Daylight DC-1 Amber Sunday Bundle',
-    # Open Box
-    '2': 'Daylight DC-1 RESEND',
-    '4.1.0': 'Daylight DC-1 1.0',
-    '4.1.1BQ': 'Daylight DC-1 1.1 BQ',
-    '4.1.1DP': 'Daylight DC-1 1.1DP',
-    '4.1.1KBQ': 'Kids Daylight DC-1 1.1 BQ',
-    '4.1.1KDP': 'Kids Daylight DC-1 1.1DP',
-    '4.1.9': 'Daylight DC-1 1.9',
-    '4.2.0': 'Daylight DC-1 2.0',
-    '4.2.1': 'Daylight DC-1 2.1',
-    '4.2.1K': 'Kids Daylight DC-1 2.1',
-    '4.2.9': 'Daylight DC-1 2.9',
-    '4.3.0': 'Daylight DC-1 3.0',
-    '4.3.1': 'Daylight DC-1 3.1',
-    '4.3.1K': 'Kids Daylight DC-1 3.1',
-    '4.3.9': 'Daylight DC-1 3.9',
-    '4.4.1': 'Daylight DC-1 4.1',
-    '4.4.1K': 'Kids Daylight DC-1 4.1',
-    '4.4.9': 'Daylight DC-1 4.9',
-    '5': 'Daylight DC-1 [DOCTOR TEST]',
-    '5-k': 'Daylight DC-1 [KIDS TEST]',
-    # Gift
-    '3': 'Daylight DC-1 GIFT',
-    '3-7': 'Daylight Kids For Friends',
-    '3-400': 'Daylight Kids Bundle (Ages 3-7) For Friends',
-    '3-401': 'Daylight Kids Bundle (Ages 8-14) For Friends',
-    # Gift Accessories
-    '3-22': 'Daylight Sling for Friends',
-    '3-28': 'Daylight Comfy Sleeve for Friends',
-    '3-29': 'LAMY Pen For Friends',
-    '3-30': 'Kids Stylus For Friends',
-    '3-31': 'Daylight Kids Case For Friends',
-    '3-34': 'Daylight Stand For Friends',
-    '3-34-1': 'Daylight Stand (SAMDI) For Friends',
-    '3-35': 'Daylight Keyboard For Friends',
-    '3-36': 'Small Incandescent Light Bulb For Friends (T45)',
-    '3-37': 'Large Incandescent Light Bulb For Friends (ST64)',
-    '3-303-Accessories': 'Winter Solstice Accessories For Friends',
-    # Accessories
-    '21': 'Daylight Sling + Black Stylus',
-    '22': 'Daylight Sling for Friends',
-    '22.5': 'Daylight Comfy Sleeve for Friends',
-    '23': 'Daylight Sling',
-    '25': 'Daylight Folio',
-    '26': 'Comfy Knitted Case',
-    '28': 'Daylight Comfy Sleeve',
-    '29': 'LAMY Pen',
-    '30': 'Kids Stylus',
-    '31': 'Daylight Kids Case',
-    '32': 'Daylight Keyboard Case',
-    '34': 'Daylight Stand',
-    '34-1': 'Daylight Stand (SAMDI)',
-    '35': 'Daylight Keyboard',
-    '36': 'Small Incandescent Light Bulb (T45 6 pack)',
-    '37': 'Large Incandescent Light Bulb (ST64 4 pack)',
-    '38': 'Kids Night Light',
-    '40': 'Wooden Light Fixture',
-    '90': 'Brown Hat with Daylight Logo',
-    '91': 'Brown Hat with Sun',
-    '92': 'Tan Hat with Orange Sun',
-    '301-INT': 'Amber Sunday Accessories (International)',
-    '301-USA': 'Amber Sunday Accessories (USA / Canada)',
-    '303-Accessories': 'Winter Solstice Accessories',
-    # Deposit
-    '5000': 'Daylight DC-1 Pre-Order Deposit',
-}
+# --- SKU MAPPINGS (Full Daylight catalog — names live in the SKU registry) ---
+SKU_MAP = skus.names()
 
 TOP_PRIORITY_SKUS = ['1', '401', '400', '28', '29', '31', '36', '37']
 
@@ -222,11 +143,16 @@ def fetch_latest_emails(limit=4):
     Fetches the latest emails matching the criteria.
     Returns a list of (date, csv_content_as_dataframe) tuples.
     """
+    return cassette.call("imap.inventory", _fetch_inventory_csvs, limit)
+
+def _fetch_inventory_csvs(limit):
+    from imap_tools import MailBox, AND
     print(f"Connecting to {IMAP_SERVER}...")
     inventory_data = []
 
     try:
-        with MailBox(IMAP_SERVER).login(IMAP_USERNAME, IMAP_PASSWORD) as mailbox:
+        with trace.span("imap.fetch", IMAP_SERVER, messages=0, bytes=0) as sp, \
+                MailBox(IMAP_SERVER).login(IMAP_USERNAME, IMAP_PASSWORD) as mailbox:
             # Build search criteria
             criteria = AND(subject=EMAIL_SUBJECT_KEYWORD)
             if EMAIL_SENDER:
@@ -237,11 +163,13 @@ def fetch_latest_emails(limit=4):
             for msg in mailbox.fetch(criteria, limit=10, reverse=True):
                 if len(inventory_data) >= limit:
                     break
+                sp["messages"] += 1
                 
                 # Check for CSV attachments
                 for att in msg.attachments:
                     if att.filename.lower().endswith('.csv'):
                         print(f"Found CSV in email from {msg.date}: {att.filename}")
+                        sp["bytes"] += len(att.payload)
                         try:
                             # Read CSV content into pandas DataFrame
                             csv_content = io.BytesIO(att.payload)
@@ -418,8 +346,6 @@ def generate_llm_report(dfs_data, history=None):
 
     {hist_comparison}
     """
-    
-    client = OpenAI(api_key=OPENAI_API_KEY)
 
     prompt = f"""
 You are a Senior Supply Chain Analyst at a high-growth hardware company.
@@ -483,19 +409,27 @@ FORMAT RULES:
 """
     
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": "You are a direct, no-nonsense inventory analyst."},
-                {"role": "user", "content": prompt}
-            ]
-        )
+        with trace.span("llm.openai", "inventory_report", model="gpt-4o") as sp:
+            response = cassette.call("llm.inventory", _create_completion,
+                model="gpt-4o",
+                messages=[
+                    {"role": "system", "content": "You are a direct, no-nonsense inventory analyst."},
+                    {"role": "user", "content": prompt}
+                ]
+            )
+            sp.update(trace.llm_usage(response))
         snapshot = {"skus": current_skus}
         return response.choices[0].message.content, active_items, snapshot
     except Exception as e:
         print(f"Error generating LLM report: {e}")
         return "<p>Error generating report.</p>", summary_df, {}
 
+def _create_completion(**kwargs):
+    # The client is built inside the cassette call: OpenAI() raises without a
+    # key, and a replayed run has none
+    from openai import OpenAI  # deferred: ~0.4 s to import
+    return OpenAI(api_key=OPENAI_API_KEY).chat.completions.create(**kwargs)
+
 def main():
     if not IMAP_USERNAME or not IMAP_PASSWORD or not OPENAI_API_KEY:
         print("Error: Missing environment variables. Please check .env file.")
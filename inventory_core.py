@@ -18,11 +18,14 @@ from datetime import datetime
 
 import pandas as pd
 
+import skus
+
 # What counts as a finished, fully-assembled device.
 #   SKU 1 = DC-1 adult, 6 / 6-k = POS (usually 0), 7 = Kids DC-1 bundle.
 #   Open-box / graded returns = SKU 4-x-x (all DC-1) and the RESEND SKU 2.
-DC1_SKUS = {"1", "6", "6-k"}
-KIDS_SKUS = {"7"}
+#   (Defined in the SKU registry: family "device", split by the kids group.)
+DC1_SKUS = skus.devices(kids=False)
+KIDS_SKUS = skus.devices(kids=True)
 
 
 def _envfloat(name, default):
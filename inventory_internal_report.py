@@ -29,7 +29,6 @@ from email.mime.text import MIMEText
 from email.mime.application import MIMEApplication
 
 import pandas as pd
-from imap_tools import MailBox, AND
 from dotenv import load_dotenv
 
 import inventory_core as core
@@ -89,6 +88,7 @@ def _read_attachment(att):
 
 def latest_status():
     """Most recent Items Status snapshot -> (date, filename, payload, df)."""
+    from imap_tools import MailBox, AND
     with MailBox(IMAP_SERVER).login(IMAP_USERNAME, IMAP_PASSWORD) as mb:
         crit = AND(subject="Items Status", from_=EMAIL_SENDER)
         for m in mb.fetch(crit, reverse=True, mark_seen=False, bulk=True):
@@ -103,6 +103,7 @@ def daily_flows(start, end):
     """Sum daily shipped/received over [start, end] for DC-1 / Kids. Returns dict."""
     out = {"ship_dc1": 0, "ship_kids": 0, "recv_dc1": 0, "recv_kids": 0,
            "ship_days": set(), "recv_days": set()}
+    from imap_tools import MailBox, AND
     with MailBox(IMAP_SERVER).login(IMAP_USERNAME, IMAP_PASSWORD) as mb:
         for subj, qty_col, sk, dk, dayset in (
             ("Items Shipped Today", "Shipped QTY", "ship_dc1", "ship_kids", "ship_days"),
@@ -42,7 +42,6 @@ from email.mime.text import MIMEText
 from email.mime.application import MIMEApplication
 
 import pandas as pd
-from imap_tools import MailBox, AND
 from dotenv import load_dotenv
 
 import inventory_core as core
@@ -84,6 +83,7 @@ COST_CONFIRMED = os.getenv("COST_CONFIRMED", "0") == "1"
 def fetch_snapshots(limit=10):
     """Return recent Items Status snapshots as [(date, filename, df, payload)], oldest first."""
     snaps = []
+    from imap_tools import MailBox, AND
     with MailBox(IMAP_SERVER).login(IMAP_USERNAME, IMAP_PASSWORD) as mb:
         crit = AND(subject=EMAIL_SUBJECT_KEYWORD, from_=EMAIL_SENDER)
         for msg in mb.fetch(crit, limit=limit, reverse=True, bulk=True):
@@ -139,6 +139,7 @@ def fetch_daily_flows(start, end):
     received = {"dc1": 0, "kids": 0}
     days_found = set()
 
+    from imap_tools import MailBox, AND
     with MailBox(IMAP_SERVER).login(IMAP_USERNAME, IMAP_PASSWORD) as mb:
         for subj, qty_col, bucket in (
             ("Items Shipped Today", "Shipped QTY", shipped),
@@ -19,6 +19,8 @@ import os
 import re
 import json
 
+from utils import cassette, trace
+
 SHEET_ID = os.getenv("GOOGLE_SHEET_ID", "16qhcqQvxQYZauGc8s-NTcaG2Vy3qKijV5wrx_H-jq38")
 REPORT_TAB = os.getenv("OFFICE_REPORT_TAB", "Report")
 SCOPES = ["https://www.googleapis.com/auth/spreadsheets.readonly"]
@@ -57,10 +59,12 @@ def office_summary():
         return None
     try:
         from googleapiclient.discovery import build
-        svc = build("sheets", "v4", credentials=creds, cache_discovery=False)
-        vals = (svc.spreadsheets().values()
-                .get(spreadsheetId=SHEET_ID, range=f"{REPORT_TAB}!A1:L40")
-                .execute().get("values", []))
+        with trace.span("sheets.read", f"{REPORT_TAB}!A1:L40") as sp:
+            svc = build("sheets", "v4", credentials=creds, cache_discovery=False)
+            request = (svc.spreadsheets().values()
+                       .get(spreadsheetId=SHEET_ID, range=f"{REPORT_TAB}!A1:L40"))
+            vals = cassette.call("sheets.read", request.execute).get("values", [])
+            sp["rows"] = len(vals)
     except Exception as e:                       # network / auth / API error
         print(f"[office] sheet read failed: {e}")
         return None
@@ -0,0 +1,220 @@
+"""
+Preflight: verify every external credential in parallel, before the run
+spends anything.
+
+A bad Snowflake key or IMAP password used to surface only after the other
+sections had already paid for their LLM calls. weekly_report.py --preflight
+first logs in to Snowflake, IMAP and SMTP, checks the Brex / Mercury tokens
+and the Google Sheets service account — all at once, each capped at
+PREFLIGHT_TIMEOUT_SECONDS — and then decides what to run:
+
+  PREFLIGHT_MODE=degrade (default)  drop only the sections whose source
+                                    failed (they show as failed sections in
+                                    the email); a failed Brex or Mercury
+                                    token drops just that adapter, and spend
+                                    runs on the rest; abort if SMTP is down
+  PREFLIGHT_MODE=abort              any failure stops the run, exit 1
+
+A source that isn't configured at all (e.g. no BREX_API_KEY) is reported as
+skipped, not failed — the section already handles that itself.
+
+Standalone:
+
+    python preflight.py
+"""
+import os
+import smtplib
+import sys
+import threading
+import time
+
+from dotenv import load_dotenv
+
+from utils import trace
+
+load_dotenv(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".env"), override=True)
+
+PREFLIGHT_TIMEOUT_SECONDS = float(os.getenv("PREFLIGHT_TIMEOUT_SECONDS") or 8)
+PREFLIGHT_MODE = (os.getenv("PREFLIGHT_MODE") or "degrade").strip().lower()
+
+
+class NotConfigured(Exception):
+    """The source has no credentials set — skipped, not failed."""
+
+
+# ── Checks (each returns a short detail string or raises) ─────────────────
+def check_snowflake():
+    from sales_bot import connect_snowflake, SNOWFLAKE_USER, SNOWFLAKE_ACCOUNT
+    if not SNOWFLAKE_USER or not SNOWFLAKE_ACCOUNT:
+        raise NotConfigured("SNOWFLAKE_USER / SNOWFLAKE_ACCOUNT not set")
+    # A dedicated connection, not sales_bot's shared session: a login that
+    # outlives the check must not hold the lock the sales fetch waits on
+    ctx = connect_snowflake(login_timeout=max(1, int(PREFLIGHT_TIMEOUT_SECONDS)))
+    try:
+        with ctx.cursor() as cur:
+            cur.execute("SELECT 1")
+    finally:
+        ctx.close()
+    return "login ok"
+
+
+def check_imap():
+    from imap_tools import MailBox
+    from inventory_bot import IMAP_SERVER, IMAP_USERNAME, IMAP_PASSWORD
+    if not IMAP_USERNAME or not IMAP_PASSWORD:
+        raise NotConfigured("IMAP_USERNAME / IMAP_PASSWORD not set")
+    with MailBox(IMAP_SERVER, timeout=PREFLIGHT_TIMEOUT_SECONDS).login(IMAP_USERNAME, IMAP_PASSWORD):
+        pass
+    return f"login ok ({IMAP_SERVER})"
+
+
+def check_smtp():
+    # Same settings send_unified_email() uses
+    server = os.getenv("SMTP_SERVER", "smtp.gmail.com")
+    port = int(os.getenv("SMTP_PORT", 587))
+    username, password = os.getenv("SMTP_USERNAME"), os.getenv("SMTP_PASSWORD")
+    if not username or not password:
+        raise NotConfigured("SMTP_USERNAME / SMTP_PASSWORD not set")
+    smtp_cls = smtplib.SMTP_SSL if port == 465 else smtplib.SMTP
+    with smtp_cls(server, port, timeout=PREFLIGHT_TIMEOUT_SECONDS) as s:
+        if port != 465:
+            s.starttls()
+        s.login(username, password)
+    return f"auth ok ({server}:{port})"
+
+
+def _check_token(url, api_key, env_name, params=None):
+    import requests
+    if not api_key:
+        raise NotConfigured(f"{env_name} not set")
+    response = requests.get(url, headers={"Authorization": f"Bearer {api_key}"},
+                            params=params, timeout=PREFLIGHT_TIMEOUT_SECONDS)
+    if response.status_code != 200:
+        raise RuntimeError(f"HTTP {response.status_code}")
+    return "token ok"
+
+
+def check_brex():
+    from adapters.brex import BREX_API_URL
+    return _check_token(f"{BREX_API_URL}/transactions/card/primary", os.getenv("BREX_API_KEY"),
+                        "BREX_API_KEY", params={"limit": 1})
+
+
+def check_mercury():
+    from adapters.mercury import MERCURY_API_URL
+    return _check_token(f"{MERCURY_API_URL}/accounts", os.getenv("MERCURY_API_KEY"), "MERCURY_API_KEY")
+
+
+def check_sheets():
+    from office_inventory import _credentials
+    creds = _credentials()
+    if creds is None:
+        raise NotConfigured("no Google service-account credentials")
+    from google.auth.transport.requests import Request
+    creds.refresh(Request())
+    return "service account ok"
+
+
+# name → (check, sections that need it). "smtp" gates delivery itself; the
+# Sheets account only feeds the internal report, so it never gates a section.
+CHECKS = {
+    "snowflake": (check_snowflake, ("sales",)),
+    "imap": (check_imap, ("inventory",)),
+    "brex": (check_brex, ("spend",)),
+    "mercury": (check_mercury, ("spend",)),
+    "smtp": (check_smtp, ()),
+    "sheets": (check_sheets, ()),
+}
+
+# Checks that cover one source of their section, not all of it: in degrade
+# mode the section still runs, without that source (see failed_sources)
+SOURCE_CHECKS = ("brex", "mercury")
+
+
+# ── Runner ────────────────────────────────────────────────────────────────
+def run_checks(checks, timeout=PREFLIGHT_TIMEOUT_SECONDS) -> dict:
+    """
+    Run {name: fn} concurrently. Returns {name: (status, detail, seconds)}
+    with status "ok", "failed" or "skipped". A check still running after
+    timeout counts as failed; its daemon thread is abandoned.
+    """
+    results = {}
+    lock = threading.Lock()
+
+    def worker(name, fn):
+        start = time.perf_counter()
+        try:
+            with trace.span("preflight", name):
+                status, detail = "ok", fn()
+        except NotConfigured as e:
+            status, detail = "skipped", str(e)
+        except Exception as e:
+            status, detail = "failed", f"{type(e).__name__}: {e}"
+        with lock:
+            results.setdefault(name, (status, detail, round(time.perf_counter() - start, 2)))
+
+    threads = [threading.Thread(target=worker, args=(n, fn), name=f"preflight-{n}", daemon=True)
+               for n, fn in checks.items()]
+    deadline = time.perf_counter() + timeout
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(max(0.0, deadline - time.perf_counter()))
+    with lock:
+        for name in checks:
+            results.setdefault(name, ("failed", f"no answer within {timeout:g}s", round(timeout, 2)))
+        return {name: results[name] for name in checks}
+
+
+def plan(results, sections, need_delivery=True, mode=PREFLIGHT_MODE):
+    """
+    Decide what the run does given the check results.
+    Returns (sections to run, {skipped section: reason}, abort reason or None).
+    """
+    failed = {n: detail for n, (status, detail, _) in results.items() if status == "failed"}
+    gating = {n: d for n, d in failed.items() if CHECKS.get(n, (None, ()))[1] or n == "smtp"}
+    if not gating:
+        return tuple(sections), {}, None
+    if mode == "abort":
+        return (), {}, "preflight failed: " + "; ".join(f"{n} ({d})" for n, d in gating.items())
+    if "smtp" in gating and need_delivery:
+        return (), {}, f"preflight failed: smtp ({gating['smtp']}) — the report couldn't be delivered"
+
+    skipped = {}
+    for name in sections:
+        bad = [n for n, (_, needs) in CHECKS.items()
+               if name in needs and n in gating and n not in SOURCE_CHECKS]
+        if bad:
+            skipped[name] = "preflight failed — " + "; ".join(f"{n}: {gating[n]}" for n in bad)
+    runnable = tuple(s for s in sections if s not in skipped)
+    if not runnable:
+        return (), skipped, "preflight failed for every selected section"
+    return runnable, skipped, None
+
+
+def failed_sources(results) -> dict:
+    """{source: detail} for the failed source-level checks — sources to leave out of their section."""
+    return {n: detail for n, (status, detail, _) in results.items()
+            if status == "failed" and n in SOURCE_CHECKS}
+
+
+def checks_for(sections, need_delivery=True) -> dict:
+    """The checks relevant to a run of these sections: {name: fn}."""
+    return {
+        name: fn for name, (fn, needs) in CHECKS.items()
+        if set(needs) & set(sections) or (name == "smtp" and need_delivery) or name == "sheets"
+    }
+
+
+def report(results) -> str:
+    width = max(len(n) for n in results)
+    return "\n".join(f"  {name:<{width}}  {status.upper():<7}  {seconds:>5.2f}s  {detail}"
+                     for name, (status, detail, seconds) in results.items())
+
+
+if __name__ == "__main__":
+    started = time.perf_counter()
+    results = run_checks({name: fn for name, (fn, _) in CHECKS.items()})
+    print(f"Preflight ({time.perf_counter() - started:.1f}s):")
+    print(report(results))
+    sys.exit(1 if any(status == "failed" for status, _, _ in results.values()) else 0)
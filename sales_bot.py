@@ -1,18 +1,24 @@
 import os
 import io
 import sys
-from datetime import datetime, timedelta
+import time
+import atexit
+import functools
+import threading
+from datetime import date, datetime, timedelta
+from pathlib import Path
 import pandas as pd
-import snowflake.connector
-from cryptography.hazmat.backends import default_backend
-from cryptography.hazmat.primitives import serialization
-from anthropic import Anthropic
 from dotenv import load_dotenv
+# snowflake.connector, cryptography and anthropic are imported where they're
+# used — together they cost over a second at import, and a resumed, replayed
+# or sales-less run never touches them.
 
 # Shared utilities
 from utils.email_sender import send_report_email
 from utils.docx_generator import html_to_docx
 from utils.history import get_week_monday, save_weekly_snapshot, load_history
+from utils import cassette, query_cache, sales_duckdb, sales_mirror, trace
+import skus
 
 # Load environment variables from the .env file next to this script
 load_dotenv(os.path.join(os.path.dirname(os.path.abspath(__file__)), '.env'), override=True)
@@ -30,9 +36,63 @@ SNOWFLAKE_SCHEMA = os.getenv("SNOWFLAKE_SCHEMA")
 SNOWFLAKE_PASSWORD = os.getenv("SNOWFLAKE_PASSWORD")
 SNOWFLAKE_PRIVATE_KEY_PATH = os.getenv("SNOWFLAKE_PRIVATE_KEY_PATH")
 
-
+# Seconds between status checks while async Snowflake queries run
+ASYNC_POLL_SECONDS = 0.5
+
+# A date-bounded query that scans more than SNOWFLAKE_PRUNING_SLACK × the share
+# of micro-partitions its date range should need is flagged as a pruning
+# regression in the log (see record_query_telemetry)
+SNOWFLAKE_PRUNING_SLACK = float(os.getenv("SNOWFLAKE_PRUNING_SLACK") or "3")
+
+# The SHOPIFY table's first order day, the start of its date span for that
+# check: read from Snowflake once, then kept here (orders aren't backdated)
+TABLE_SPAN_FILE = Path(__file__).parent / "data" / "shopify_first_day.txt"
+
+# SALES_BACKEND=duckdb: answer the sales SQL from a local DuckDB copy of the
+# SHOPIFY table (utils/sales_duckdb.py) instead of Snowflake — for tests and
+# benchmarks. SALES_DUCKDB_SOURCE is a Parquet file/directory of line items;
+# empty = synthetic data. Results skip the query cache.
+SALES_BACKEND = os.getenv("SALES_BACKEND") or "snowflake"
+SALES_DUCKDB_SOURCE = os.getenv("SALES_DUCKDB_SOURCE") or ""
+
+# SALES_MIRROR=1: keep a local Parquet mirror of the Shopify line items
+# (data/sales_mirror/), pull only changed days from Snowflake and compute the
+# weekly + daily metrics locally. Each sync re-reads the last
+# SALES_MIRROR_LOOKBACK_DAYS before the watermark to catch late connector rows.
+SALES_MIRROR = os.getenv("SALES_MIRROR", "0") == "1"
+SALES_MIRROR_LOOKBACK_DAYS = int(os.getenv("SALES_MIRROR_LOOKBACK_DAYS") or "3")
+
+# SALES_ROLLUP_TABLE=<db.schema.table>: maintain a per-day / per-SKU rollup of
+# the Shopify line items in Snowflake (see sync_sales_rollup) and read the
+# weekly, daily and backfill metrics from it. Each run MERGEs only the days
+# changed since the rollup's watermark, less SALES_ROLLUP_LOOKBACK_DAYS.
+# SALES_MIRROR takes precedence when both are set.
+SALES_ROLLUP_TABLE = os.getenv("SALES_ROLLUP_TABLE") or ""
+SALES_ROLLUP_LOOKBACK_DAYS = int(os.getenv("SALES_ROLLUP_LOOKBACK_DAYS") or "3")
+
+# Oldest order (in days before the sync's since) whose cancellation an
+# incremental sync still picks up. It floors created_at in the changed-day
+# scans so Snowflake prunes everything older instead of reading the whole table.
+SALES_CANCEL_WINDOW_DAYS = int(os.getenv("SALES_CANCEL_WINDOW_DAYS") or "90")
+
+# SKU groups behind the sales metrics — from the SKU registry, which also
+# compiles them into the SQL below
+DC1_SKUS = skus.in_group(skus.DC1)
+ALL_PRODUCT_SKUS = skus.in_group(skus.ALL)
+KIDS_SKUS = skus.in_group(skus.KIDS)
+UNIT_SKUS = skus.in_group(skus.UNITS)
+
+# Per-SKU rows for line items without a SKU. A NULL sku marks the weekly
+# totals rows, so those lines are reported under this label instead.
+NO_SKU = "(no sku)"
+
+
+@functools.lru_cache(maxsize=None)
 def load_private_key(path):
-    """Load and parse the RSA private key for Snowflake key-pair auth."""
+    """Load and parse the RSA private key for Snowflake key-pair auth (once per process)."""
+    from cryptography.hazmat.backends import default_backend
+    from cryptography.hazmat.primitives import serialization
+
     with open(path, 'rb') as f:
         private_key = serialization.load_pem_private_key(
             f.read(), password=None, backend=default_backend()
@@ -44,16 +104,21 @@ def load_private_key(path):
     )
 
 
-def connect_snowflake():
+def connect_snowflake(login_timeout=30):
     """Connect to Snowflake, preferring key-pair auth over password."""
+    import snowflake.connector
+
     connect_args = dict(
         account=SNOWFLAKE_ACCOUNT,
         user=SNOWFLAKE_USER,
         warehouse=SNOWFLAKE_WAREHOUSE,
         database=SNOWFLAKE_DATABASE,
         schema=SNOWFLAKE_SCHEMA,
-        login_timeout=30,
+        login_timeout=login_timeout,
         network_timeout=60,
+        # The shared session (snowflake_session) can sit idle between a
+        # report's queries for longer than the 4h token lifetime
+        client_session_keep_alive=True,
     )
 
     if SNOWFLAKE_PRIVATE_KEY_PATH and os.path.exists(SNOWFLAKE_PRIVATE_KEY_PATH):
@@ -65,43 +130,65 @@ def connect_snowflake():
     else:
         raise ValueError("No Snowflake credentials: set SNOWFLAKE_PRIVATE_KEY_PATH or SNOWFLAKE_PASSWORD")
 
-    return snowflake.connector.connect(**connect_args)
-
+    with trace.span("snowflake.connect", SNOWFLAKE_ACCOUNT):
+        return snowflake.connector.connect(**connect_args)
+
+
+# One Snowflake connection per process, shared by every sales query (summary,
+# daily breakdown, mirror delta, backfill, telemetry), so only the first pays
+# the login/TLS handshake. The preflight check logs in on its own, shorter-
+# timeout connection so a slow login can't hold the session lock.
+_session = None
+_session_lock = threading.Lock()
+
+
+def snowflake_session():
+    """The process's shared Snowflake connection, opened (or reopened if closed) on first use."""
+    global _session
+    with _session_lock:
+        if _session is None or _session.is_closed():
+            if SALES_BACKEND == "duckdb":
+                with trace.span("duckdb.connect", SALES_DUCKDB_SOURCE or "synthetic"):
+                    _session = sales_duckdb.connect(source=SALES_DUCKDB_SOURCE or None)
+            else:
+                _session = connect_snowflake()
+        return _session
+
+
+@atexit.register
+def close_snowflake_session():
+    """Close the shared connection; the next snowflake_session() logs in again."""
+    global _session
+    with _session_lock:
+        ctx, _session = _session, None
+    if ctx is not None:
+        try:
+            ctx.close()
+        except Exception:
+            pass
 
-def get_sales_query(target_monday):
-    """Build the weekly sales SQL with proper order-level tax/shipping aggregation."""
-    return f"""
-    SET target_monday = '{target_monday}'::DATE;
-    SET week1_start = $target_monday;
-    SET week1_end   = DATEADD('day', 6, $week1_start);
-    SET week2_start = DATEADD('day', -7, $week1_start);
-    SET week2_end   = DATEADD('day', -1, $week1_start);
 
-    WITH
-    -- Week 1: aggregate per order first to correctly sum taxes/shipping
-    w1_orders AS (
-        SELECT NAME,
-            SUM(CASE WHEN lineitem_sku IN ('1','6','6-k','100','200','300','301','400','401','7','303')
+# Per-order line-item aggregates (GROUP BY order NAME) and the per-period
+# totals over those orders; shared by the weekly summary, the daily breakdown
+# and the history backfill so all compute the SUMMARY_METRICS set the same way.
+ORDER_COLUMNS_SQL = f"""
+            SUM(CASE WHEN lineitem_sku IN {skus.sql_in(skus.DC1)}
                 THEN lineitem_price * lineitem_quantity ELSE 0 END) AS line_dc1,
-            SUM(CASE WHEN lineitem_sku IN ('1','6','6-k','100','200','300','301','400','401','7','302','303','21','22','23','25','26','28','29','30','31','32','33','34','35','36','37','38','5000')
+            SUM(CASE WHEN lineitem_sku IN {skus.sql_in(skus.ALL)}
                 THEN lineitem_price * lineitem_quantity ELSE 0 END) AS line_all,
-            SUM(CASE WHEN lineitem_sku IN ('7','400','401')
+            SUM(CASE WHEN lineitem_sku IN {skus.sql_in(skus.KIDS)}
                 THEN lineitem_price * lineitem_quantity ELSE 0 END) AS line_kids,
-            SUM(CASE WHEN lineitem_sku IN ('7','400','401') THEN lineitem_quantity ELSE 0 END) AS kids_units,
-            SUM(CASE WHEN lineitem_sku IN ('1','6','100','200','300','301','303','400','401','7','302')
+            SUM(CASE WHEN lineitem_sku IN {skus.sql_in(skus.KIDS)} THEN lineitem_quantity ELSE 0 END) AS kids_units,
+            SUM(CASE WHEN lineitem_sku IN {skus.sql_in(skus.UNITS)}
                 THEN lineitem_quantity ELSE 0 END) AS gross_units,
-            SUM(CASE WHEN lineitem_sku IN ('1','6','6-k','100','200','300','301','400','401','7','303') AND cancelled_at IS NULL
+            SUM(CASE WHEN lineitem_sku IN {skus.sql_in(skus.DC1)} AND cancelled_at IS NULL
                 THEN lineitem_price * lineitem_quantity ELSE 0 END) AS line_dc1_net,
             SUM(CASE WHEN cancelled_at IS NOT NULL THEN lineitem_quantity ELSE 0 END) AS cancelled_units,
             SUM(discount_amount) AS order_discounts,
             MAX(taxes) AS order_taxes,
-            MAX(shipping) AS order_shipping
-        FROM DAYLIGHT_SALES.CONNECTORS.SHOPIFY
-        WHERE created_at::DATE BETWEEN $week1_start AND $week1_end
-        GROUP BY NAME
-    ),
-    w1 AS (
-        SELECT
+            MAX(shipping) AS order_shipping""".strip()
+
+WEEK_TOTALS_SQL = """
             SUM(line_dc1) + SUM(order_taxes) + SUM(order_shipping) AS gross_sales_dc1,
             SUM(line_all) + SUM(order_taxes) + SUM(order_shipping) AS gross_sales_all,
             SUM(line_kids) AS kids_rev,
@@ -110,232 +197,790 @@ def get_sales_query(target_monday):
             SUM(cancelled_units) AS cancelled_units,
             COUNT(*) AS order_count,
             SUM(order_discounts) AS discounts,
-            SUM(line_dc1_net) - SUM(CASE WHEN cancelled_units = 0 THEN order_discounts ELSE 0 END) AS net_sales_dc1
-        FROM w1_orders
-    ),
+            SUM(line_dc1_net) - SUM(CASE WHEN cancelled_units = 0 THEN order_discounts ELSE 0 END) AS net_sales_dc1""".strip()
 
-    -- Week 2: same order-level aggregation
-    w2_orders AS (
-        SELECT NAME,
-            SUM(CASE WHEN lineitem_sku IN ('1','6','6-k','100','200','300','301','400','401','7','303')
-                THEN lineitem_price * lineitem_quantity ELSE 0 END) AS line_dc1,
-            SUM(CASE WHEN lineitem_sku IN ('1','6','6-k','100','200','300','301','400','401','7','302','303','21','22','23','25','26','28','29','30','31','32','33','34','35','36','37','38','5000')
-                THEN lineitem_price * lineitem_quantity ELSE 0 END) AS line_all,
-            SUM(CASE WHEN lineitem_sku IN ('7','400','401')
-                THEN lineitem_price * lineitem_quantity ELSE 0 END) AS line_kids,
-            SUM(CASE WHEN lineitem_sku IN ('7','400','401') THEN lineitem_quantity ELSE 0 END) AS kids_units,
-            SUM(CASE WHEN lineitem_sku IN ('1','6','100','200','300','301','303','400','401','7','302')
-                THEN lineitem_quantity ELSE 0 END) AS gross_units,
-            SUM(CASE WHEN lineitem_sku IN ('1','6','6-k','100','200','300','301','400','401','7','303') AND cancelled_at IS NULL
-                THEN lineitem_price * lineitem_quantity ELSE 0 END) AS line_dc1_net,
-            SUM(CASE WHEN cancelled_at IS NOT NULL THEN lineitem_quantity ELSE 0 END) AS cancelled_units,
-            SUM(discount_amount) AS order_discounts,
-            MAX(taxes) AS order_taxes,
-            MAX(shipping) AS order_shipping
+
+def get_sales_query(target_monday):
+    """
+    Build the weekly sales SQL with proper order-level tax/shipping aggregation.
+
+    One self-contained statement with the week dates inlined as literals (no
+    session variables): it is sent in a single round trip, and because the
+    text is deterministic per week, a rerun for the same week is answered
+    from Snowflake's 24h result cache while different weeks never collide.
+    """
+    week1_start = datetime.fromisoformat(str(target_monday)).date()
+    week2_start = week1_start - timedelta(days=7)
+    scan_end = week1_start + timedelta(days=7)     # exclusive; the scan covers both weeks
+    week1, week2 = f"'{week1_start}'::DATE", f"'{week2_start}'::DATE"
+    return f"""
+    WITH
+    -- One scan over both weeks. The range predicate compares created_at
+    -- directly (no ::DATE cast on the column) so Snowflake can prune
+    -- micro-partitions. Rows are bucketed by week, and the same pass groups
+    -- them two ways: per order (to correctly sum taxes/shipping) and per SKU
+    -- (the units/revenue breakdown).
+    scan AS (
+        SELECT
+            CASE WHEN created_at >= {week1} THEN 1 ELSE 2 END AS wk,
+            NAME,
+            lineitem_sku AS sku,
+            GROUPING(lineitem_sku) AS order_level,
+            {ORDER_COLUMNS_SQL},
+            SUM(lineitem_quantity) AS sku_units,
+            SUM(lineitem_price * lineitem_quantity) AS sku_revenue
         FROM DAYLIGHT_SALES.CONNECTORS.SHOPIFY
-        WHERE created_at::DATE BETWEEN $week2_start AND $week2_end
-        GROUP BY NAME
+        WHERE created_at >= {week2} AND created_at < '{scan_end}'::DATE
+        GROUP BY GROUPING SETS ((wk, NAME), (wk, lineitem_sku))
+    ),
+    orders AS (
+        SELECT * FROM scan WHERE order_level = 1
+    ),
+    -- Per-week totals. Ungrouped aggregates always return one row, so a week
+    -- without orders still yields NULLs (not an empty join) exactly as before.
+    w1 AS (
+        SELECT
+            {WEEK_TOTALS_SQL}
+        FROM orders
+        WHERE wk = 1
     ),
     w2 AS (
         SELECT
-            SUM(line_dc1) + SUM(order_taxes) + SUM(order_shipping) AS gross_sales_dc1,
-            SUM(line_all) + SUM(order_taxes) + SUM(order_shipping) AS gross_sales_all,
-            SUM(line_kids) AS kids_rev,
-            SUM(kids_units) AS kids_units,
-            SUM(gross_units) AS gross_units,
-            SUM(cancelled_units) AS cancelled_units,
-            COUNT(*) AS order_count,
-            SUM(order_discounts) AS discounts,
-            SUM(line_dc1_net) - SUM(CASE WHEN cancelled_units = 0 THEN order_discounts ELSE 0 END) AS net_sales_dc1
-        FROM w2_orders
+            {WEEK_TOTALS_SQL}
+        FROM orders
+        WHERE wk = 2
     )
 
-    SELECT 'Report: ' || $week1_start || ' vs ' || $week2_start AS metric,
-           'Week 1 (Target)' AS week_1, 'Week 2 (Comp)' AS week_2, '% Change' AS pct_change
-
-    UNION ALL SELECT '=============== SALES ===============', '', '', ''
-
+    -- Numeric long table: one totals row per week (sku NULL), then one row
+    -- per week and SKU with only sku_units / sku_revenue set. Derived ratios,
+    -- % changes and all display formatting happen in Python
+    -- (format_sales_summary, format_sku_breakdown).
+    SELECT 1 AS wk, {week1} AS week_start, NULL AS sku, w1.*,
+           NULL AS sku_units, NULL AS sku_revenue FROM w1
     UNION ALL
-    SELECT 'Gross Sales DC-1',
-        TO_VARCHAR(w1.gross_sales_dc1, '$999,999,999'),
-        TO_VARCHAR(w2.gross_sales_dc1, '$999,999,999'),
-        TO_VARCHAR(ROUND((w1.gross_sales_dc1 - w2.gross_sales_dc1) / NULLIF(w2.gross_sales_dc1, 0) * 100, 1)) || '%'
-    FROM w1, w2
-
-    UNION ALL
-    SELECT 'Gross Sales All Products',
-        TO_VARCHAR(w1.gross_sales_all, '$999,999,999'),
-        TO_VARCHAR(w2.gross_sales_all, '$999,999,999'),
-        TO_VARCHAR(ROUND((w1.gross_sales_all - w2.gross_sales_all) / NULLIF(w2.gross_sales_all, 0) * 100, 1)) || '%'
-    FROM w1, w2
-
+    SELECT 2 AS wk, {week2} AS week_start, NULL, w2.*, NULL, NULL FROM w2
     UNION ALL
-    SELECT 'Average Daily Sales (DC-1)',
-        TO_VARCHAR(w1.gross_sales_dc1 / 7, '$999,999,999'),
-        TO_VARCHAR(w2.gross_sales_dc1 / 7, '$999,999,999'),
-        TO_VARCHAR(ROUND(((w1.gross_sales_dc1 / 7) - (w2.gross_sales_dc1 / 7)) / NULLIF(w2.gross_sales_dc1 / 7, 0) * 100, 1)) || '%'
-    FROM w1, w2
-
-    UNION ALL
-    SELECT 'Net Sales DC-1 (- canc, disc)',
-        TO_VARCHAR(w1.net_sales_dc1, '$999,999,999'),
-        TO_VARCHAR(w2.net_sales_dc1, '$999,999,999'),
-        TO_VARCHAR(ROUND((w1.net_sales_dc1 - w2.net_sales_dc1) / NULLIF(w2.net_sales_dc1, 0) * 100, 1)) || '%'
-    FROM w1, w2
-
-    UNION ALL
-    SELECT 'Total Discounts',
-        TO_VARCHAR(w1.discounts, '$999,999,999'),
-        TO_VARCHAR(w2.discounts, '$999,999,999'),
-        TO_VARCHAR(ROUND((w1.discounts - w2.discounts) / NULLIF(w2.discounts, 0) * 100, 1)) || '%'
-    FROM w1, w2
-
-    UNION ALL
-    SELECT 'Discount Rate %',
-        TO_VARCHAR(ROUND(w1.discounts / NULLIF(w1.gross_sales_dc1, 0) * 100, 2)) || '%',
-        TO_VARCHAR(ROUND(w2.discounts / NULLIF(w2.gross_sales_dc1, 0) * 100, 2)) || '%',
-        TO_VARCHAR(ROUND((w1.discounts / NULLIF(w1.gross_sales_dc1, 0) * 100) - (w2.discounts / NULLIF(w2.gross_sales_dc1, 0) * 100), 2)) || ' pts'
-    FROM w1, w2
-
-    UNION ALL SELECT '=============== KIDS ===============', '', '', ''
+    SELECT wk, CASE wk WHEN 1 THEN {week1} ELSE {week2} END, COALESCE(sku, '{NO_SKU}'),
+           NULL, NULL, NULL, NULL, NULL, NULL, NULL, NULL, NULL,   -- the nine week totals
+           sku_units, sku_revenue
+    FROM scan WHERE order_level = 0
+    ORDER BY wk, sku NULLS FIRST;
+    """
 
-    UNION ALL
-    SELECT 'Kids Revenue',
-        TO_VARCHAR(w1.kids_rev, '$999,999,999'),
-        TO_VARCHAR(w2.kids_rev, '$999,999,999'),
-        TO_VARCHAR(ROUND((w1.kids_rev - w2.kids_rev) / NULLIF(w2.kids_rev, 0) * 100, 1)) || '%'
-    FROM w1, w2
 
-    UNION ALL
-    SELECT 'Kids Units Sold',
-        TO_VARCHAR(w1.kids_units), TO_VARCHAR(w2.kids_units),
-        TO_VARCHAR(ROUND((w1.kids_units - w2.kids_units) / NULLIF(w2.kids_units, 0) * 100, 1)) || '%'
-    FROM w1, w2
+def get_daily_breakdown_query(target_monday):
+    """
+    The full numeric metric set per day of the target week — for intra-week analysis.
 
-    UNION ALL
-    SELECT 'Kids % of Total Revenue',
-        TO_VARCHAR(ROUND(w1.kids_rev / NULLIF(w1.gross_sales_dc1, 0) * 100, 1)) || '%',
-        TO_VARCHAR(ROUND(w2.kids_rev / NULLIF(w2.gross_sales_dc1, 0) * 100, 1)) || '%',
-        TO_VARCHAR(ROUND((w1.kids_rev / NULLIF(w1.gross_sales_dc1, 0) * 100) - (w2.kids_rev / NULLIF(w2.gross_sales_dc1, 0) * 100), 1)) || ' pts'
-    FROM w1, w2
+    One scan with the weekly summary's order-level aggregation, totalled per
+    day instead of per week: every SUMMARY_METRICS column, so per-day AOV,
+    net sales, kids share and cancellations need no further query.
+    """
+    start = datetime.fromisoformat(str(target_monday)).date()
+    return f"""
+    WITH orders AS (
+        SELECT
+            created_at::DATE AS day,
+            NAME,
+            {ORDER_COLUMNS_SQL}
+        FROM DAYLIGHT_SALES.CONNECTORS.SHOPIFY
+        WHERE created_at >= '{start}'::DATE
+          AND created_at < '{start + timedelta(days=7)}'::DATE
+        GROUP BY day, NAME
+    )
+    SELECT
+        day,
+        {WEEK_TOTALS_SQL}
+    FROM orders
+    GROUP BY day
+    ORDER BY day;
+    """
 
-    UNION ALL
-    SELECT 'Kids % of Total Units',
-        TO_VARCHAR(ROUND(w1.kids_units / NULLIF(w1.gross_units, 0) * 100, 1)) || '%',
-        TO_VARCHAR(ROUND(w2.kids_units / NULLIF(w2.gross_units, 0) * 100, 1)) || '%',
-        TO_VARCHAR(ROUND((w1.kids_units / NULLIF(w1.gross_units, 0) * 100) - (w2.kids_units / NULLIF(w2.gross_units, 0) * 100), 1)) || ' pts'
-    FROM w1, w2
 
-    UNION ALL SELECT '=============== UNITS ===============', '', '', ''
+def fetch_sales_data():
+    """Weekly summary + daily breakdown frames (replayed from the cassette when one is loaded)."""
+    return cassette.call("snowflake.sales", _query_sales_data)
 
-    UNION ALL
-    SELECT 'Order Count', TO_VARCHAR(w1.order_count), TO_VARCHAR(w2.order_count),
-        TO_VARCHAR(ROUND((w1.order_count - w2.order_count) / NULLIF(w2.order_count, 0) * 100, 1)) || '%'
-    FROM w1, w2
 
-    UNION ALL
-    SELECT 'Total Units Sold', TO_VARCHAR(w1.gross_units), TO_VARCHAR(w2.gross_units),
-        TO_VARCHAR(ROUND((w1.gross_units - w2.gross_units) / NULLIF(w2.gross_units, 0) * 100, 1)) || '%'
-    FROM w1, w2
+def iter_result_frames(cur):
+    """
+    The cursor's result as a stream of DataFrames (lower-cased columns), one per Arrow batch.
 
-    UNION ALL
-    SELECT 'Cancelled Units', TO_VARCHAR(w1.cancelled_units), TO_VARCHAR(w2.cancelled_units),
-        TO_VARCHAR(ROUND((w1.cancelled_units - w2.cancelled_units) / NULLIF(w2.cancelled_units, 0) * 100, 1)) || '%'
-    FROM w1, w2
+    fetch_arrow_batches pulls result chunks on demand, so only the batch being
+    consumed is in memory — line-item and multi-week results stay bounded on
+    the 1GB droplet however many rows come back.
+    """
+    for batch in cur.fetch_arrow_batches():
+        yield batch.to_pandas().rename(columns=str.lower)
 
-    UNION ALL SELECT '=============== CALCULATED ===============', '', '', ''
 
-    UNION ALL
-    SELECT 'AOV (DC-1)',
-        TO_VARCHAR(ROUND(w1.gross_sales_dc1 / NULLIF(w1.order_count, 0), 2), '$999,999'),
-        TO_VARCHAR(ROUND(w2.gross_sales_dc1 / NULLIF(w2.order_count, 0), 2), '$999,999'),
-        TO_VARCHAR(ROUND(((w1.gross_sales_dc1 / NULLIF(w1.order_count, 0)) - (w2.gross_sales_dc1 / NULLIF(w2.order_count, 0))) / NULLIF(w2.gross_sales_dc1 / NULLIF(w2.order_count, 0), 0) * 100, 1)) || '%'
-    FROM w1, w2
+def fetch_frame(cur):
+    """The cursor's (small) result as one DataFrame, assembled from Arrow batches."""
+    frames = list(iter_result_frames(cur))
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
 
-    UNION ALL
-    SELECT 'Revenue per Unit',
-        TO_VARCHAR(ROUND(w1.gross_sales_dc1 / NULLIF(w1.gross_units, 0), 2), '$999,999'),
-        TO_VARCHAR(ROUND(w2.gross_sales_dc1 / NULLIF(w2.gross_units, 0), 2), '$999,999'),
-        TO_VARCHAR(ROUND(((w1.gross_sales_dc1 / NULLIF(w1.gross_units, 0)) - (w2.gross_sales_dc1 / NULLIF(w2.gross_units, 0))) / NULLIF(w2.gross_sales_dc1 / NULLIF(w2.gross_units, 0), 0) * 100, 1)) || '%'
-    FROM w1, w2
 
-    UNION ALL
-    SELECT 'Cancellation Rate %',
-        TO_VARCHAR(ROUND(w1.cancelled_units / NULLIF(w1.gross_units, 0) * 100, 2)) || '%',
-        TO_VARCHAR(ROUND(w2.cancelled_units / NULLIF(w2.gross_units, 0) * 100, 2)) || '%',
-        TO_VARCHAR(ROUND((w1.cancelled_units / NULLIF(w1.gross_units, 0) * 100) - (w2.cancelled_units / NULLIF(w2.gross_units, 0) * 100), 2)) || ' pts'
-    FROM w1, w2;
+def run_queries_async(ctx, queries):
     """
+    Run {name: sql} concurrently on one Snowflake session; returns {name: DataFrame}.
 
+    Every query is submitted with execute_async before any result is awaited,
+    so the wait is roughly the slowest query rather than the sum. Columns
+    come back lower-cased. A failed query raises, and the ones still running are cancelled.
+    """
+    pending = {}
+    for name, sql in queries.items():
+        cur = ctx.cursor()
+        start = time.perf_counter()
+        cur.execute_async(sql)
+        pending[name] = (cur, cur.sfqid, start)
 
-def get_daily_breakdown_query(target_monday):
-    """Daily gross sales (DC-1) for the target week — for intra-week analysis."""
+    results = {}
+    try:
+        while pending:
+            for name, (cur, qid, start) in list(pending.items()):
+                try:
+                    if ctx.is_still_running(ctx.get_query_status_throw_if_error(qid)):
+                        continue
+                    cur.get_results_from_sfqid(qid)
+                    df = fetch_frame(cur)
+                except Exception as e:
+                    trace.record("snowflake.query", name, start, query_id=qid,
+                                 error=f"{type(e).__name__}: {e}")
+                    raise
+                trace.record("snowflake.query", name, start, query_id=qid, **trace.frame_size(df))
+                results[name] = df
+                cur.close()
+                del pending[name]
+            if pending:
+                time.sleep(ASYNC_POLL_SECONDS)
+    finally:
+        for cur, qid, _ in pending.values():
+            try:
+                cur.execute(f"SELECT SYSTEM$CANCEL_QUERY('{qid}')")
+                cur.close()
+            except Exception as e:
+                print(f"Snowflake: could not cancel query {qid}: {e}")
+    return results
+
+
+def get_query_telemetry_query(query_ids):
+    """Snowflake's own timings, bytes and partition pruning for queries run in this session."""
+    ids = ", ".join(f"'{q}'" for q in query_ids)
+    pruning = "\n        UNION ALL\n".join(f"""
+        SELECT '{q}' AS query_id,
+               SUM(operator_statistics:pruning:partitions_scanned::NUMBER) AS partitions_scanned,
+               SUM(operator_statistics:pruning:partitions_total::NUMBER) AS partitions_total
+        FROM TABLE(GET_QUERY_OPERATOR_STATS('{q}'))
+        WHERE operator_type = 'TableScan'""" for q in query_ids)
     return f"""
-    WITH daily AS (
-        SELECT
-            created_at::DATE AS day,
-            NAME,
-            SUM(CASE WHEN lineitem_sku IN ('1','6','6-k','100','200','300','301','400','401','7','303')
-                THEN lineitem_price * lineitem_quantity ELSE 0 END) AS line_dc1,
-            MAX(taxes) AS order_taxes,
-            MAX(shipping) AS order_shipping
-        FROM DAYLIGHT_SALES.CONNECTORS.SHOPIFY
-        WHERE created_at::DATE BETWEEN '{target_monday}'::DATE AND DATEADD('day', 6, '{target_monday}'::DATE)
-        GROUP BY day, NAME
+    WITH history AS (
+        SELECT query_id, total_elapsed_time, compilation_time, execution_time, bytes_scanned
+        FROM TABLE(INFORMATION_SCHEMA.QUERY_HISTORY_BY_SESSION(RESULT_LIMIT => 1000))
+        WHERE query_id IN ({ids})
+    ),
+    pruning AS ({pruning}
     )
-    SELECT
-        TO_CHAR(day, 'YYYY-MM-DD (Dy)') AS day,
-        TO_VARCHAR(SUM(line_dc1) + SUM(order_taxes) + SUM(order_shipping), '$999,999,999') AS gross_sales_dc1,
-        COUNT(DISTINCT NAME) AS orders
-    FROM daily
-    GROUP BY day
-    ORDER BY day;
+    SELECT h.query_id, h.total_elapsed_time, h.compilation_time, h.execution_time, h.bytes_scanned,
+           p.partitions_scanned, p.partitions_total
+    FROM history h LEFT JOIN pruning p ON p.query_id = h.query_id
     """
 
 
-def fetch_sales_data():
-    """Connect to Snowflake and run both the weekly summary query and the daily breakdown."""
-    if not SNOWFLAKE_USER or not SNOWFLAKE_ACCOUNT:
+def shopify_first_day(ctx):
+    """The earliest order day in SHOPIFY, or None if it's empty: one Snowflake query, ever."""
+    try:
+        return date.fromisoformat(TABLE_SPAN_FILE.read_text().strip())
+    except (OSError, ValueError):
+        pass
+    cur = ctx.cursor()
+    cur.execute("SELECT MIN(created_at)::DATE FROM DAYLIGHT_SALES.CONNECTORS.SHOPIFY")
+    first = cur.fetchone()[0]
+    cur.close()
+    if first is None:
+        return None
+    first = pd.Timestamp(first).date()
+    TABLE_SPAN_FILE.parent.mkdir(parents=True, exist_ok=True)
+    TABLE_SPAN_FILE.write_text(first.isoformat())
+    return first
+
+
+def pruning_warning(name, stats, range_days):
+    """A warning line when a query scanned far more partitions than its date range needs, else None."""
+    scanned, total, table_days = (stats.get(k) for k in ("partitions_scanned", "partitions_total", "table_days"))
+    if not total or scanned is None or not table_days:
+        return None
+    expected = min(1.0, range_days / table_days)
+    allowed = min(1.0, expected * SNOWFLAKE_PRUNING_SLACK) * total + 1
+    if scanned <= allowed:
+        return None
+    return (f"Snowflake: {name} scanned {scanned:,}/{total:,} partitions for {range_days} day(s) of "
+            f"{table_days} — expected ~{expected * total:,.0f}; date pruning may have regressed.")
+
+
+def record_query_telemetry(ctx, ranges):
+    """
+    Attach each query's Snowflake telemetry to its trace span and warn on poor pruning.
+
+    ranges maps span name → days of created_at the query covers. The most
+    recent span of each name with a query_id gets elapsed / compile /
+    execution ms, bytes_scanned and partitions_scanned / partitions_total;
+    weekly_report.py writes them to the run trace and out/snowflake_queries.jsonl.
+    Telemetry is best-effort: a failure here is logged, never raised.
+    """
+    latest = {}
+    for sp in trace.spans():
+        if sp["kind"] == "snowflake.query" and sp.get("query_id") and sp["name"] in ranges:
+            latest[sp["name"]] = sp
+    if not latest:
+        return
+    try:
+        cur = ctx.cursor()
+        cur.execute(get_query_telemetry_query([sp["query_id"] for sp in latest.values()]))
+        columns = [d[0].lower() for d in cur.description]
+        by_id = {row[0]: dict(zip(columns, row)) for row in cur.fetchall()}
+        cur.close()
+    except Exception as e:
+        print(f"Snowflake: query telemetry unavailable ({e})")
+        return
+    try:
+        first_day = shopify_first_day(ctx)
+    except Exception:
+        first_day = None                 # no table span: timings only, no pruning check
+
+    table_days = (date.today() - first_day).days + 1 if first_day else None
+    for name, sp in latest.items():
+        row = by_id.get(sp["query_id"])
+        if not row:
+            continue
+        stats = {
+            "elapsed_ms": row["total_elapsed_time"], "compile_ms": row["compilation_time"],
+            "execution_ms": row["execution_time"], "bytes_scanned": row["bytes_scanned"],
+            "partitions_scanned": row["partitions_scanned"], "partitions_total": row["partitions_total"],
+            "table_days": table_days, "range_days": ranges[name],
+        }
+        stats = {k: (int(v) if v is not None else None) for k, v in stats.items()}
+        sp.update(stats)
+        print(f"Snowflake: {name} {sp['query_id']} — {stats['elapsed_ms']} ms "
+              f"(compile {stats['compile_ms']}, exec {stats['execution_ms']}), "
+              f"{stats['bytes_scanned'] or 0:,} bytes, "
+              f"{stats['partitions_scanned']}/{stats['partitions_total']} partitions")
+        warning = pruning_warning(name, stats, ranges[name])
+        if warning:
+            print(warning)
+
+
+def _query_sales_data():
+    """Run the weekly summary and daily breakdown queries (concurrently), serving repeats from the result cache."""
+    if SALES_BACKEND != "duckdb" and (not SNOWFLAKE_USER or not SNOWFLAKE_ACCOUNT):
         print("Snowflake: Missing credentials.")
         return pd.DataFrame(), pd.DataFrame()
 
+    # When running on Monday, we want LAST week's data (the completed week)
+    # not the current week which just started today
+    target_monday = (get_week_monday() - timedelta(days=7)).isoformat()
+
+    # Full SQL per result: the cache key, and what runs on a miss
+    rollup = SALES_ROLLUP_TABLE and not SALES_MIRROR
+    scripts = {
+        "weekly_summary": get_rollup_sales_query(target_monday) if rollup else get_sales_query(target_monday),
+        "daily_breakdown": (get_rollup_daily_breakdown_query(target_monday) if rollup
+                            else get_daily_breakdown_query(target_monday)),
+    }
+    frames = {}
+    use_cache = not SALES_MIRROR and SALES_BACKEND != "duckdb"
+    if use_cache:
+        for name, sql in scripts.items():
+            cached = query_cache.get(sql, target_monday)
+            if cached is not None:
+                frames[name] = cached
+        if frames:
+            print(f"Query cache: {', '.join(frames)} for week {target_monday} served from cache.")
+        if len(frames) == len(scripts):
+            return frames["weekly_summary"], frames["daily_breakdown"]
+
     print("Connecting to Snowflake...")
     try:
-        ctx = connect_snowflake()
-        cur = ctx.cursor()
-
-        # When running on Monday, we want LAST week's data (the completed week)
-        # not the current week which just started today
-        target_monday = (get_week_monday() - timedelta(days=7)).isoformat()
+        ctx = snowflake_session()
+        if SALES_MIRROR:
+            return _mirror_sales_data(ctx, target_monday)
+        if rollup:
+            sync_sales_rollup(ctx)
         print(f"Executing SQL for week starting: {target_monday}")
 
-        # --- Weekly summary ----------------------------------
-        sql_script = get_sales_query(target_monday)
-        commands = [cmd.strip() for cmd in sql_script.split(';') if cmd.strip()]
+        # Each script is one self-contained statement, submitted side by side
+        queries = {name: scripts[name].strip().rstrip(";") for name in scripts.keys() - frames.keys()}
 
-        results_df = pd.DataFrame()
-        for i, cmd in enumerate(commands):
-            cur.execute(cmd)
-            if i == len(commands) - 1:
-                results_df = cur.fetch_pandas_all()
-        print(f"Fetched {len(results_df)} weekly summary rows.")
+        fetched = run_queries_async(ctx, queries)
+        if not rollup:      # the rollup table isn't date-clustered; pruning checks don't apply
+            record_query_telemetry(ctx, {name: {"weekly_summary": 14, "daily_breakdown": 7}[name] for name in queries})
+        if use_cache:
+            for name, df in fetched.items():
+                query_cache.put(scripts[name], target_monday, df)
+        frames.update(fetched)
 
-        # --- Daily breakdown ---------------------------------
-        cur.execute(get_daily_breakdown_query(target_monday))
-        daily_df = cur.fetch_pandas_all()
+        results_df, daily_df = frames["weekly_summary"], frames["daily_breakdown"]
+        print(f"Fetched {len(results_df)} weekly summary rows.")
         print(f"Fetched {len(daily_df)} daily rows.")
-
-        cur.close()
-        ctx.close()
         return results_df, daily_df
 
     except Exception as e:
         print(f"Snowflake Error: {e}")
+        close_snowflake_session()      # don't hand a possibly broken session to the next query
         import traceback
         traceback.print_exc()
         return pd.DataFrame(), pd.DataFrame()
 
 
+def get_mirror_delta_query(since, floor):
+    """Every line item on an order day that has a row created or cancelled at/after since (days >= floor)."""
+    return f"""
+    WITH changed_days AS (
+        SELECT DISTINCT created_at::DATE AS day
+        FROM DAYLIGHT_SALES.CONNECTORS.SHOPIFY
+        WHERE created_at >= '{floor}'::DATE
+          AND (created_at >= '{since}'::TIMESTAMP OR cancelled_at >= '{since}'::TIMESTAMP)
+    )
+    SELECT NAME, lineitem_sku, lineitem_price, lineitem_quantity, discount_amount,
+           taxes, shipping, created_at, cancelled_at
+    FROM DAYLIGHT_SALES.CONNECTORS.SHOPIFY
+    WHERE created_at >= (SELECT MIN(day) FROM changed_days)
+      AND created_at::DATE IN (SELECT day FROM changed_days)
+    ORDER BY created_at
+    """
+
+
+def sync_sales_mirror(ctx, start):
+    """
+    Bring the local mirror up to date, back to at least start (a date).
+
+    Only order days touched since the watermark (minus the lookback) are
+    fetched, and only orders placed within SALES_CANCEL_WINDOW_DAYS before
+    that are rescanned for cancellations; a mirror that doesn't reach back to
+    start is filled from start.
+    """
+    state = sales_mirror.load_state()
+    if state.get("watermark") and sales_mirror.covers(start):
+        since = datetime.fromisoformat(state["watermark"]) - timedelta(days=SALES_MIRROR_LOOKBACK_DAYS)
+        # A rolling floor: pinning it to the mirror's start would rescan all history
+        floor = max(date.fromisoformat(state["start"]),
+                    since.date() - timedelta(days=SALES_CANCEL_WINDOW_DAYS)).isoformat()
+        new_start = None
+    else:
+        since = datetime.combine(start, datetime.min.time())
+        floor = new_start = start.isoformat()
+
+    cur = ctx.cursor()
+    with trace.span("snowflake.query", "mirror_delta") as sp:
+        cur.execute(get_mirror_delta_query(since.isoformat(sep=" "), floor))
+        sp["query_id"] = cur.sfqid
+        # Ordered by created_at, so the stream fills one day partition at a time
+        sp["rows"] = 0
+
+        def batches():
+            for frame in iter_result_frames(cur):
+                sp["rows"] += len(frame)
+                yield frame
+
+        days = sales_mirror.apply_delta(batches(), since, start=new_start)
+    cur.close()
+    record_query_telemetry(ctx, {"mirror_delta": (date.today() - date.fromisoformat(floor)).days + 1})
+    print(f"Sales mirror: {sp['rows']} line items on {days} changed day(s) since {since:%Y-%m-%d %H:%M}.")
+
+
+def _line_amounts(items):
+    """Per-line metric columns (the CASE expressions of the sales SQL)."""
+    sku = items["lineitem_sku"]
+    amount = items["lineitem_price"] * items["lineitem_quantity"]
+    qty = items["lineitem_quantity"]
+    return pd.DataFrame({
+        "name": items["name"],
+        "line_dc1": amount.where(sku.isin(DC1_SKUS), 0),
+        "line_all": amount.where(sku.isin(ALL_PRODUCT_SKUS), 0),
+        "line_kids": amount.where(sku.isin(KIDS_SKUS), 0),
+        "kids_units": qty.where(sku.isin(KIDS_SKUS), 0),
+        "gross_units": qty.where(sku.isin(UNIT_SKUS), 0),
+        "line_dc1_net": amount.where(sku.isin(DC1_SKUS) & items["cancelled_at"].isna(), 0),
+        "cancelled_units": qty.where(items["cancelled_at"].notna(), 0),
+        "order_discounts": items["discount_amount"],
+        "order_taxes": items["taxes"],
+        "order_shipping": items["shipping"],
+    })
+
+
+# Line → order reduction. Taxes/shipping repeat on every line of an order, so
+# they're taken once (MAX) as in the SQL; everything else adds up.
+ORDER_AGGS = {
+    "line_dc1": "sum", "line_all": "sum", "line_kids": "sum", "kids_units": "sum",
+    "gross_units": "sum", "line_dc1_net": "sum", "cancelled_units": "sum",
+    "order_discounts": "sum", "order_taxes": "max", "order_shipping": "max",
+}
+
+
+def _order_partial(batch, bucket):
+    """One batch of line items reduced to order totals per (bucket, order name); NaN buckets drop out."""
+    lines = _line_amounts(batch)
+    lines["bucket"] = bucket
+    return lines.groupby(["bucket", "name"]).agg(ORDER_AGGS)
+
+
+def _combine_orders(partials):
+    """Per-batch order partials reduced again (sums of sums, max of maxes)."""
+    if not partials:
+        return pd.DataFrame(columns=["bucket", "name", *ORDER_AGGS])
+    return pd.concat(partials).groupby(level=[0, 1]).agg(ORDER_AGGS).reset_index()
+
+
+def _order_totals(items, bucket):
+    """
+    Order-level totals per (bucket, order name) from line items.
+
+    items is a DataFrame or an iterable of DataFrame batches; bucket(batch)
+    labels each line (NaN = outside the window). Each batch is reduced to
+    orders on its own and the partials reduced again, so memory holds
+    orders rather than line items.
+    """
+    batches = [items] if isinstance(items, pd.DataFrame) else items
+    return _combine_orders([_order_partial(batch, bucket(batch)) for batch in batches])
+
+
+def _period_totals(o):
+    """The SUMMARY_METRICS totals (WEEK_TOTALS_SQL) over one period's order rows."""
+    def total(col):   # SQL SUM: NULL over no rows
+        return o[col].sum(min_count=1)
+
+    extras = total("order_taxes") + total("order_shipping")
+    return {
+        "gross_sales_dc1": total("line_dc1") + extras,
+        "gross_sales_all": total("line_all") + extras,
+        "kids_rev": total("line_kids"),
+        "kids_units": total("kids_units"),
+        "gross_units": total("gross_units"),
+        "cancelled_units": total("cancelled_units"),
+        "order_count": len(o),
+        "discounts": total("order_discounts"),
+        "net_sales_dc1": total("line_dc1_net")
+            - o["order_discounts"].where(o["cancelled_units"] == 0, 0).sum(min_count=1),
+    }
+
+
+def summarize_line_items(items, target_monday):
+    """The weekly summary frame (same shape as get_sales_query's result) from mirrored line items."""
+    week1_start = pd.Timestamp(target_monday)
+    week2_start = week1_start - pd.Timedelta(days=7)
+    scan_end = week1_start + pd.Timedelta(days=7)
+
+    def week(batch):
+        created = batch["created_at"]
+        return ((created < week1_start).astype(int) + 1).where((created >= week2_start) & (created < scan_end))
+
+    # One pass over the batches feeds both groupings: per order (the week
+    # totals) and per SKU (the units/revenue breakdown)
+    batches = [items] if isinstance(items, pd.DataFrame) else items
+    order_partials, sku_partials = [], []
+    for batch in batches:
+        wk = week(batch)
+        order_partials.append(_order_partial(batch, wk))
+        sku_partials.append(pd.DataFrame({
+            "wk": wk, "sku": batch["lineitem_sku"].fillna(NO_SKU), "sku_units": batch["lineitem_quantity"],
+            "sku_revenue": batch["lineitem_price"] * batch["lineitem_quantity"],
+        }).groupby(["wk", "sku"]).sum())
+    orders = _combine_orders(order_partials)
+
+    totals = pd.DataFrame([
+        {"wk": wk, "week_start": start.date(), **_period_totals(orders[orders["bucket"] == wk])}
+        for wk, start in ((1, week1_start), (2, week2_start))
+    ])
+    if not sku_partials:
+        return totals
+    by_sku = pd.concat(sku_partials).groupby(level=[0, 1]).sum().reset_index()
+    by_sku["wk"] = by_sku["wk"].astype(int)
+    by_sku["week_start"] = by_sku["wk"].map({1: week1_start.date(), 2: week2_start.date()})
+    return pd.concat([totals, by_sku], ignore_index=True)
+
+
+def daily_breakdown_from_items(items, target_monday):
+    """The daily breakdown frame (same shape as get_daily_breakdown_query's result) from mirrored line items."""
+    start = pd.Timestamp(target_monday)
+
+    def day(batch):
+        created = batch["created_at"]
+        return created.dt.date.where((created >= start) & (created < start + pd.Timedelta(days=7)))
+
+    orders = _order_totals(items, day)
+    return pd.DataFrame(
+        [{"day": d, **_period_totals(o)} for d, o in orders.groupby("bucket", sort=True)],
+        columns=["day", *_period_totals(orders.iloc[:0])],
+    )
+
+
+def _mirror_sales_data(ctx, target_monday):
+    """Sync the mirror (delta only), then compute both sales frames locally, a day at a time."""
+    week1_start = datetime.fromisoformat(target_monday).date()
+    week2_start = week1_start - timedelta(days=7)
+    week_end = week1_start + timedelta(days=7)
+    print(f"Syncing sales mirror for week starting: {target_monday}")
+    sync_sales_mirror(ctx, week2_start)
+
+    with trace.span("local.sales_mirror", "metrics"):
+        results_df = summarize_line_items(sales_mirror.iter_days(week2_start, week_end), target_monday)
+        daily_df = daily_breakdown_from_items(sales_mirror.iter_days(week1_start, week_end), target_monday)
+    print(f"Computed weekly summary and {len(daily_df)} daily rows from the sales mirror.")
+    return results_df, daily_df
+
+
+# Per-day rollup of the Shopify line items: one row per (day, sku) with the
+# SKU's units/revenue (SKU-less lines under NO_SKU), plus one row per day with
+# is_total set and sku NULL holding that day's order-level totals. Every weekly metric is a plain SUM over day rows (each
+# order falls on one day), so the weekly, daily and backfill queries read a
+# few hundred rows instead of the connector table.
+ROLLUP_MEASURES = (
+    "line_dc1", "line_all", "line_kids", "kids_units", "gross_units", "line_dc1_net",
+    "cancelled_units", "discounts", "discounts_kept", "taxes", "shipping", "order_count",
+    "sku_units", "sku_revenue",
+)
+ROLLUP_COLUMNS = ("day", "is_total", "sku", *ROLLUP_MEASURES, "last_change_at")
+
+ROLLUP_WEEK_TOTALS_SQL = """
+            SUM(line_dc1) + SUM(taxes) + SUM(shipping) AS gross_sales_dc1,
+            SUM(line_all) + SUM(taxes) + SUM(shipping) AS gross_sales_all,
+            SUM(line_kids) AS kids_rev,
+            SUM(kids_units) AS kids_units,
+            SUM(gross_units) AS gross_units,
+            SUM(cancelled_units) AS cancelled_units,
+            COALESCE(SUM(order_count), 0) AS order_count,
+            SUM(discounts) AS discounts,
+            SUM(line_dc1_net) - SUM(discounts_kept) AS net_sales_dc1""".strip()
+
+
+def get_rollup_ddl(table):
+    """CREATE TABLE IF NOT EXISTS for the rollup (portable: Snowflake and DuckDB)."""
+    measures = ",\n        ".join(f"{col} DOUBLE" for col in ROLLUP_MEASURES)
+    return f"""
+    CREATE TABLE IF NOT EXISTS {table} (
+        day DATE NOT NULL,
+        is_total BOOLEAN NOT NULL,
+        sku VARCHAR,
+        {measures},
+        last_change_at TIMESTAMP
+    )
+    """
+
+
+def get_rollup_merge_query(table, since, floor):
+    """
+    Recompute every order day (>= floor) touched at/after since and MERGE it into the rollup.
+
+    Whole days are recomputed from the source (never incremented), so
+    re-merging the same days is idempotent. Rows match on (day, is_total,
+    sku): every source row has a distinct key, as Snowflake's MERGE requires.
+    """
+    updates = ", ".join(f"{col} = s.{col}" for col in ROLLUP_COLUMNS[3:])
+    columns = ", ".join(ROLLUP_COLUMNS)
+    values = ", ".join(f"s.{col}" for col in ROLLUP_COLUMNS)
+    return f"""
+    MERGE INTO {table} t USING (
+        WITH changed_days AS (
+            SELECT DISTINCT created_at::DATE AS day
+            FROM DAYLIGHT_SALES.CONNECTORS.SHOPIFY
+            WHERE created_at >= '{floor}'::DATE
+              AND (created_at >= '{since}'::TIMESTAMP OR cancelled_at >= '{since}'::TIMESTAMP)
+        ),
+        scan AS (
+            SELECT
+                created_at::DATE AS day,
+                NAME,
+                lineitem_sku AS sku,
+                GROUPING(lineitem_sku) AS order_level,
+                {ORDER_COLUMNS_SQL},
+                SUM(lineitem_quantity) AS sku_units,
+                SUM(lineitem_price * lineitem_quantity) AS sku_revenue,
+                MAX(COALESCE(cancelled_at, created_at)) AS last_cancel_at,
+                MAX(created_at) AS last_created_at
+            FROM DAYLIGHT_SALES.CONNECTORS.SHOPIFY
+            WHERE created_at >= (SELECT MIN(day) FROM changed_days)
+              AND created_at::DATE IN (SELECT day FROM changed_days)
+            GROUP BY GROUPING SETS ((day, NAME), (day, lineitem_sku))
+        )
+        SELECT day, TRUE AS is_total, NULL AS sku,
+               SUM(line_dc1) AS line_dc1, SUM(line_all) AS line_all, SUM(line_kids) AS line_kids,
+               SUM(kids_units) AS kids_units, SUM(gross_units) AS gross_units,
+               SUM(line_dc1_net) AS line_dc1_net, SUM(cancelled_units) AS cancelled_units,
+               SUM(order_discounts) AS discounts,
+               SUM(CASE WHEN cancelled_units = 0 THEN order_discounts ELSE 0 END) AS discounts_kept,
+               SUM(order_taxes) AS taxes, SUM(order_shipping) AS shipping, COUNT(*) AS order_count,
+               NULL AS sku_units, NULL AS sku_revenue,
+               GREATEST(MAX(last_created_at), MAX(last_cancel_at)) AS last_change_at
+        FROM scan WHERE order_level = 1
+        GROUP BY day
+        UNION ALL
+        SELECT day, FALSE, COALESCE(sku, '{NO_SKU}'),
+               NULL, NULL, NULL, NULL, NULL, NULL, NULL, NULL, NULL, NULL, NULL, NULL,
+               sku_units, sku_revenue, GREATEST(last_created_at, last_cancel_at)
+        FROM scan WHERE order_level = 0
+    ) s
+    ON t.day = s.day AND t.is_total = s.is_total AND t.sku IS NOT DISTINCT FROM s.sku
+    WHEN MATCHED THEN UPDATE SET {updates}
+    WHEN NOT MATCHED THEN INSERT ({columns}) VALUES ({values})
+    """
+
+
+def sync_sales_rollup(ctx, table=None):
+    """
+    Create the rollup table if needed, then MERGE in the days changed since its watermark.
+
+    The watermark is the latest created_at / cancelled_at already rolled up,
+    less SALES_ROLLUP_LOOKBACK_DAYS for late connector rows; only orders
+    placed within SALES_CANCEL_WINDOW_DAYS before that are rescanned for
+    cancellations. An empty table is built from the whole connector history
+    once. Returns the since used.
+    """
+    table = table or SALES_ROLLUP_TABLE
+    cur = ctx.cursor()
+    cur.execute(get_rollup_ddl(table))
+    cur.execute(f"SELECT MAX(last_change_at) FROM {table}")
+    watermark = cur.fetchone()[0]
+    since = (pd.Timestamp(watermark).to_pydatetime() - timedelta(days=SALES_ROLLUP_LOOKBACK_DAYS)
+             if watermark is not None else datetime(1970, 1, 1))
+    floor = since.date() - timedelta(days=SALES_CANCEL_WINDOW_DAYS)
+    with trace.span("snowflake.query", "rollup_merge") as sp:
+        cur.execute(get_rollup_merge_query(table, since.isoformat(sep=" "), floor.isoformat()))
+        sp["query_id"] = getattr(cur, "sfqid", None)
+        sp["rows"] = sum(v or 0 for v in cur.fetchone() or ())
+    cur.close()
+    record_query_telemetry(ctx, {"rollup_merge": (date.today() - floor).days + 1})
+    print(f"Sales rollup: {sp['rows']} row(s) merged into {table} for days changed since {since:%Y-%m-%d %H:%M}.")
+    return since
+
+
+def get_rollup_sales_query(target_monday, table=None):
+    """The weekly summary (same result shape as get_sales_query) from the rollup table."""
+    table = table or SALES_ROLLUP_TABLE
+    week1_start = datetime.fromisoformat(str(target_monday)).date()
+    week2_start = week1_start - timedelta(days=7)
+    scan_end = week1_start + timedelta(days=7)
+    week1, week2 = f"'{week1_start}'::DATE", f"'{week2_start}'::DATE"
+    return f"""
+    WITH days AS (
+        SELECT CASE WHEN day >= {week1} THEN 1 ELSE 2 END AS wk, *
+        FROM {table}
+        WHERE day >= {week2} AND day < '{scan_end}'::DATE
+    ),
+    w1 AS (SELECT {ROLLUP_WEEK_TOTALS_SQL} FROM days WHERE wk = 1 AND is_total),
+    w2 AS (SELECT {ROLLUP_WEEK_TOTALS_SQL} FROM days WHERE wk = 2 AND is_total)
+    SELECT 1 AS wk, {week1} AS week_start, NULL AS sku, w1.*,
+           NULL AS sku_units, NULL AS sku_revenue FROM w1
+    UNION ALL
+    SELECT 2 AS wk, {week2} AS week_start, NULL, w2.*, NULL, NULL FROM w2
+    UNION ALL
+    SELECT wk, CASE wk WHEN 1 THEN {week1} ELSE {week2} END, sku,
+           NULL, NULL, NULL, NULL, NULL, NULL, NULL, NULL, NULL,   -- the nine week totals
+           SUM(sku_units), SUM(sku_revenue)
+    FROM days WHERE NOT is_total
+    GROUP BY wk, sku
+    ORDER BY wk, sku NULLS FIRST
+    """
+
+
+def get_rollup_daily_breakdown_query(target_monday, table=None):
+    """The daily breakdown (same result shape as get_daily_breakdown_query) from the rollup table."""
+    table = table or SALES_ROLLUP_TABLE
+    start = datetime.fromisoformat(str(target_monday)).date()
+    return f"""
+    SELECT
+        day,
+        {ROLLUP_WEEK_TOTALS_SQL}
+    FROM {table}
+    WHERE is_total AND day >= '{start}'::DATE AND day < '{start + timedelta(days=7)}'::DATE
+    GROUP BY day
+    ORDER BY day
+    """
+
+
+def get_rollup_backfill_query(first_monday, weeks, table=None):
+    """Per-week sales metrics (same result shape as get_backfill_query) from the rollup table."""
+    table = table or SALES_ROLLUP_TABLE
+    first = datetime.fromisoformat(str(first_monday)).date()
+    end = first + timedelta(weeks=weeks)
+    return f"""
+    SELECT
+            '{first}'::DATE + 7 * CAST(FLOOR((day - '{first}'::DATE) / 7) AS INTEGER) AS week_start,
+            {ROLLUP_WEEK_TOTALS_SQL}
+    FROM {table}
+    WHERE is_total AND day >= '{first}'::DATE AND day < '{end}'::DATE
+    GROUP BY week_start
+    ORDER BY week_start
+    """
+
+
+def get_backfill_query(first_monday, weeks):
+    """Per-week sales metrics for `weeks` consecutive weeks from first_monday, in one scan grouped by week."""
+    first = datetime.fromisoformat(str(first_monday)).date()
+    end = first + timedelta(weeks=weeks)
+    return f"""
+    WITH
+    -- Same order-level aggregation as the weekly summary, bucketed by the
+    -- Monday of each order's week. The range predicate leaves created_at
+    -- uncast so Snowflake can prune micro-partitions.
+    orders AS (
+        SELECT
+            DATEADD('day', 7 * FLOOR(DATEDIFF('day', '{first}'::DATE, created_at::DATE) / 7), '{first}'::DATE) AS week_start,
+            NAME,
+            {ORDER_COLUMNS_SQL}
+        FROM DAYLIGHT_SALES.CONNECTORS.SHOPIFY
+        WHERE created_at >= '{first}'::DATE AND created_at < '{end}'::DATE
+        GROUP BY week_start, NAME
+    )
+    SELECT
+            week_start,
+            {WEEK_TOTALS_SQL}
+    FROM orders
+    GROUP BY week_start
+    ORDER BY week_start
+    """
+
+
+def backfill_sales_history(weeks, overwrite=False):
+    """
+    Write data/sales week snapshots for the `weeks` completed weeks before this one.
+
+    One grouped query computes every week's metrics. Snapshots are keyed like
+    a Monday send's (the Monday after the data week); weeks that already have
+    one are kept unless overwrite. Returns the snapshot keys written.
+    """
+    if SALES_BACKEND != "duckdb" and (not SNOWFLAKE_USER or not SNOWFLAKE_ACCOUNT):
+        print("Snowflake: Missing credentials.")
+        return []
+    last_data_week = get_week_monday() - timedelta(days=7)
+    first = last_data_week - timedelta(weeks=weeks - 1)
+
+    print(f"Backfilling {weeks} week(s) of sales history from {first}...")
+    ctx = snowflake_session()
+    if SALES_ROLLUP_TABLE:
+        sync_sales_rollup(ctx)
+    cur = ctx.cursor()
+    with trace.span("snowflake.query", "backfill") as sp:
+        cur.execute(get_rollup_backfill_query(first, weeks) if SALES_ROLLUP_TABLE else get_backfill_query(first, weeks))
+        sp["query_id"] = cur.sfqid
+        df = fetch_frame(cur)
+        sp.update(trace.frame_size(df))
+    cur.close()
+    if not SALES_ROLLUP_TABLE:
+        record_query_telemetry(ctx, {"backfill": weeks * 7})
+
+    written = []
+    existing = {h["week_monday"] for h in load_history("sales", max_weeks=weeks + 1)}
+    for _, row in df.iterrows():
+        key = pd.Timestamp(row["week_start"]).date() + timedelta(days=7)
+        if key.isoformat() in existing and not overwrite:
+            continue
+        metrics = {k: float(row[k]) for k in SUMMARY_METRICS if k in row and pd.notna(row[k])}
+        save_weekly_snapshot("sales", key, metrics)
+        written.append(key.isoformat())
+    print(f"Backfill: {len(written)} snapshot(s) written, {len(df) - len(written)} kept.")
+    return written
+
+
 def build_sales_comparison(history, current_metrics):
     """Build historical comparison string for the LLM prompt."""
     if not history:
@@ -380,35 +1025,146 @@ def build_sales_comparison(history, current_metrics):
     return "--- HISTORICAL COMPARISON ---\n" + "\n".join(lines)
 
 
-def parse_metrics_from_results(df):
-    """Extract numeric metrics from the Snowflake result table for snapshot storage."""
-    metrics = {}
-    for _, row in df.iterrows():
-        metric_name = str(row.iloc[0]).strip()
-        week1_val = str(row.iloc[1]).strip()
-
-        # Parse dollar values
-        clean = week1_val.replace('$', '').replace(',', '').replace('%', '').strip()
-        try:
-            val = float(clean)
-        except (ValueError, TypeError):
+# ── Summary metrics ───────────────────────────────────────────────────────
+# The weekly query returns one numeric row per week (wk 1 = target week,
+# wk 2 = the week before); these are its metric columns, stored as-is in the
+# history snapshot.
+SUMMARY_METRICS = (
+    "gross_sales_dc1", "gross_sales_all", "net_sales_dc1", "kids_rev", "kids_units",
+    "gross_units", "cancelled_units", "order_count", "discounts",
+)
+
+
+def _ratio(num, den, scale=1):
+    return None if num is None or not den else num / den * scale
+
+
+# Display rows: section title, or (label, value from a week's metrics, format).
+# "pct*" rows compare in points, everything else as a % change.
+SUMMARY_ROWS = (
+    "SALES",
+    ("Gross Sales DC-1", lambda w: w["gross_sales_dc1"], "money"),
+    ("Gross Sales All Products", lambda w: w["gross_sales_all"], "money"),
+    ("Average Daily Sales (DC-1)", lambda w: _ratio(w["gross_sales_dc1"], 7), "money"),
+    ("Net Sales DC-1 (- canc, disc)", lambda w: w["net_sales_dc1"], "money"),
+    ("Total Discounts", lambda w: w["discounts"], "money"),
+    ("Discount Rate %", lambda w: _ratio(w["discounts"], w["gross_sales_dc1"], 100), "pct2"),
+    "KIDS",
+    ("Kids Revenue", lambda w: w["kids_rev"], "money"),
+    ("Kids Units Sold", lambda w: w["kids_units"], "count"),
+    ("Kids % of Total Revenue", lambda w: _ratio(w["kids_rev"], w["gross_sales_dc1"], 100), "pct1"),
+    ("Kids % of Total Units", lambda w: _ratio(w["kids_units"], w["gross_units"], 100), "pct1"),
+    "UNITS",
+    ("Order Count", lambda w: w["order_count"], "count"),
+    ("Total Units Sold", lambda w: w["gross_units"], "count"),
+    ("Cancelled Units", lambda w: w["cancelled_units"], "count"),
+    "CALCULATED",
+    ("AOV (DC-1)", lambda w: _ratio(w["gross_sales_dc1"], w["order_count"]), "money"),
+    ("Revenue per Unit", lambda w: _ratio(w["gross_sales_dc1"], w["gross_units"]), "money"),
+    ("Cancellation Rate %", lambda w: _ratio(w["cancelled_units"], w["gross_units"], 100), "pct2"),
+)
+
+
+def _totals(df):
+    """The per-week totals rows of the summary frame (per-SKU rows have a sku)."""
+    return df[df["sku"].isna()] if "sku" in df.columns else df
+
+
+def _week_metrics(df, wk):
+    """{metric: float or None} for one week of the numeric summary frame."""
+    totals = _totals(df)
+    rows = totals[totals["wk"] == wk]
+    row = rows.iloc[0] if not rows.empty else {}
+    return {k: None if k not in row or pd.isna(row[k]) else float(row[k]) for k in SUMMARY_METRICS}
+
+
+def _fmt_value(value, kind):
+    if value is None:
+        return "n/a"
+    if kind == "money":
+        return f"{'-' if value < 0 else ''}${abs(value):,.0f}"
+    if kind == "count":
+        return f"{value:,.0f}"
+    return f"{value:.{kind[-1]}f}%"
+
+
+def _fmt_change(v1, v2, kind):
+    if v1 is None or v2 is None:
+        return "n/a"
+    if kind.startswith("pct"):
+        return f"{v1 - v2:.{kind[-1]}f} pts"
+    return f"{(v1 - v2) / v2 * 100:.1f}%" if v2 else "n/a"
+
+
+def format_sales_summary(df):
+    """The numeric weekly summary as the display table (LLM prompt, CSV attachment)."""
+    w1, w2 = _week_metrics(df, 1), _week_metrics(df, 2)
+    totals = _totals(df)
+    starts = {int(wk): pd.Timestamp(d).date() for wk, d in zip(totals["wk"], totals["week_start"])}
+    rows = [[f"Report: {starts.get(1)} vs {starts.get(2)}", "Week 1 (Target)", "Week 2 (Comp)", "% Change"]]
+    for spec in SUMMARY_ROWS:
+        if isinstance(spec, str):
+            rows.append([f"=============== {spec} ===============", "", "", ""])
             continue
+        label, value, kind = spec
+        v1, v2 = value(w1), value(w2)
+        rows.append([label, _fmt_value(v1, kind), _fmt_value(v2, kind), _fmt_change(v1, v2, kind)])
+    return pd.DataFrame(rows, columns=["METRIC", "WEEK_1", "WEEK_2", "PCT_CHANGE"])
+
+
+def format_sku_breakdown(df):
+    """Units and revenue per SKU for both weeks, largest target-week revenue first (CSV attachment)."""
+    if "sku" not in df.columns or df["sku"].isna().all():
+        return pd.DataFrame()
+    values = ["sku_units", "sku_revenue"]
+    wide = (df[df["sku"].notna()]
+            .pivot_table(index="sku", columns="wk", values=values, aggfunc="sum", fill_value=0)
+            .reindex(columns=pd.MultiIndex.from_product([values, [1, 2]]), fill_value=0))
+    sku_ids = [str(s) for s in wide.index]
+    out = pd.DataFrame({
+        "SKU": sku_ids,
+        "PRODUCT": [(skus.REGISTRY.get(s) or (None,))[0] or "" for s in sku_ids],
+        "FAMILY": [(skus.REGISTRY.get(s) or (None, "other"))[1] for s in sku_ids],
+        "WEEK_1_UNITS": wide[("sku_units", 1)].astype(float).to_numpy(),
+        "WEEK_1_REVENUE": wide[("sku_revenue", 1)].astype(float).round(2).to_numpy(),
+        "WEEK_2_UNITS": wide[("sku_units", 2)].astype(float).to_numpy(),
+        "WEEK_2_REVENUE": wide[("sku_revenue", 2)].astype(float).round(2).to_numpy(),
+    })
+    return out.sort_values(["WEEK_1_REVENUE", "SKU"], ascending=[False, True]).reset_index(drop=True)
+
+
+# Daily breakdown display columns: (header, value from one day's metrics, format kind)
+DAILY_COLUMNS = (
+    ("GROSS_SALES_DC1", lambda d: d["gross_sales_dc1"], "money"),
+    ("NET_SALES_DC1", lambda d: d["net_sales_dc1"], "money"),
+    ("GROSS_SALES_ALL", lambda d: d["gross_sales_all"], "money"),
+    ("ORDERS", lambda d: d["order_count"], "count"),
+    ("AOV_DC1", lambda d: _ratio(d["gross_sales_dc1"], d["order_count"]), "money"),
+    ("UNITS", lambda d: d["gross_units"], "count"),
+    ("KIDS_UNITS", lambda d: d["kids_units"], "count"),
+    ("KIDS_REVENUE", lambda d: d["kids_rev"], "money"),
+    ("DISCOUNTS", lambda d: d["discounts"], "money"),
+    ("CANCELLED_UNITS", lambda d: d["cancelled_units"], "count"),
+)
+
+
+def format_daily_breakdown(daily_df):
+    """The numeric daily breakdown as the display table (LLM prompt, CSV attachment)."""
+    if daily_df is None or daily_df.empty:
+        return daily_df
+    # Frames cached or recorded before the full metric set had only "orders"
+    daily_df = daily_df.rename(columns={"orders": "order_count"})
+    table = {"DAY": pd.to_datetime(daily_df["day"]).dt.strftime("%Y-%m-%d (%a)").tolist()}
+    days = [{k: None if k not in row or pd.isna(row[k]) else float(row[k]) for k in SUMMARY_METRICS}
+            for _, row in daily_df.iterrows()]
+    for header, value, kind in DAILY_COLUMNS:
+        table[header] = [_fmt_value(value(d), kind) for d in days]
+    return pd.DataFrame(table)
 
-        key_map = {
-            'Gross Sales DC-1': 'gross_sales_dc1',
-            'Gross Sales All Products': 'gross_sales_all',
-            'Net Sales DC-1 (- canc, disc)': 'net_sales_dc1',
-            'Kids Revenue': 'kids_rev',
-            'Total Units Sold': 'gross_units',
-            'Kids Units Sold': 'kids_units',
-            'Cancelled Units': 'cancelled_units',
-            'Order Count': 'order_count',
-            'Total Discounts': 'discounts',
-        }
-        if metric_name in key_map:
-            metrics[key_map[metric_name]] = val
 
-    return metrics
+def parse_metrics_from_results(df):
+    """Target-week metrics from the numeric summary frame, for snapshot storage (NULLs dropped)."""
+    return {k: v for k, v in _week_metrics(df, 1).items() if v is not None}
 
 
 def generate_sales_report(df, daily_df=None, history=None):
@@ -418,7 +1174,7 @@ def generate_sales_report(df, daily_df=None, history=None):
     if df.empty:
         return "<p>No sales data found for this week.</p>", {}
 
-    summary_text = df.to_string(index=False)
+    summary_text = format_sales_summary(df).to_string(index=False)
     current_metrics = parse_metrics_from_results(df)
     hist_comparison = build_sales_comparison(history or [], current_metrics)
 
@@ -426,11 +1182,12 @@ def generate_sales_report(df, daily_df=None, history=None):
     if daily_df is not None and not daily_df.empty:
         daily_block = (
             "--- DAILY BREAKDOWN (TARGET WEEK) ---\n"
-            f"{daily_df.to_string(index=False)}\n"
+            f"{format_daily_breakdown(daily_df).to_string(index=False)}\n"
         )
     else:
         daily_block = ""
 
+    from anthropic import Anthropic
     client = Anthropic(api_key=ANTHROPIC_API_KEY)
 
     prompt = f"""
@@ -475,9 +1232,10 @@ Then a single <p><b>Sales Insight:</b> …</p> — one bold sentence assessing t
 
 <h3>4. Daily Breakdown (What Drove the Week)</h3>
 Use the DAILY BREAKDOWN block verbatim — these are deterministic, not your inference.
-Render an HTML table: Day | Gross Sales (DC-1) | Orders.
+Render an HTML table: Day | Gross Sales (DC-1) | Net Sales (DC-1) | Orders | AOV | Units | Kids Units | Cancelled Units.
 Then a one-sentence call-out naming the day(s) that drove the week (best day + worst day) and whether
-the pattern looks like a weekday-skewed week, a weekend-skewed week, or a single-day spike.
+the pattern looks like a weekday-skewed week, a weekend-skewed week, or a single-day spike; note any
+day whose AOV, kids share, discounts or cancellations stand out from the rest of the week.
 If the DAILY BREAKDOWN block is empty, write "Daily data unavailable this week."
 
 <h3>5. Trends & Outlook</h3>
@@ -501,12 +1259,14 @@ FORMAT RULES:
         # claude-opus-4-8: same price as 4.6, better analysis. Note: 4.7+
         # rejects temperature/top_p, and content[0] isn't guaranteed to be
         # the text block — extract by type.
-        response = client.messages.create(
-            model="claude-opus-4-8",
-            max_tokens=8192,
-            system="You are a sharp, data-driven VP of Sales. You focus on actionable insights, revenue trends, and growth opportunities. Be direct and specific — no fluff.",
-            messages=[{"role": "user", "content": prompt}]
-        )
+        with trace.span("llm.anthropic", "sales_report", model="claude-opus-4-8") as sp:
+            response = cassette.call("llm.sales", client.messages.create,
+                model="claude-opus-4-8",
+                max_tokens=8192,
+                system="You are a sharp, data-driven VP of Sales. You focus on actionable insights, revenue trends, and growth opportunities. Be direct and specific — no fluff.",
+                messages=[{"role": "user", "content": prompt}]
+            )
+            sp.update(trace.llm_usage(response))
         report_html = next((b.text for b in response.content if b.type == "text"), "")
         if not report_html:
             raise ValueError(f"LLM returned no text content (stop_reason={response.stop_reason})")
@@ -545,11 +1305,11 @@ def main():
     docx_bytes = html_to_docx(report_html, "Weekly Sales Summary", date_str)
 
     csv_io = io.BytesIO()
-    df.to_csv(csv_io, index=False)
+    format_sales_summary(df).to_csv(csv_io, index=False)
 
     daily_csv_io = io.BytesIO()
     if daily_df is not None and not daily_df.empty:
-        daily_df.to_csv(daily_csv_io, index=False)
+        format_daily_breakdown(daily_df).to_csv(daily_csv_io, index=False)
 
     attachments = [
         (f"weekly_sales_report_{date_str}.docx", docx_bytes),
@@ -557,6 +1317,11 @@ def main():
     ]
     if daily_csv_io.getvalue():
         attachments.append(("sales_daily_breakdown.csv", daily_csv_io.getvalue()))
+    sku_df = format_sku_breakdown(df)
+    if not sku_df.empty:
+        sku_csv_io = io.BytesIO()
+        sku_df.to_csv(sku_csv_io, index=False)
+        attachments.append(("sales_by_sku.csv", sku_csv_io.getvalue()))
 
     # 5. Send; save the snapshot only after a successful delivery
     sent = send_report_email(
@@ -572,4 +1337,19 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    import argparse
+    parser = argparse.ArgumentParser(description="Weekly sales summary (standalone send)")
+    parser.add_argument("--refresh", action="store_true",
+                        help="re-run the Snowflake queries instead of using cached results")
+    parser.add_argument("--backfill", type=int, metavar="WEEKS",
+                        help="write history snapshots for the last WEEKS completed weeks "
+                             "(one Snowflake query) and exit; no report is sent")
+    parser.add_argument("--overwrite", action="store_true",
+                        help="with --backfill, replace snapshots that already exist")
+    args = parser.parse_args()
+    if args.refresh:
+        query_cache.set_refresh()
+    if args.backfill:
+        backfill_sales_history(args.backfill, overwrite=args.overwrite)
+    else:
+        main()
@@ -0,0 +1,128 @@
+"""
+The Daylight SKU registry — one place for every SKU's name, product family,
+and which sales metrics it counts toward.
+
+The sales SQL (sales_bot), the local sales metrics, the inventory display
+names (inventory_bot.SKU_MAP) and the finished-device sets the inventory
+reports count (inventory_core.DC1_SKUS / KIDS_SKUS) are all derived from
+REGISTRY, so a new SKU is added once and can't drift between them.
+
+Each entry is  sku: (name, family, sales groups)
+
+  family        device (finished standalone unit), bundle, openbox, test,
+                gift, accessory, merch, deposit
+  sales groups  dc1   Gross / Net Sales DC-1 (device + bundle revenue)
+                all   Gross Sales All Products
+                kids  Kids revenue and units
+                units Total Units Sold
+
+A name of None means DCL's catalogue has no name for the SKU (the inventory
+report falls back to the CSV description).
+"""
+
+DC1, ALL, KIDS, UNITS = "dc1", "all", "kids", "units"
+
+REGISTRY = {
+    # Devices
+    '1': ('Daylight DC-1', 'device', {DC1, ALL, UNITS}),
+    '6': ('Daylight DC-1 POS', 'device', {DC1, ALL, UNITS}),
+    '6-k': ('Kids Daylight DC-1 POS', 'device', {DC1, ALL}),
+    '7': ('Daylight Kids', 'device', {DC1, ALL, KIDS, UNITS}),
+    # Bundles
+    '100': ('Daylight DC-1 Amber Sunday Bundle', 'bundle', {DC1, ALL, UNITS}),
+    '200': ('Daylight DC-1 Amber Sunday Bundle', 'bundle', {DC1, ALL, UNITS}),
+    '300': ('Daylight DC-1 Amber Sunday Bundle', 'bundle', {DC1, ALL, UNITS}),
+    '301': ('Amber Sunday Bundle (2025)', 'bundle', {DC1, ALL, UNITS}),
+    '302': ('Keyboard Case Bundle', 'bundle', {ALL, UNITS}),
+    '303': ('Winter Solstice Bundle', 'bundle', {DC1, ALL, UNITS}),
+    '400': ('Daylight Kids Bundle (Ages 3-7)', 'bundle', {DC1, ALL, KIDS, UNITS}),
+    '401': ('Daylight Kids Bundle (Ages 8-14)', 'bundle', {DC1, ALL, KIDS, UNITS}),
+    # Open Box
+    '2': ('Daylight DC-1 RESEND', 'openbox', set()),
+    '4.1.0': ('Daylight DC-1 1.0', 'openbox', set()),
+    '4.1.1BQ': ('Daylight DC-1 1.1 BQ', 'openbox', set()),
+    '4.1.1DP': ('Daylight DC-1 1.1DP', 'openbox', set()),
+    '4.1.1KBQ': ('Kids Daylight DC-1 1.1 BQ', 'openbox', set()),
+    '4.1.1KDP': ('Kids Daylight DC-1 1.1DP', 'openbox', set()),
+    '4.1.9': ('Daylight DC-1 1.9', 'openbox', set()),
+    '4.2.0': ('Daylight DC-1 2.0', 'openbox', set()),
+    '4.2.1': ('Daylight DC-1 2.1', 'openbox', set()),
+    '4.2.1K': ('Kids Daylight DC-1 2.1', 'openbox', set()),
+    '4.2.9': ('Daylight DC-1 2.9', 'openbox', set()),
+    '4.3.0': ('Daylight DC-1 3.0', 'openbox', set()),
+    '4.3.1': ('Daylight DC-1 3.1', 'openbox', set()),
+    '4.3.1K': ('Kids Daylight DC-1 3.1', 'openbox', set()),
+    '4.3.9': ('Daylight DC-1 3.9', 'openbox', set()),
+    '4.4.1': ('Daylight DC-1 4.1', 'openbox', set()),
+    '4.4.1K': ('Kids Daylight DC-1 4.1', 'openbox', set()),
+    '4.4.9': ('Daylight DC-1 4.9', 'openbox', set()),
+    '5': ('Daylight DC-1 [DOCTOR TEST]', 'test', set()),
+    '5-k': ('Daylight DC-1 [KIDS TEST]', 'test', set()),
+    # Gift
+    '3': ('Daylight DC-1 GIFT', 'gift', set()),
+    '3-7': ('Daylight Kids For Friends', 'gift', set()),
+    '3-400': ('Daylight Kids Bundle (Ages 3-7) For Friends', 'gift', set()),
+    '3-401': ('Daylight Kids Bundle (Ages 8-14) For Friends', 'gift', set()),
+    # Gift Accessories
+    '3-22': ('Daylight Sling for Friends', 'gift', set()),
+    '3-28': ('Daylight Comfy Sleeve for Friends', 'gift', set()),
+    '3-29': ('LAMY Pen For Friends', 'gift', set()),
+    '3-30': ('Kids Stylus For Friends', 'gift', set()),
+    '3-31': ('Daylight Kids Case For Friends', 'gift', set()),
+    '3-34': ('Daylight Stand For Friends', 'gift', set()),
+    '3-34-1': ('Daylight Stand (SAMDI) For Friends', 'gift', set()),
+    '3-35': ('Daylight Keyboard For Friends', 'gift', set()),
+    '3-36': ('Small Incandescent Light Bulb For Friends (T45)', 'gift', set()),
+    '3-37': ('Large Incandescent Light Bulb For Friends (ST64)', 'gift', set()),
+    '3-303-Accessories': ('Winter Solstice Accessories For Friends', 'gift', set()),
+    # Accessories
+    '21': ('Daylight Sling + Black Stylus', 'accessory', {ALL}),
+    '22': ('Daylight Sling for Friends', 'accessory', {ALL}),
+    '22.5': ('Daylight Comfy Sleeve for Friends', 'accessory', set()),
+    '23': ('Daylight Sling', 'accessory', {ALL}),
+    '25': ('Daylight Folio', 'accessory', {ALL}),
+    '26': ('Comfy Knitted Case', 'accessory', {ALL}),
+    '28': ('Daylight Comfy Sleeve', 'accessory', {ALL}),
+    '29': ('LAMY Pen', 'accessory', {ALL}),
+    '30': ('Kids Stylus', 'accessory', {ALL}),
+    '31': ('Daylight Kids Case', 'accessory', {ALL}),
+    '32': ('Daylight Keyboard Case', 'accessory', {ALL}),
+    '33': (None, 'accessory', {ALL}),
+    '34': ('Daylight Stand', 'accessory', {ALL}),
+    '34-1': ('Daylight Stand (SAMDI)', 'accessory', set()),
+    '35': ('Daylight Keyboard', 'accessory', {ALL}),
+    '36': ('Small Incandescent Light Bulb (T45 6 pack)', 'accessory', {ALL}),
+    '37': ('Large Incandescent Light Bulb (ST64 4 pack)', 'accessory', {ALL}),
+    '38': ('Kids Night Light', 'accessory', {ALL}),
+    '40': ('Wooden Light Fixture', 'accessory', set()),
+    '301-INT': ('Amber Sunday Accessories (International)', 'accessory', set()),
+    '301-USA': ('Amber Sunday Accessories (USA / Canada)', 'accessory', set()),
+    '303-Accessories': ('Winter Solstice Accessories', 'accessory', set()),
+    # Merch
+    '90': ('Brown Hat with Daylight Logo', 'merch', set()),
+    '91': ('Brown Hat with Sun', 'merch', set()),
+    '92': ('Tan Hat with Orange Sun', 'merch', set()),
+    # Deposit
+    '5000': ('Daylight DC-1 Pre-Order Deposit', 'deposit', {ALL}),
+}
+
+
+def in_group(group) -> tuple:
+    """SKUs counted toward a sales group, in registry order."""
+    return tuple(sku for sku, (_, _, groups) in REGISTRY.items() if group in groups)
+
+
+def sql_in(group) -> str:
+    """A sales group as a SQL IN list: ('1','6',...)."""
+    return "(" + ",".join(f"'{sku}'" for sku in in_group(group)) + ")"
+
+
+def devices(kids: bool) -> set:
+    """Finished standalone devices — the units the inventory reports count."""
+    return {sku for sku, (_, family, groups) in REGISTRY.items()
+            if family == "device" and (KIDS in groups) == kids}
+
+
+def names() -> dict:
+    """sku → display name, for every SKU that has one."""
+    return {sku: name for sku, (name, _, _) in REGISTRY.items() if name}
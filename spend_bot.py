@@ -4,7 +4,6 @@ import re
 import sys
 from datetime import datetime, timedelta
 import pandas as pd
-from anthropic import Anthropic
 from dotenv import load_dotenv
 
 # Adapters
@@ -16,6 +15,7 @@ from adapters.rippling import fetch_rippling_expenses
 from utils.email_sender import send_report_email
 from utils.docx_generator import html_to_docx
 from utils.history import get_week_monday, save_weekly_snapshot, load_history, build_spend_comparison
+from utils import cassette, trace
 
 # Load environment variables from the .env file next to this script
 load_dotenv(os.path.join(os.path.dirname(os.path.abspath(__file__)), '.env'), override=True)
@@ -136,10 +136,12 @@ def compute_runway(cash_balance: float, history: list, curr_weekly_spend: float)
         'runout_date': runout.strftime('%Y-%m-%d'),
     }
 
-def generate_spend_report(df, history=None):
+def generate_spend_report(df, history=None, skipped_sources=()):
     """
     Uses LLM to analyze the unified spend dataframe for Week-over-Week insights.
     history: list of past weekly snapshots from utils/history.py
+    skipped_sources: sources left out this run (e.g. ["brex"] after a failed
+    credential check), so the report doesn't read their gap as a spend drop
     """
     print("Generating Spend Analysis with LLM...")
 
@@ -208,11 +210,21 @@ def generate_spend_report(df, history=None):
     else:
         subs_block = "--- RECURRING SUBSCRIPTIONS DETECTED ---\nNone detected in last 30 days.\n"
 
+    missing_block = ""
+    if skipped_sources:
+        missing_block = (
+            "--- MISSING SOURCES ---\n"
+            f"No data from {', '.join(s.title() for s in skipped_sources)} this week (credential check failed). "
+            "Totals and the trend exclude it — say so in the snapshot; don't read it as a drop in spend.\n"
+        )
+
     summary_text = f"""
     --- SPEND DATA ({curr_week_start.strftime('%Y-%m-%d')} to {end_date.strftime('%Y-%m-%d')}) ---
     Total Spend: {format_currency(curr_total)}
     Trend: {trend}
 
+    {missing_block}
+
     Top 10 Vendors (This Period):
     {top_vendors.to_string()}
 
@@ -226,6 +238,7 @@ def generate_spend_report(df, history=None):
     {subs_block}
     """
     
+    from anthropic import Anthropic  # deferred: ~0.5 s to import
     client = Anthropic(api_key=ANTHROPIC_API_KEY)
     
     prompt = f"""
@@ -303,14 +316,16 @@ FORMAT RULES:
         # claude-opus-4-8: same price as 4.6, better analysis. Note: 4.7+
         # rejects temperature/top_p, and content[0] isn't guaranteed to be
         # the text block — extract by type.
-        response = client.messages.create(
-            model="claude-opus-4-8",
-            max_tokens=8192,
-            system="You are an elite, highly analytical Fractional CFO. You identify operational inefficiencies, unnecessary subscriptions, and actionable cost-saving opportunities by deeply analyzing transaction context.",
-            messages=[
-                {"role": "user", "content": prompt}
-            ]
-        )
+        with trace.span("llm.anthropic", "spend_report", model="claude-opus-4-8") as sp:
+            response = cassette.call("llm.spend", client.messages.create,
+                model="claude-opus-4-8",
+                max_tokens=8192,
+                system="You are an elite, highly analytical Fractional CFO. You identify operational inefficiencies, unnecessary subscriptions, and actionable cost-saving opportunities by deeply analyzing transaction context.",
+                messages=[
+                    {"role": "user", "content": prompt}
+                ]
+            )
+            sp.update(trace.llm_usage(response))
         report_html = next((b.text for b in response.content if b.type == "text"), "")
         if not report_html:
             raise ValueError(f"LLM returned no text content (stop_reason={response.stop_reason})")
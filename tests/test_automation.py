@@ -6,10 +6,11 @@ HTTP calls are mocked and everything else operates on fixture data. Run with:
 
     venv/bin/python -m unittest discover tests -v
 """
+import json
 import os
 import sys
 import unittest
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from pathlib import Path
 from tempfile import TemporaryDirectory
 from unittest.mock import patch, MagicMock
@@ -17,12 +18,16 @@ from unittest.mock import patch, MagicMock
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import pandas as pd
+import requests
 
 from adapters import brex, mercury
-from utils import history, email_sender
+from utils import history, email_sender, stages, checkpoint, unified_email, trace, cassette, sales_mirror, query_cache
+from utils import sales_duckdb
 import spend_bot
 import sales_bot
 import inventory_bot
+import weekly_report
+import preflight
 
 
 def _http_response(payload, status=200):
@@ -32,6 +37,27 @@ def _http_response(payload, status=200):
     return resp
 
 
+# Module-level so --isolate worker processes (spawned) can unpickle them
+def _iso_fetch():
+    print("fetching in worker")
+    return "rows"
+
+
+def _iso_analyze(fetched):
+    return weekly_report._empty_analysis(f"<p>{fetched} from pid {os.getpid()}</p>")
+
+
+def _iso_crash():
+    os.kill(os.getpid(), 9)
+
+
+def _iso_hog():
+    import time
+    hog = b"x" * (300 * 2**20)
+    time.sleep(5)
+    return len(hog)
+
+
 class TestBrexAdapter(unittest.TestCase):
     def test_no_api_key_returns_empty(self):
         self.assertTrue(brex.fetch_brex_transactions(None).empty)
@@ -197,21 +223,956 @@ class TestHistory(unittest.TestCase):
 
 
 class TestSalesParsing(unittest.TestCase):
+    def _summary_frame(self):
+        base = dict.fromkeys(sales_bot.SUMMARY_METRICS, 0)
+        return pd.DataFrame([
+            {**base, "wk": 1, "week_start": date(2026, 6, 15), "gross_sales_dc1": 123456.0,
+             "order_count": 42, "kids_rev": 9876.0, "gross_sales_all": None},
+            {**base, "wk": 2, "week_start": date(2026, 6, 8), "gross_sales_dc1": 100000.0,
+             "order_count": 40, "kids_rev": 5000.0, "gross_sales_all": 110000.0},
+        ])
+
     def test_parse_metrics_from_results(self):
-        df = pd.DataFrame(
-            [
-                ["Gross Sales DC-1", "$ 123,456", "$100,000", "23.5%"],
-                ["=============== UNITS ===============", "", "", ""],
-                ["Order Count", "42", "40", "5.0%"],
-                ["Kids Revenue", "$9,876", "$8,000", "23.4%"],
-            ],
-            columns=["METRIC", "WEEK_1", "WEEK_2", "PCT_CHANGE"],
-        )
-        metrics = sales_bot.parse_metrics_from_results(df)
+        metrics = sales_bot.parse_metrics_from_results(self._summary_frame())
         self.assertEqual(metrics["gross_sales_dc1"], 123456.0)
         self.assertEqual(metrics["order_count"], 42.0)
         self.assertEqual(metrics["kids_rev"], 9876.0)
-        self.assertNotIn("gross_sales_all", metrics)
+        self.assertNotIn("gross_sales_all", metrics)   # NULL → not stored
+
+    def test_format_sales_summary_formats_in_python(self):
+        table = sales_bot.format_sales_summary(self._summary_frame()).set_index("METRIC")
+        self.assertEqual(table.index[0], "Report: 2026-06-15 vs 2026-06-08")
+        self.assertEqual(list(table.loc["Gross Sales DC-1"]), ["$123,456", "$100,000", "23.5%"])
+        self.assertEqual(list(table.loc["Gross Sales All Products"]), ["n/a", "$110,000", "n/a"])
+        self.assertEqual(table.loc["Kids % of Total Revenue", "WEEK_1"], "8.0%")
+        self.assertEqual(table.loc["Kids % of Total Revenue", "PCT_CHANGE"], "3.0 pts")
+        self.assertEqual(table.loc["Total Units Sold", "PCT_CHANGE"], "n/a")   # 0 → 0, no base
+
+    def test_sales_query_scans_shopify_once_with_sargable_range(self):
+        sql = sales_bot.get_sales_query("2026-06-15")
+        # One self-contained statement (one round trip), dates inlined so each
+        # week's text is distinct and stable for Snowflake's result cache
+        self.assertEqual(sql.strip().rstrip(";").count(";"), 0)
+        self.assertNotIn("SET ", sql)
+        self.assertNotIn("$", sql)
+        self.assertEqual(sql, sales_bot.get_sales_query("2026-06-15"))
+        self.assertNotEqual(sql, sales_bot.get_sales_query("2026-06-22"))
+        self.assertEqual(sql.count("DAYLIGHT_SALES.CONNECTORS.SHOPIFY"), 1)
+        self.assertNotIn("created_at::DATE BETWEEN", sql)
+        self.assertIn("created_at >= '2026-06-08'::DATE AND created_at < '2026-06-22'::DATE", sql)
+        self.assertIn("GROUP BY GROUPING SETS ((wk, NAME), (wk, lineitem_sku))", sql)
+
+    def test_sku_breakdown_rows_ride_along_with_the_totals(self):
+        df = pd.concat([self._summary_frame(), pd.DataFrame([
+            {"wk": 1, "week_start": date(2026, 6, 15), "sku": "400", "sku_units": 3, "sku_revenue": 1200.0},
+            {"wk": 2, "week_start": date(2026, 6, 8), "sku": "400", "sku_units": 1, "sku_revenue": 400.0},
+            {"wk": 2, "week_start": date(2026, 6, 8), "sku": "ZZ", "sku_units": 1, "sku_revenue": 9.0},
+        ])], ignore_index=True)
+        self.assertEqual(sales_bot.parse_metrics_from_results(df)["gross_sales_dc1"], 123456.0)
+        self.assertEqual(sales_bot.format_sales_summary(df).iloc[0, 0], "Report: 2026-06-15 vs 2026-06-08")
+        by_sku = sales_bot.format_sku_breakdown(df)
+        self.assertEqual(by_sku["SKU"].tolist(), ["400", "ZZ"])
+        self.assertEqual(by_sku.iloc[0][["PRODUCT", "WEEK_1_UNITS", "WEEK_2_REVENUE"]].tolist(),
+                         ["Daylight Kids Bundle (Ages 3-7)", 3, 400.0])
+        self.assertEqual(by_sku.iloc[1][["FAMILY", "WEEK_1_UNITS"]].tolist(), ["other", 0])
+        self.assertTrue(sales_bot.format_sku_breakdown(self._summary_frame()).empty)
+
+    def test_sku_registry_drives_sales_sql_and_inventory_sets(self):
+        import inventory_core
+        import skus
+        self.assertEqual(set(skus.in_group(skus.KIDS)), {"7", "400", "401"})
+        self.assertEqual(set(skus.in_group(skus.DC1)) - set(skus.in_group(skus.ALL)), set())
+        self.assertEqual((inventory_core.DC1_SKUS, inventory_core.KIDS_SKUS), ({"1", "6", "6-k"}, {"7"}))
+        self.assertEqual(inventory_bot.SKU_MAP["401"], "Daylight Kids Bundle (Ages 8-14)")
+        sql = sales_bot.get_sales_query("2026-06-15") + sales_bot.get_daily_breakdown_query("2026-06-15")
+        self.assertIn(f"lineitem_sku IN {skus.sql_in(skus.UNITS)}", sql)
+        self.assertEqual(sql.count("lineitem_sku IN ('"), 12)  # every SKU filter comes from the registry
+        self.assertEqual(sql.count(skus.sql_in(skus.DC1)), 4)
+
+    def test_backfill_writes_missing_weeks_from_one_query(self):
+        sql = sales_bot.get_backfill_query("2026-05-04", 6)
+        self.assertEqual(sql.count("DAYLIGHT_SALES.CONNECTORS.SHOPIFY"), 1)
+        self.assertIn("created_at >= '2026-05-04'::DATE AND created_at < '2026-06-15'::DATE", sql)
+        self.assertIn("GROUP BY week_start\n", sql)
+
+        rows = pd.DataFrame({"week_start": [date(2026, 6, 1), date(2026, 6, 8)],
+                             "gross_sales_dc1": [100.0, 200.0], "order_count": [3, 4], "kids_rev": [None, 5.0]})
+        with TemporaryDirectory() as tmp, patch.object(history, "DATA_DIR", Path(tmp)), \
+                patch.object(sales_bot, "SNOWFLAKE_USER", "u"), patch.object(sales_bot, "SNOWFLAKE_ACCOUNT", "a"), \
+                patch.object(sales_bot, "get_week_monday", return_value=date(2026, 6, 22)), \
+                patch.object(sales_bot, "snowflake_session") as connect, \
+                patch.object(sales_bot, "fetch_frame", return_value=rows):
+            history.save_weekly_snapshot("sales", date(2026, 6, 8), {"gross_sales_dc1": 1.0})
+            written = sales_bot.backfill_sales_history(2)
+            self.assertIn("'2026-06-08'::DATE", connect.return_value.cursor.return_value.execute.call_args_list[0][0][0])
+            self.assertEqual(written, ["2026-06-15"])                   # data week + 7 = send Monday
+            snaps = {h["week_monday"]: h for h in history.load_history("sales")}
+            self.assertEqual(snaps["2026-06-08"]["gross_sales_dc1"], 1.0)    # existing kept
+            self.assertEqual(snaps["2026-06-15"]["gross_sales_dc1"], 200.0)
+            self.assertEqual(snaps["2026-06-15"]["order_count"], 4.0)
+            self.assertEqual(sales_bot.backfill_sales_history(2, overwrite=True), ["2026-06-08", "2026-06-15"])
+            self.assertNotIn("kids_rev", history.load_history("sales")[0])   # NULL → not stored
+
+    def test_run_queries_async_submits_all_before_collecting(self):
+        events, polls = [], {"q1": 3, "q2": 1}     # q1 is the slow one
+
+        class Cursor:
+            def execute_async(self, sql):
+                self.sfqid = f"q{len([e for e in events if e[0] == 'submit']) + 1}"
+                events.append(("submit", self.sfqid))
+
+            def get_results_from_sfqid(self, qid):
+                self.qid = qid
+
+            def fetch_arrow_batches(self):
+                import pyarrow as pa
+                events.append(("fetch", self.qid))
+                yield pa.table({"N": [int(self.qid[1])]})
+
+            def close(self):
+                pass
+
+        ctx = MagicMock()
+        ctx.cursor.side_effect = Cursor
+        ctx.get_query_status_throw_if_error.side_effect = lambda qid: qid
+        ctx.is_still_running.side_effect = lambda qid: polls.__setitem__(qid, polls[qid] - 1) or polls[qid] > 0
+
+        with patch.object(sales_bot, "ASYNC_POLL_SECONDS", 0):
+            frames = sales_bot.run_queries_async(ctx, {"summary": "SELECT 1", "daily": "SELECT 2"})
+        self.assertEqual(events, [("submit", "q1"), ("submit", "q2"), ("fetch", "q2"), ("fetch", "q1")])
+        self.assertEqual(frames["summary"]["n"].tolist(), [1])
+        self.assertEqual(frames["daily"]["n"].tolist(), [2])
+
+    def test_snowflake_session_is_shared_until_closed(self):
+        first, second = MagicMock(), MagicMock()
+        first.is_closed.return_value = second.is_closed.return_value = False
+        with patch.object(sales_bot, "connect_snowflake", side_effect=[first, second]) as connect:
+            try:
+                self.assertIs(sales_bot.snowflake_session(), first)
+                self.assertIs(sales_bot.snowflake_session(), first)
+                first.is_closed.return_value = True              # dropped by the server → log in again
+                self.assertIs(sales_bot.snowflake_session(), second)
+                self.assertEqual(connect.call_count, 2)
+            finally:
+                sales_bot.close_snowflake_session()
+        second.close.assert_called_once()
+
+    def test_query_telemetry_updates_spans_and_warns_on_poor_pruning(self):
+        trace.reset()
+        trace.record("snowflake.query", "weekly_summary", 0.0, query_id="q1")
+        trace.record("snowflake.query", "daily_breakdown", 0.0, query_id="q2")
+        cur = MagicMock()
+        cur.description = [(c,) for c in ("QUERY_ID", "TOTAL_ELAPSED_TIME", "COMPILATION_TIME", "EXECUTION_TIME",
+                                          "BYTES_SCANNED", "PARTITIONS_SCANNED", "PARTITIONS_TOTAL")]
+        cur.fetchall.return_value = [("q1", 900, 300, 600, 2_000_000, 40, 1000),    # 14 of 700 days
+                                     ("q2", 400, 100, 300, 500_000, 900, 1000)]     # 7 days, near-full scan
+        ctx = MagicMock()
+        ctx.cursor.return_value = cur
+
+        first_day = date.today() - timedelta(days=699)
+        with patch("builtins.print") as out, \
+                patch.object(sales_bot, "shopify_first_day", return_value=first_day):
+            sales_bot.record_query_telemetry(ctx, {"weekly_summary": 14, "daily_breakdown": 7})
+        sql = cur.execute.call_args[0][0]
+        self.assertIn("GET_QUERY_OPERATOR_STATS('q1')", sql)
+        self.assertIn("GET_QUERY_OPERATOR_STATS('q2')", sql)
+        self.assertNotIn("SHOPIFY", sql)                 # no table scan on the measured path
+        spans = {sp["name"]: sp for sp in trace.spans()}
+        self.assertEqual(spans["weekly_summary"]["compile_ms"], 300)
+        self.assertEqual(spans["weekly_summary"]["partitions_scanned"], 40)
+        warnings = [c[0][0] for c in out.call_args_list if "pruning may have regressed" in c[0][0]]
+        self.assertEqual(len(warnings), 1)
+        self.assertIn("daily_breakdown", warnings[0])
+
+        ctx.cursor.side_effect = RuntimeError("no warehouse")
+        with patch("builtins.print"):
+            sales_bot.record_query_telemetry(ctx, {"weekly_summary": 14})     # never raises
+
+    def test_table_first_day_is_queried_once(self):
+        cur = MagicMock()
+        cur.fetchone.return_value = (date(2024, 3, 1),)
+        ctx = MagicMock()
+        ctx.cursor.return_value = cur
+        with TemporaryDirectory() as tmp, \
+                patch.object(sales_bot, "TABLE_SPAN_FILE", Path(tmp) / "data" / "first_day.txt"):
+            self.assertEqual(sales_bot.shopify_first_day(ctx), date(2024, 3, 1))
+            self.assertEqual(sales_bot.shopify_first_day(ctx), date(2024, 3, 1))
+        cur.execute.assert_called_once()
+
+
+class TestSalesMirror(unittest.TestCase):
+    @staticmethod
+    def _items(rows):
+        cols = ["NAME", "LINEITEM_SKU", "LINEITEM_PRICE", "LINEITEM_QUANTITY", "DISCOUNT_AMOUNT",
+                "TAXES", "SHIPPING", "CREATED_AT", "CANCELLED_AT"]
+        return pd.DataFrame(rows, columns=cols)
+
+    def test_delta_replaces_changed_days_and_advances_watermark(self):
+        with TemporaryDirectory() as tmp, patch.object(sales_mirror, "MIRROR_DIR", Path(tmp)):
+            first = self._items([
+                ["#1", "1", 700.0, 1, 0.0, 50.0, 10.0, "2026-06-15 09:00", None],
+                ["#2", "7", 400.0, 2, 20.0, 0.0, 0.0, "2026-06-16 12:00", None],
+            ])
+            self.assertEqual(sales_mirror.apply_delta(first, "2026-06-08", start="2026-06-08"), 2)
+            # #1 is cancelled later: only its day comes back in the next delta
+            changed = self._items([["#1", "1", 700.0, 1, 0.0, 50.0, 10.0, "2026-06-15 09:00", "2026-06-20 08:00"]])
+            sales_mirror.apply_delta(changed, "2026-06-16 12:00")
+
+            items = sales_mirror.read(date(2026, 6, 15), date(2026, 6, 22))
+            self.assertEqual(sorted(items["name"]), ["#1", "#2"])
+            self.assertTrue(items.loc[items["name"] == "#1", "cancelled_at"].notna().all())
+            state = sales_mirror.load_state()
+            self.assertEqual(state["watermark"], "2026-06-20T08:00:00")
+            self.assertEqual(state["start"], "2026-06-08")
+            self.assertTrue(sales_mirror.covers(date(2026, 6, 10)))
+            self.assertFalse(sales_mirror.covers(date(2026, 6, 1)))
+
+    def test_streamed_batches_split_mid_day_and_mid_order(self):
+        rows = [
+            ["#1", "1", 700.0, 1, 0.0, 50.0, 10.0, "2026-06-15 09:00", None],
+            ["#1", "7", 400.0, 1, 0.0, 50.0, 10.0, "2026-06-15 09:00", None],
+            ["#2", "1", 700.0, 1, 0.0, 20.0, 0.0, "2026-06-15 18:00", None],
+        ]
+        batches = [self._items(rows[:1]), self._items(rows[1:])]
+        with TemporaryDirectory() as tmp, patch.object(sales_mirror, "MIRROR_DIR", Path(tmp)):
+            self.assertEqual(sales_mirror.apply_delta(iter(batches), "2026-06-08", start="2026-06-08"), 1)
+            self.assertEqual(len(sales_mirror.read(date(2026, 6, 15), date(2026, 6, 16))), 3)
+            self.assertEqual(list(Path(tmp).glob("*.tmp")), [])
+
+        streamed = sales_bot.summarize_line_items(map(sales_mirror.normalize, batches), "2026-06-15")
+        whole = sales_bot.summarize_line_items(sales_mirror.normalize(self._items(rows)), "2026-06-15")
+        pd.testing.assert_frame_equal(streamed, whole)
+        self.assertEqual(sales_bot.parse_metrics_from_results(streamed)["gross_sales_dc1"], 1800 + 60 + 20)
+
+    def test_each_day_is_closed_once_the_stream_moves_past_it(self):
+        import pyarrow.parquet as pq
+        days = [self._items([[f"#{d}", "1", 700.0, 1, 0.0, 0.0, 0.0, f"2026-06-{d} 09:00", None]])
+                for d in (15, 16, 17)]
+        with TemporaryDirectory() as tmp, patch.object(sales_mirror, "MIRROR_DIR", Path(tmp)):
+            open_writers = []
+
+            class Writer(pq.ParquetWriter):
+                def __init__(self, where, *args, **kwargs):
+                    super().__init__(where, *args, **kwargs)
+                    open_writers.append(Path(where).name)
+
+                def close(self):
+                    super().close()
+                    open_writers.remove(Path(self.where).name)
+
+            with patch.object(pq, "ParquetWriter", Writer):
+                def stream():
+                    for batch in days:
+                        yield batch
+                        # Only the day just written is still open
+                        self.assertEqual(len(open_writers), 1)
+                self.assertEqual(sales_mirror.apply_delta(stream(), "2026-06-08", start="2026-06-08"), 3)
+
+                with self.assertRaisesRegex(ValueError, "not ordered by created_at"):
+                    sales_mirror.apply_delta(iter([days[0], days[1], days[0]]), "2026-06-08")
+            self.assertEqual(list(Path(tmp).glob("*.tmp")), [])
+            self.assertEqual(len(sales_mirror.read(date(2026, 6, 15), date(2026, 6, 18))), 3)
+
+    def test_local_metrics_match_the_sql_semantics(self):
+        items = sales_mirror.normalize(self._items([
+            # target week: one order with two lines (tax/shipping counted once), one cancelled kids order
+            ["#1", "1", 700.0, 1, 30.0, 50.0, 10.0, "2026-06-15 09:00", None],
+            ["#1", "21", 100.0, 1, 0.0, 50.0, 10.0, "2026-06-15 09:00", None],
+            ["#2", "7", 400.0, 2, 20.0, 0.0, 0.0, "2026-06-17 12:00", "2026-06-18 08:00"],
+            # comparison week
+            ["#3", "1", 700.0, 1, 0.0, 0.0, 0.0, "2026-06-10 09:00", None],
+        ]))
+        summary = sales_bot.summarize_line_items(items, "2026-06-15")
+        w1 = sales_bot.parse_metrics_from_results(summary)
+        self.assertEqual(w1["gross_sales_dc1"], 700 + 800 + 60)
+        self.assertEqual(w1["gross_sales_all"], 800 + 800 + 60)
+        self.assertEqual(w1["kids_rev"], 800)
+        self.assertEqual(w1["gross_units"], 3)
+        self.assertEqual(w1["cancelled_units"], 2)
+        self.assertEqual(w1["order_count"], 2)
+        self.assertEqual(w1["discounts"], 50)
+        self.assertEqual(w1["net_sales_dc1"], 700 - 30)   # cancelled order: no net sales, no discount
+        self.assertEqual(summary.loc[(summary["wk"] == 2) & summary["sku"].isna(), "gross_sales_dc1"].item(), 700)
+        by_sku = sales_bot.format_sku_breakdown(summary).set_index("SKU")
+        self.assertEqual(list(by_sku.index), ["7", "1", "21"])
+        self.assertEqual(by_sku.loc["7", "WEEK_1_UNITS"], 2)
+        self.assertEqual(by_sku.loc["1", "WEEK_1_REVENUE"], 700)
+        self.assertEqual(by_sku.loc["1", "WEEK_2_REVENUE"], 700)
+        self.assertEqual(by_sku.loc["21", "FAMILY"], "accessory")
+
+        daily = sales_bot.daily_breakdown_from_items(items, "2026-06-15")
+        self.assertEqual(daily["day"].tolist(), [date(2026, 6, 15), date(2026, 6, 17)])
+        self.assertEqual(daily["gross_sales_dc1"].tolist(), [760.0, 800.0])
+        self.assertEqual(daily["order_count"].tolist(), [1, 1])
+        self.assertEqual(daily["net_sales_dc1"].tolist(), [670.0, 0.0])
+        self.assertEqual(daily["kids_units"].tolist(), [0.0, 2.0])
+        self.assertEqual(daily["cancelled_units"].tolist(), [0.0, 2.0])
+        table = sales_bot.format_daily_breakdown(daily).set_index("DAY")
+        self.assertEqual(table.loc["2026-06-15 (Mon)", "AOV_DC1"], "$760")
+        self.assertEqual(table.loc["2026-06-17 (Wed)", "KIDS_REVENUE"], "$800")
+        self.assertEqual(table.loc["2026-06-17 (Wed)", "DISCOUNTS"], "$20")
+
+
+def _has_duckdb():
+    import importlib.util
+    return importlib.util.find_spec("duckdb") is not None
+
+
+@unittest.skipUnless(_has_duckdb(), "duckdb not installed")
+class TestSalesRollup(unittest.TestCase):
+    ROWS = [
+        ["#1", "1", 700.0, 1, 30.0, 50.0, 10.0, "2026-06-15 09:00", None],
+        ["#1", "21", 100.0, 1, 0.0, 50.0, 10.0, "2026-06-15 09:00", None],
+        ["#2", "7", 400.0, 2, 20.0, 0.0, 0.0, "2026-06-17 12:00", None],
+        ["#2", None, 3.0, 1, 0.0, 0.0, 0.0, "2026-06-17 12:00", None],         # SKU-less line
+        ["#3", "1", 700.0, 1, 0.0, 0.0, 0.0, "2026-06-10 09:00", None],
+    ]
+
+    def _shopify(self, rows):
+        """The DuckDB stand-in with SHOPIFY holding rows."""
+        return sales_duckdb.connect(TestSalesMirror._items(rows))
+
+    @staticmethod
+    def _query(con, sql):
+        return sales_bot.fetch_frame(con.cursor().execute(sql))
+
+    def _sync(self, con):
+        with patch("builtins.print"):
+            return sales_bot.sync_sales_rollup(con, "sales_rollup")
+
+    def test_rollup_metrics_match_the_line_item_scan(self):
+        con = self._shopify(self.ROWS)
+        self._sync(con)
+        summary = self._query(con, sales_bot.get_rollup_sales_query("2026-06-15", "sales_rollup"))
+        items = sales_mirror.normalize(TestSalesMirror._items(self.ROWS))
+        expected = sales_bot.summarize_line_items(items, "2026-06-15")
+        self.assertEqual(sales_bot.parse_metrics_from_results(summary),
+                         sales_bot.parse_metrics_from_results(expected))
+        pd.testing.assert_frame_equal(sales_bot.format_sku_breakdown(summary),
+                                      sales_bot.format_sku_breakdown(expected), check_dtype=False)
+
+        daily = self._query(con, sales_bot.get_rollup_daily_breakdown_query("2026-06-15", "sales_rollup"))
+        pd.testing.assert_frame_equal(daily, sales_bot.daily_breakdown_from_items(items, "2026-06-15"),
+                                      check_dtype=False)
+        weeks = self._query(con, sales_bot.get_rollup_backfill_query("2026-06-08", 2, "sales_rollup"))
+        self.assertEqual([pd.Timestamp(d).date() for d in weeks["week_start"]], [date(2026, 6, 8), date(2026, 6, 15)])
+        self.assertEqual(weeks["order_count"].tolist(), [1, 2])
+
+    def test_merge_is_idempotent_and_picks_up_late_cancellations(self):
+        con = self._shopify(self.ROWS)
+        self._sync(con)
+        before = self._query(con, "SELECT * FROM sales_rollup ORDER BY day, sku NULLS FIRST")
+        # One totals row per day and unique MERGE keys (Snowflake rejects duplicate source matches)
+        self.assertEqual(before.groupby("day")["is_total"].sum().tolist(), [1, 1, 1])
+        self.assertFalse(before.duplicated(["day", "is_total", "sku"]).any())
+        self.assertEqual(self._sync(con), datetime(2026, 6, 14, 12, 0))     # watermark less the lookback
+        pd.testing.assert_frame_equal(self._query(con, "SELECT * FROM sales_rollup ORDER BY day, sku NULLS FIRST"),
+                                      before)
+
+        con.cursor().execute("UPDATE DAYLIGHT_SALES.CONNECTORS.SHOPIFY SET CANCELLED_AT = '2026-06-25 08:00' WHERE NAME = '#3'")
+        self._sync(con)
+        weeks = self._query(con, sales_bot.get_rollup_backfill_query("2026-06-08", 1, "sales_rollup"))
+        self.assertEqual(weeks["cancelled_units"].tolist(), [1])
+        self.assertEqual(weeks["net_sales_dc1"].tolist(), [0])
+        self.assertEqual(len(self._query(con, "SELECT * FROM sales_rollup")), len(before))
+
+    def test_merge_scans_only_orders_inside_the_cancel_window(self):
+        con = self._shopify(self.ROWS)
+        self._sync(con)
+        # since is 2026-06-14 12:00; a 2-day window floors the scan at 06-12, past #3 (06-10)
+        con.cursor().execute("UPDATE DAYLIGHT_SALES.CONNECTORS.SHOPIFY SET CANCELLED_AT = '2026-06-25 08:00' WHERE NAME = '#3'")
+        with patch.object(sales_bot, "SALES_CANCEL_WINDOW_DAYS", 2):
+            self._sync(con)
+        weeks = self._query(con, sales_bot.get_rollup_backfill_query("2026-06-08", 1, "sales_rollup"))
+        self.assertEqual(weeks["cancelled_units"].tolist(), [0])
+
+
+@unittest.skipUnless(_has_duckdb(), "duckdb not installed")
+class TestSalesDuckDB(unittest.TestCase):
+    def test_mirror_delta_rescans_only_orders_inside_the_cancel_window(self):
+        con = sales_duckdb.connect(TestSalesMirror._items(TestSalesRollup.ROWS))
+        cancel = "UPDATE DAYLIGHT_SALES.CONNECTORS.SHOPIFY SET CANCELLED_AT = '2026-06-25 08:00' WHERE NAME = '{}'"
+        with TemporaryDirectory() as tmp, patch.object(sales_mirror, "MIRROR_DIR", Path(tmp)), \
+                patch("builtins.print"):
+            sales_bot.sync_sales_mirror(con, date(2026, 6, 8))
+            # since is 2026-06-14 12:00; a 2-day window floors the delta at 06-12, past #3 (06-10)
+            con.cursor().execute(cancel.format("#3"))
+            con.cursor().execute(cancel.format("#1"))
+            with patch.object(sales_bot, "SALES_CANCEL_WINDOW_DAYS", 2):
+                sales_bot.sync_sales_mirror(con, date(2026, 6, 8))
+            items = sales_mirror.read(date(2026, 6, 8), date(2026, 6, 22)).set_index("name")
+        self.assertTrue(pd.isna(items.loc["#3", "cancelled_at"]))
+        self.assertTrue(items.loc["#1", "cancelled_at"].notna().all())
+
+    def test_lines_without_a_sku_do_not_look_like_week_totals(self):
+        items = TestSalesMirror._items([
+            ["#1", "1", 700.0, 1, 0.0, 50.0, 10.0, "2026-06-15 09:00", None],
+            ["#1", None, 5.0, 1, 0.0, 50.0, 10.0, "2026-06-15 09:00", None],    # e.g. a tip or custom item
+            ["#2", None, 9.0, 2, 0.0, 0.0, 0.0, "2026-06-10 09:00", None],
+        ])
+        session = sales_duckdb.connect(items)
+        summary = sales_bot.fetch_frame(session.cursor().execute(sales_bot.get_sales_query("2026-06-15")))
+        local = sales_bot.summarize_line_items(sales_mirror.normalize(items), "2026-06-15")
+        for frame in (summary, local):
+            totals = frame[frame["sku"].isna()]
+            self.assertEqual(totals["wk"].tolist(), [1, 2])          # exactly one totals row per week
+            self.assertEqual(sales_bot.parse_metrics_from_results(frame)["gross_sales_dc1"], 760.0)
+            no_sku = frame[frame["sku"] == sales_bot.NO_SKU].set_index("wk")
+            self.assertEqual(no_sku["sku_revenue"].to_dict(), {1: 5.0, 2: 18.0})
+
+    def test_sales_sql_runs_offline_and_matches_the_line_item_metrics(self):
+        monday = history.get_week_monday()
+        target = (monday - timedelta(days=7)).isoformat()
+        items = sales_duckdb.synthetic_line_items(monday, weeks=3, orders_per_day=5, seed=7)
+        with TemporaryDirectory() as tmp, patch.object(sales_bot, "SALES_BACKEND", "duckdb"), \
+                patch.object(sales_bot, "SALES_DUCKDB_SOURCE", os.path.join(tmp, "items.parquet")), \
+                patch.object(sales_bot, "SALES_MIRROR", False), patch.object(sales_bot, "SALES_ROLLUP_TABLE", ""), \
+                patch.object(query_cache, "CACHE_DIR", Path(tmp) / "cache"), patch("builtins.print"):
+            items.to_parquet(os.path.join(tmp, "items.parquet"))
+            sales_bot.close_snowflake_session()
+            try:
+                summary, daily = sales_bot.fetch_sales_data()
+                weeks = sales_bot.fetch_frame(sales_bot.snowflake_session().cursor().execute(
+                    sales_bot.get_backfill_query(monday - timedelta(weeks=2), 2)))
+            finally:
+                sales_bot.close_snowflake_session()
+            self.assertFalse((Path(tmp) / "cache").exists())         # stand-in results are never cached
+
+        local = sales_bot.summarize_line_items(sales_mirror.normalize(items), target)
+        got, want = sales_bot.parse_metrics_from_results(summary), sales_bot.parse_metrics_from_results(local)
+        self.assertEqual(got.keys(), want.keys())
+        for key in want:
+            self.assertAlmostEqual(got[key], want[key], places=6, msg=key)
+        pd.testing.assert_frame_equal(sales_bot.format_sku_breakdown(summary),
+                                      sales_bot.format_sku_breakdown(local), check_dtype=False)
+        expected_daily = sales_bot.daily_breakdown_from_items(sales_mirror.normalize(items), target)
+        self.assertEqual(len(daily), 7)
+        pd.testing.assert_frame_equal(daily, expected_daily, check_dtype=False)
+        self.assertAlmostEqual(weeks["gross_sales_dc1"].iloc[-1], want["gross_sales_dc1"], places=6)
+
+
+class TestQueryCache(unittest.TestCase):
+    def test_hit_expiry_refresh_and_eviction(self):
+        df = pd.DataFrame({"wk": [1, 2], "week_start": [date(2026, 6, 15), date(2026, 6, 8)],
+                           "gross_sales_dc1": [1.5, None]})
+        with TemporaryDirectory() as tmp, patch.object(query_cache, "CACHE_DIR", Path(tmp)), \
+                patch.dict(os.environ):
+            os.environ.pop(query_cache.REFRESH_ENV, None)
+            self.assertIsNone(query_cache.get("SELECT 1", "2026-06-15"))
+            query_cache.put("SELECT 1", "2026-06-15", df)
+            hit = query_cache.get("SELECT 1", "2026-06-15")
+            self.assertEqual(hit["gross_sales_dc1"].tolist()[0], 1.5)
+            self.assertEqual(pd.Timestamp(hit["week_start"][0]).date(), date(2026, 6, 15))
+            self.assertIsNone(query_cache.get("SELECT 1", "2026-06-08"))   # other week
+            self.assertIsNone(query_cache.get("SELECT 2", "2026-06-15"))   # other SQL
+
+            query_cache.set_refresh()
+            self.assertIsNone(query_cache.get("SELECT 1", "2026-06-15"))
+            query_cache.set_refresh(False)
+
+            with patch.object(query_cache, "TTL_HOURS", 1):
+                old = query_cache._path("SELECT 1", "2026-06-15")
+                os.utime(old, (0, 0))
+                self.assertIsNone(query_cache.get("SELECT 1", "2026-06-15"))
+
+            query_cache.put("SELECT 2", "2026-06-15", df)
+            query_cache._evict(max_mb=1e-9)
+            self.assertEqual(list(Path(tmp).glob("*.parquet")), [])
+
+    def test_cached_week_skips_snowflake(self):
+        summary = pd.DataFrame({"wk": [1], "gross_sales_dc1": [5.0]})
+        daily = pd.DataFrame({"day": [date(2026, 6, 15)], "gross_sales_dc1": [5.0], "order_count": [1]})
+        by_sql = {}
+        with patch.object(sales_bot, "SNOWFLAKE_USER", "u"), patch.object(sales_bot, "SNOWFLAKE_ACCOUNT", "a"), \
+                patch.object(sales_bot, "SALES_MIRROR", False), \
+                patch.object(sales_bot.query_cache, "get", side_effect=lambda sql, wk: by_sql.get(sql)), \
+                patch.object(sales_bot, "snowflake_session") as connect:
+            target = (history.get_week_monday() - timedelta(days=7)).isoformat()
+            by_sql[sales_bot.get_sales_query(target)] = summary
+            by_sql[sales_bot.get_daily_breakdown_query(target)] = daily
+            got_summary, got_daily = sales_bot._query_sales_data()
+        connect.assert_not_called()
+        self.assertIs(got_summary, summary)
+        self.assertIs(got_daily, daily)
+
+
+class TestStageGraph(unittest.TestCase):
+    def test_log_order_follows_groups_and_failures_skip_downstream(self):
+        import io
+        import threading
+        import time
+        from contextlib import redirect_stdout
+
+        spend_done = threading.Event()
+
+        def sales_fetch():
+            # Finishes last, but its lines must still print first
+            spend_done.wait(2)
+            time.sleep(0.05)
+            print("sales: fetch")
+            return 1
+
+        def spend_fetch():
+            print("spend: fetch")
+            spend_done.set()
+            return 2
+
+        def inv_fetch():
+            print("inventory: fetch")
+            raise RuntimeError("imap down")
+
+        analyzed = []
+        graph = stages.StageGraph()
+        graph.add("sales.fetch", sales_fetch, group="sales")
+        graph.add("sales.analyze", lambda x: print("sales: analyze") or x * 10,
+                  deps=["sales.fetch"], group="sales")
+        graph.add("spend.fetch", spend_fetch, group="spend")
+        graph.add("inventory.fetch", inv_fetch, group="inventory")
+        graph.add("inventory.analyze", lambda x: analyzed.append(x),
+                  deps=["inventory.fetch"], group="inventory")
+
+        buf = io.StringIO()
+        with redirect_stdout(buf):
+            outcomes = graph.run(parallel=True)
+
+        self.assertEqual(outcomes["sales.analyze"], (10, None))
+        self.assertEqual(outcomes["spend.fetch"], (2, None))
+        # The failure is carried to the skipped downstream stage, which never ran
+        self.assertIsInstance(outcomes["inventory.analyze"][1], RuntimeError)
+        self.assertEqual(analyzed, [])
+        self.assertEqual(
+            buf.getvalue().splitlines(),
+            ["sales: fetch", "sales: analyze", "spend: fetch", "inventory: fetch"],
+        )
+
+    def test_section_budget_cancels_only_the_slow_group(self):
+        import io
+        import threading
+        from contextlib import redirect_stdout
+
+        release = threading.Event()
+        downstream = []
+        graph = stages.StageGraph()
+        graph.add("sales.fetch", lambda: release.wait(5) and print("sales: late"), group="sales")
+        graph.add("sales.analyze", lambda _: downstream.append("ran"),
+                  deps=["sales.fetch"], group="sales")
+        graph.add("spend.fetch", lambda: print("spend: fetch") or "ok", group="spend")
+
+        buf = io.StringIO()
+        with redirect_stdout(buf):
+            outcomes = graph.run(parallel=True, budgets={"sales": 0.2, "spend": 5})
+            # The abandoned fetch wakes up after the run: its output is dropped
+            release.set()
+            for thread in threading.enumerate():
+                if thread.name == "stage-sales.fetch":
+                    thread.join(2)
+            self.assertIs(sys.stdout, buf)
+            print("after the run")
+
+        self.assertIsInstance(outcomes["sales.fetch"][1], stages.StageTimeout)
+        self.assertIsInstance(outcomes["sales.analyze"][1], stages.StageTimeout)
+        self.assertEqual(downstream, [])
+        self.assertEqual(outcomes["spend.fetch"], ("ok", None))
+        self.assertEqual(
+            buf.getvalue().splitlines(),
+            ["[sales] cancelled — sales exceeded its 0.2s budget.", "spend: fetch", "after the run"],
+        )
+
+    def test_run_budget_applies_in_sequential_mode(self):
+        import io
+        import threading
+        from contextlib import redirect_stdout
+
+        release = threading.Event()
+        graph = stages.StageGraph()
+        graph.add("sales.fetch", lambda: release.wait(5), group="sales")
+        graph.add("spend.fetch", lambda: "never started", group="spend")
+        with redirect_stdout(io.StringIO()):
+            outcomes = graph.run(parallel=False, run_budget=0.2)
+        release.set()
+        for name in ("sales.fetch", "spend.fetch"):
+            self.assertIsInstance(outcomes[name][1], stages.StageTimeout)
+        section = weekly_report._failed_section("spend", outcomes["spend.fetch"][1])
+        self.assertIn("Spend section failed", section["html"])
+
+    def test_critical_path_follows_the_gating_dependency(self):
+        import time
+        graph = stages.StageGraph()
+        graph.add("slow", lambda: time.sleep(0.15))
+        graph.add("fast", lambda: None)
+        graph.add("join", lambda a, b: None, deps=["fast", "slow"])
+        graph.run(parallel=True)
+        graph.run_inline("deliver", lambda _: None, deps=["join"])
+        self.assertEqual([n for n, _ in graph.critical_path()], ["slow", "join", "deliver"])
+        self.assertIn("critical_path", graph.summary())
+
+    def test_deliver_waits_for_failed_dependencies_without_inheriting_their_error(self):
+        def broken():
+            raise RuntimeError("imap down")
+
+        graph = stages.StageGraph()
+        graph.add("sales.render", lambda: "sales")
+        graph.add("inventory.render", broken)
+        with patch("traceback.print_exc"):
+            graph.run(parallel=True)
+        sent = graph.run_inline("deliver", lambda *results: results,
+                                deps=["sales.render", "inventory.render"], wait_only=True)
+        self.assertEqual(sent, ("sales", None))
+        # deliver ran past a failure, so it isn't what the run was waiting on
+        self.assertNotIn("deliver", [n for n, _ in graph.critical_path()])
+
+
+class TestCheckpoints(unittest.TestCase):
+    def _section(self, tag):
+        return {
+            "html": f"<p>{tag}</p>",
+            "headline": {"total_spend": 12.5},
+            "attachments": [(f"{tag}.csv", b"a,b\n1,2\n"), (f"{tag}.docx", b"\x00\x01")],
+            "attachment_names": [f"{tag}.csv", f"{tag}.docx"],
+            "snapshot": {"total_spend": 12.5},
+        }
+
+    def test_roundtrip_preserves_attachment_bytes_and_order(self):
+        with TemporaryDirectory() as tmp:
+            with patch.object(checkpoint, "CHECKPOINT_DIR", Path(tmp)):
+                monday = history.get_week_monday()
+                checkpoint.save_section(monday, "spend", self._section("spend"))
+                loaded = checkpoint.load_section(monday, "spend")
+                self.assertEqual(loaded, self._section("spend"))
+                self.assertIsNone(checkpoint.load_section(monday, "sales"))
+
+    def test_resume_skips_checkpointed_sections(self):
+        calls = []
+
+        def fetcher(name):
+            def fetch():
+                calls.append(name)
+                return name
+            return fetch
+
+        def analyze(name):
+            return {**weekly_report._empty_analysis(f"<p>{name}</p>"), "complete": True}
+
+        section_stages = tuple((n, fetcher(n), analyze) for n in ("sales", "spend", "inventory"))
+        with TemporaryDirectory() as tmp:
+            with patch.object(checkpoint, "CHECKPOINT_DIR", Path(tmp)), \
+                 patch.object(weekly_report, "SECTION_STAGES", section_stages):
+                checkpoint.save_section(history.get_week_monday(), "spend", self._section("cached"))
+                graph, resumed = weekly_report.build_stage_graph(resume=True)
+                results = weekly_report.run_sections(graph, resumed, parallel=False)
+                # Only the missing sections were built — and are now checkpointed too
+                self.assertEqual(calls, ["sales", "inventory"])
+                self.assertEqual(results["spend"]["html"], "<p>cached</p>")
+                self.assertIsNotNone(checkpoint.load_section(history.get_week_monday(), "sales"))
+
+    def test_degraded_sections_and_dry_runs_are_not_checkpointed(self):
+        def analyze(fetched):
+            # What analyze_* builds from a generate_*_report that returned its error paragraph
+            html = "<p><b>Error generating report:</b> 529</p>" if fetched == "llm down" else f"<p>{fetched}</p>"
+            return {**weekly_report._empty_analysis(html), "complete": not weekly_report._llm_failed(html)}
+
+        section_stages = (("sales", lambda: "empty", lambda _: weekly_report._empty_analysis("<p>No sales data</p>")),
+                          ("spend", lambda: "llm down", analyze),
+                          ("inventory", lambda: "stock", analyze))
+        monday = history.get_week_monday()
+        with TemporaryDirectory() as tmp, patch.object(checkpoint, "CHECKPOINT_DIR", Path(tmp)), \
+                patch.object(weekly_report, "SECTION_STAGES", section_stages), \
+                patch.object(weekly_report, "OUT_DIR", tmp):
+            weekly_report.main(dry_run=True)
+            self.assertEqual([checkpoint.load_section(monday, n) for n in weekly_report.SECTION_NAMES],
+                             [None, None, None])
+
+            graph, resumed = weekly_report.build_stage_graph()
+            weekly_report.run_sections(graph, resumed, parallel=False)
+            self.assertIsNone(checkpoint.load_section(monday, "sales"))
+            self.assertIsNone(checkpoint.load_section(monday, "spend"))
+            self.assertEqual(checkpoint.load_section(monday, "inventory")["html"], "<p>stock</p>")
+
+
+class TestSectionSelection(unittest.TestCase):
+    def test_select_sections(self):
+        self.assertEqual(weekly_report.select_sections(), ("sales", "spend", "inventory"))
+        self.assertEqual(weekly_report.select_sections(only=["inventory"]), ("inventory",))
+        self.assertEqual(weekly_report.select_sections(skip=["sales"]), ("spend", "inventory"))
+        with self.assertRaises(ValueError):
+            weekly_report.select_sections(only=["spend"], skip=["spend"])
+
+    def test_graph_and_email_cover_only_selected_sections(self):
+        graph, resumed = weekly_report.build_stage_graph(sections=("inventory",))
+        self.assertEqual(
+            list(graph._stages),
+            ["inventory.fetch", "inventory.analyze", "inventory.render"],
+        )
+        html, _ = unified_email.compose_weekly_email(
+            week_monday="2026-06-15",
+            sales=None,
+            spend=None,
+            inventory={"html": "<h3>Inv body</h3>", "headline": {"critical_count": 2},
+                       "attachment_names": ["inv.csv"]},
+        )
+        self.assertIn("Inv body", html)
+        self.assertIn("Reorders Due Now", html)
+        self.assertIn("inv.csv", html)
+        self.assertNotIn("Revenue (DC-1)", html)
+        self.assertNotIn("Brex · Mercury · Rippling", html)
+
+
+class TestWeeklyRun(unittest.TestCase):
+    """main() end to end on stand-in sections: the email goes out whatever a section does."""
+
+    def _run_main(self, section_stages, **kwargs):
+        with TemporaryDirectory() as tmp, \
+                patch.object(weekly_report, "SECTION_STAGES", section_stages), \
+                patch.object(weekly_report, "REPORT_RECIPIENT", "team@example.com"), \
+                patch.object(weekly_report, "OUT_DIR", tmp), \
+                patch.object(weekly_report, "save_section"), \
+                patch.object(weekly_report, "send_unified_email", return_value=True) as send:
+            weekly_report.main(**kwargs)
+        send.assert_called_once()
+        return send.call_args.kwargs["html_body"]
+
+    def test_a_failing_section_is_sent_as_its_placeholder(self):
+        def broken_fetch():
+            raise RuntimeError("imap down")
+
+        section_stages = (("sales", lambda: "rows", _iso_analyze),
+                          ("inventory", broken_fetch, _iso_analyze))
+        html = self._run_main(section_stages)
+        self.assertIn("rows from pid", html)
+        self.assertIn("Inventory section failed:</b> imap down", html)
+
+    def test_a_section_over_budget_is_cancelled_and_the_email_still_goes_out(self):
+        import threading
+        release = threading.Event()
+        section_stages = (("sales", lambda: "rows", _iso_analyze),
+                          ("spend", lambda: release.wait(5), _iso_analyze))
+        try:
+            with patch.dict(os.environ, {"SPEND_BUDGET_SECONDS": "0.3"}):
+                html = self._run_main(section_stages)
+        finally:
+            release.set()
+        self.assertIn("rows from pid", html)
+        self.assertIn("Spend section failed:</b> spend exceeded its 0.3s budget", html)
+
+    def test_a_crashed_isolated_worker_is_sent_as_its_placeholder(self):
+        section_stages = (("sales", _iso_fetch, _iso_analyze), ("spend", _iso_crash, _iso_analyze))
+        html = self._run_main(section_stages, isolate=True)
+        self.assertIn("rows from pid", html)
+        self.assertIn("Spend section failed", html)
+        self.assertIn("SIGKILL", html)
+
+
+class TestTrace(unittest.TestCase):
+    def setUp(self):
+        trace.reset()
+
+    @patch("adapters.brex.requests.get")
+    def test_spans_record_sizes_errors_and_write_per_run_file(self, mock_get):
+        page = _http_response({"items": [], "next_cursor": None})
+        page.content = b'{"items": []}'
+        mock_get.return_value = page
+        brex.fetch_brex_transactions("fake-key")
+
+        with trace.span("snowflake.query", "weekly_summary") as sp:
+            sp.update(trace.frame_size(pd.DataFrame({"a": [1, 2, 3]})))
+        with self.assertRaises(RuntimeError):
+            with trace.span("smtp.send", "smtp.example.com"):
+                raise RuntimeError("boom")
+
+        recorded = trace.spans()
+        self.assertEqual([s["kind"] for s in recorded], ["http.brex", "snowflake.query", "smtp.send"])
+        self.assertEqual(recorded[0]["bytes"], len(page.content))
+        self.assertEqual(recorded[1]["rows"], 3)
+        self.assertEqual(recorded[2]["error"], "RuntimeError: boom")
+
+        with TemporaryDirectory() as tmp:
+            path = trace.write_trace(tmp, "2026-06-15", extra={"stages": {}})
+            with open(path) as f:
+                payload = json.load(f)
+        self.assertTrue(os.path.basename(path).startswith("trace_2026-06-15_"))
+        self.assertEqual(payload["totals"]["snowflake.query"], {"count": 1, "seconds": recorded[1]["seconds"],
+                                                                "rows": 3, "bytes": recorded[1]["bytes"]})
+        self.assertEqual(len(payload["spans"]), 3)
+
+    def test_llm_usage_reads_either_sdk_shape(self):
+        anthropic_resp = MagicMock()
+        anthropic_resp.usage.input_tokens, anthropic_resp.usage.output_tokens = 1200, 800
+        openai_resp = MagicMock()
+        openai_resp.usage = MagicMock(spec=["prompt_tokens", "completion_tokens"],
+                                      prompt_tokens=50, completion_tokens=20)
+        self.assertEqual(trace.llm_usage(anthropic_resp), {"input_tokens": 1200, "output_tokens": 800})
+        self.assertEqual(trace.llm_usage(openai_resp), {"input_tokens": 50, "output_tokens": 20})
+
+
+class TestCassette(unittest.TestCase):
+    def tearDown(self):
+        cassette.stop()
+
+    def test_record_then_replay_offline(self):
+        # Real requests.Response objects — that's what gets pickled in production
+        pages = []
+        for payload in (
+            {"items": [{"posted_at_date": "2026-06-01", "description": "AWS",
+                        "amount": {"amount": 12345}}], "next_cursor": "p2"},
+            {"items": [{"posted_at_date": "2026-06-02", "description": "GCP",
+                        "amount": {"amount": 5000}}], "next_cursor": None},
+        ):
+            page = requests.Response()
+            page.status_code, page._content = 200, json.dumps(payload).encode()
+            pages.append(page)
+        with TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "run.pkl")
+            cassette.record(path, week_monday="2026-06-15")
+            with patch("adapters.brex.requests.get", side_effect=pages) as live_get:
+                live = brex.fetch_brex_transactions("fake-key")
+            self.assertEqual(live_get.call_count, 2)
+            cassette.save()
+            cassette.stop()
+
+            self.assertEqual(cassette.replay(path)["week_monday"], "2026-06-15")
+            # No key needed: the recorded pages stand in for the API
+            with patch("adapters.brex.requests.get") as offline_get:
+                replayed = brex.fetch_brex_transactions(None)
+            offline_get.assert_not_called()
+            pd.testing.assert_frame_equal(live, replayed)
+            # A third page was never recorded
+            with self.assertRaises(cassette.CassetteMiss):
+                cassette.call("http.brex", lambda: None)
+
+    def test_recorded_errors_replay_as_errors(self):
+        with TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "run.pkl")
+            cassette.record(path)
+            with self.assertRaises(TimeoutError):
+                cassette.call("imap.inventory", MagicMock(side_effect=TimeoutError("read timed out")))
+            cassette.save()
+            cassette.replay(path)
+            with self.assertRaisesRegex(cassette.ReplayedError, "TimeoutError: read timed out"):
+                cassette.call("imap.inventory", lambda: [])
+
+    def test_interrupted_call_propagates_and_is_not_recorded(self):
+        with TemporaryDirectory() as tmp:
+            cassette.record(os.path.join(tmp, "run.pkl"))
+            with self.assertRaises(KeyboardInterrupt):
+                cassette.call("llm.sales", MagicMock(side_effect=KeyboardInterrupt))
+            self.assertEqual(cassette.tapes(), {})
+
+    def test_inventory_llm_replays_without_an_openai_key(self):
+        with TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "run.pkl")
+            cassette.record(path)
+            cassette.call("llm.inventory", lambda **kwargs: "<h3>ok</h3>", model="gpt-4o")
+            cassette.save()
+            cassette.replay(path)
+            with patch.object(inventory_bot, "OPENAI_API_KEY", None), \
+                    patch("openai.OpenAI", side_effect=AssertionError("client built on replay")):
+                self.assertEqual(cassette.call("llm.inventory", inventory_bot._create_completion, model="gpt-4o"),
+                                 "<h3>ok</h3>")
+
+
+class TestLazyImports(unittest.TestCase):
+    SDKS = ("snowflake.connector", "anthropic", "openai", "imap_tools", "docx", "htmldocx",
+            "cryptography", "duckdb")
+
+    @staticmethod
+    def _loaded_after(imports, modules):
+        """Which of modules a fresh interpreter has loaded after importing imports."""
+        import subprocess
+        probe = f"import sys, {imports}; print(' '.join(m for m in {modules!r} if m in sys.modules))"
+        out = subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True,
+                             cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        if out.returncode != 0:
+            raise AssertionError(out.stderr)
+        return out.stdout.strip()
+
+    def test_entry_points_defer_heavy_sdks(self):
+        """Importing a bot must not load the SDKs its first call needs."""
+        self.assertEqual(self._loaded_after(
+            "weekly_report, sales_bot, spend_bot, inventory_bot, monthly_zeni_report", self.SDKS), "")
+
+    def test_orchestrator_defers_pandas(self):
+        """weekly_report.py imports pandas (and pyarrow with it) only in the stages that need it."""
+        self.assertEqual(self._loaded_after("weekly_report", self.SDKS + ("pandas", "pyarrow")), "")
+
+
+class TestIsolation(unittest.TestCase):
+    def test_worker_results_and_crashes_become_sections_or_placeholders(self):
+        section_stages = (("sales", _iso_fetch, _iso_analyze), ("spend", _iso_crash, _iso_analyze))
+        with patch.object(weekly_report, "SECTION_STAGES", section_stages):
+            graph, resumed = weekly_report.build_stage_graph(checkpoint=False, isolate=True)
+            self.assertEqual(list(graph._stages), ["sales.worker", "spend.worker"])
+            results = weekly_report.run_sections(graph, resumed)
+        self.assertIn("rows from pid", results["sales"]["html"])
+        self.assertNotIn(f"pid {os.getpid()}<", results["sales"]["html"])
+        self.assertIn("Spend section failed", results["spend"]["html"])
+        self.assertIn("SIGKILL", results["spend"]["html"])
+
+    @unittest.skipUnless(os.path.exists("/proc/self/statm"), "RSS watchdog needs /proc")
+    def test_memory_ceiling_kills_the_worker(self):
+        from utils import isolation
+        with self.assertRaisesRegex(isolation.WorkerFailed, "over its 150 MB ceiling"):
+            isolation.run_isolated(_iso_hog, memory_mb=150, label="hog")
+
+
+class TestPreflight(unittest.TestCase):
+    def test_checks_run_concurrently_and_classify(self):
+        import time
+
+        def slow():
+            time.sleep(5)
+
+        def bad_token():
+            raise RuntimeError("HTTP 401")
+
+        def unset():
+            raise preflight.NotConfigured("MERCURY_API_KEY not set")
+
+        started = time.perf_counter()
+        results = preflight.run_checks({"snowflake": lambda: "login ok", "brex": bad_token,
+                                        "mercury": unset, "imap": slow}, timeout=0.5)
+        self.assertLess(time.perf_counter() - started, 2)
+        self.assertEqual({n: r[0] for n, r in results.items()},
+                         {"snowflake": "ok", "brex": "failed", "mercury": "skipped", "imap": "failed"})
+        self.assertIn("no answer within 0.5s", results["imap"][1])
+
+    def test_plan_degrades_or_aborts(self):
+        ok, bad = ("ok", "", 0.1), ("failed", "HTTP 401", 0.1)
+        sections = ("sales", "spend", "inventory")
+        results = {"snowflake": ok, "brex": bad, "mercury": ok, "imap": bad, "smtp": ok, "sheets": bad}
+        runnable, skipped, abort = preflight.plan(results, sections, mode="degrade")
+        self.assertEqual(runnable, ("sales", "spend"))
+        self.assertEqual(list(skipped), ["inventory"])
+        self.assertIn("imap: HTTP 401", skipped["inventory"])
+        self.assertIsNone(abort)
+        # A bad Brex token drops just Brex: spend runs on Mercury / Rippling
+        self.assertEqual(preflight.failed_sources(results), {"brex": "HTTP 401"})
+        # Sheets alone never gates the weekly run
+        self.assertEqual(preflight.plan({"sheets": bad}, sections)[0], sections)
+        self.assertIsNotNone(preflight.plan(results, sections, mode="abort")[2])
+        self.assertIsNotNone(preflight.plan({"smtp": bad}, sections, mode="degrade")[2])
+        self.assertIsNone(preflight.plan({"smtp": bad}, sections, need_delivery=False)[2])
+
+    def test_spend_runs_without_the_sources_that_failed_preflight(self):
+        frame = pd.DataFrame({"Date": ["2026-06-16"], "Description": "Vendor", "Amount": [10.0]})
+        with patch.dict(os.environ, {weekly_report.SKIPPED_SOURCES_ENV: "brex"}), \
+                patch("adapters.brex.fetch_brex_transactions") as brex_fetch, \
+                patch("adapters.mercury.fetch_mercury_transactions", return_value=frame.copy()), \
+                patch("adapters.rippling.fetch_rippling_expenses", return_value=pd.DataFrame()), \
+                patch("builtins.print"):
+            unified = weekly_report.fetch_spend()
+        brex_fetch.assert_not_called()
+        self.assertEqual(unified["Source"].tolist(), ["Mercury"])
+
+    def test_snowflake_check_uses_its_own_short_login(self):
+        ctx = MagicMock()
+        with patch.object(sales_bot, "SNOWFLAKE_USER", "u"), patch.object(sales_bot, "SNOWFLAKE_ACCOUNT", "a"), \
+                patch.object(sales_bot, "connect_snowflake", return_value=ctx) as connect, \
+                patch.object(sales_bot, "snowflake_session") as shared:
+            self.assertEqual(preflight.check_snowflake(), "login ok")
+        self.assertLessEqual(connect.call_args.kwargs["login_timeout"], preflight.PREFLIGHT_TIMEOUT_SECONDS)
+        shared.assert_not_called()
+        ctx.cursor.return_value.__exit__.assert_called_once()
+        ctx.close.assert_called_once()
 
 
 class TestEmailSender(unittest.TestCase):
@@ -0,0 +1,144 @@
+"""
+Record / replay cassettes for every external response in a weekly run.
+
+weekly_report.py --record captures what each external call returned —
+Snowflake result frames, IMAP CSV attachments, Brex/Mercury/Rippling HTTP
+responses, Sheets values, LLM completions — into one pickle. --replay feeds
+those responses back so the whole pipeline (pandas, LLM-report assembly,
+DOCX/CSV rendering, email composition) reruns offline and deterministically:
+a fixed workload for profiling, and a byte-for-byte check when refactoring
+generate_*_report.
+
+Each call site wraps its I/O in call():
+
+    response = cassette.call("http.brex", requests.get, url, params=params)
+
+Responses are keyed by name + occurrence (the 2nd "http.brex" call replays
+the 2nd recorded Brex page). Sections run concurrently, but every key is
+only ever called from one section, so the order per key is stable.
+
+Cassettes are pickles — only replay files you recorded yourself.
+"""
+import os
+import pickle
+import threading
+from datetime import datetime
+
+_lock = threading.Lock()
+_mode = None                  # None | "record" | "replay"
+_path = None
+_tapes: dict[str, list] = {}  # key → [("ok", value) | ("raise", message), ...]
+_cursor: dict[str, int] = {}
+_meta: dict = {}
+
+
+class CassetteMiss(LookupError):
+    """Replay asked for a response the cassette doesn't have."""
+
+
+class ReplayedError(Exception):
+    """An exception the call raised while recording, raised again on replay."""
+
+
+def record(path, **meta) -> None:
+    """Start recording; the cassette is written to path by save()."""
+    global _mode, _path, _meta
+    with _lock:
+        _mode, _path, _meta = "record", path, {"recorded_at": datetime.now().isoformat(timespec="seconds"), **meta}
+        _tapes.clear()
+        _cursor.clear()
+
+
+def replay(path) -> dict:
+    """Load a cassette and serve every call() from it; returns its metadata."""
+    global _mode, _path, _meta
+    with open(path, "rb") as f:
+        payload = pickle.load(f)
+    with _lock:
+        _mode, _path, _meta = "replay", path, payload["meta"]
+        _tapes.clear()
+        _tapes.update(payload["tapes"])
+        _cursor.clear()
+    return dict(_meta)
+
+
+def stop() -> None:
+    global _mode, _path
+    with _lock:
+        _mode, _path = None, None
+        _tapes.clear()
+        _cursor.clear()
+
+
+def mode():
+    return _mode
+
+
+def path():
+    return _path
+
+
+def tapes() -> dict:
+    """Copy of the responses recorded so far (what a worker process hands back)."""
+    with _lock:
+        return {k: list(v) for k, v in _tapes.items()} if _mode == "record" else {}
+
+
+def merge(recorded) -> None:
+    """Fold a worker process's recorded tapes into this process's cassette."""
+    if _mode != "record":
+        return
+    with _lock:
+        for key, tape in recorded.items():
+            _tapes.setdefault(key, []).extend(tape)
+
+
+def call(key, fn, *args, **kwargs):
+    """Run fn(*args, **kwargs) — or, when replaying, return what it returned when recorded."""
+    if _mode is None:
+        return fn(*args, **kwargs)
+
+    if _mode == "replay":
+        with _lock:
+            index = _cursor.get(key, 0)
+            _cursor[key] = index + 1
+            tape = _tapes.get(key, [])
+        if index >= len(tape):
+            raise CassetteMiss(f"cassette has no response #{index + 1} for {key!r}")
+        if tape[index] is None:
+            raise CassetteMiss(f"recording of {key!r} #{index + 1} was interrupted")
+        kind, value = tape[index]
+        if kind == "raise":
+            raise ReplayedError(value)
+        return value
+
+    with _lock:
+        index = _cursor.get(key, 0)
+        _cursor[key] = index + 1
+    entry = None  # stays None if a BaseException (e.g. KeyboardInterrupt) cuts the call short
+    try:
+        value = fn(*args, **kwargs)
+        entry = ("ok", value)
+    except Exception as e:
+        entry = ("raise", f"{type(e).__name__}: {e}")
+        raise
+    finally:
+        if entry is not None:
+            with _lock:
+                tape = _tapes.setdefault(key, [])
+                tape.extend([None] * (index + 1 - len(tape)))
+                tape[index] = entry
+    return value
+
+
+def save():
+    """Write the recorded cassette (no-op unless recording); returns the path."""
+    if _mode != "record":
+        return None
+    payload = {"meta": dict(_meta), "tapes": tapes()}
+    os.makedirs(os.path.dirname(os.path.abspath(_path)), exist_ok=True)
+    tmp = f"{_path}.tmp"
+    with open(tmp, "wb") as f:
+        pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, _path)
+    return _path
@@ -0,0 +1,76 @@
+"""
+Per-week checkpoints of finished report sections.
+
+Each section builder returns a dict (html, headline, attachments, snapshot).
+Saving that dict as soon as the section finishes means a failure later in the
+run — most often the SMTP send — no longer costs a second round of Snowflake /
+Brex / Mercury / IMAP fetches and three more LLM calls: weekly_report.py
+--resume rebuilds the email from these files in seconds.
+
+Layout (one directory per reporting week, one per section):
+
+    data/checkpoints/2026-06-15/sales/section.json
+    data/checkpoints/2026-06-15/sales/attachments/weekly_sales_report_2026-06-15.docx
+
+section.json is written last (atomically), so a half-written checkpoint is
+never picked up by a resume.
+"""
+import json
+import os
+import shutil
+from pathlib import Path
+
+CHECKPOINT_DIR = Path(__file__).parent.parent / "data" / "checkpoints"
+KEEP_WEEKS = 4
+
+
+def _section_dir(week_monday, name):
+    key = week_monday if isinstance(week_monday, str) else week_monday.isoformat()
+    return CHECKPOINT_DIR / key / name
+
+
+def save_section(week_monday, name, section):
+    """Persist one section dict for the given reporting week."""
+    path = _section_dir(week_monday, name)
+    att_dir = path / "attachments"
+    if att_dir.exists():
+        shutil.rmtree(att_dir)
+    att_dir.mkdir(parents=True, exist_ok=True)
+
+    attachment_files = []
+    for filename, data in section.get("attachments", []):
+        (att_dir / filename).write_bytes(data)
+        attachment_files.append(filename)
+
+    payload = {k: v for k, v in section.items() if k != "attachments"}
+    payload["attachment_files"] = attachment_files
+
+    tmp = path / "section.json.tmp"
+    with open(tmp, "w") as f:
+        json.dump(payload, f, indent=2, default=str)
+    os.replace(tmp, path / "section.json")
+    print(f"Saved checkpoint: {path.parent.name}/{name}")
+    _prune()
+
+
+def load_section(week_monday, name):
+    """Return the checkpointed section dict, or None if there isn't a usable one."""
+    path = _section_dir(week_monday, name)
+    try:
+        with open(path / "section.json") as f:
+            payload = json.load(f)
+        attachments = [
+            (filename, (path / "attachments" / filename).read_bytes())
+            for filename in payload.pop("attachment_files", [])
+        ]
+    except (json.JSONDecodeError, IOError):
+        return None
+    payload["attachments"] = attachments
+    return payload
+
+
+def _prune(keep_weeks=KEEP_WEEKS):
+    """Drop checkpoint weeks beyond the most recent keep_weeks."""
+    weeks = sorted(p for p in CHECKPOINT_DIR.iterdir() if p.is_dir())
+    for old in weeks[:-keep_weeks]:
+        shutil.rmtree(old, ignore_errors=True)
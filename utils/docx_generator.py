@@ -2,12 +2,11 @@ import io
 import re
 import unicodedata
 from datetime import datetime
-from docx import Document
-from docx.shared import Inches, Pt, RGBColor
-from docx.enum.text import WD_ALIGN_PARAGRAPH
-from docx.oxml.ns import qn
-from docx.oxml import OxmlElement
-from htmldocx import HtmlToDocx
+
+# python-docx / htmldocx are imported on the first render (see _load_docx):
+# they add ~150 ms to every import of this module, including runs that never
+# build a DOCX (--resume, empty sections, the monthly no-op checks).
+Document = Inches = Pt = RGBColor = WD_ALIGN_PARAGRAPH = qn = OxmlElement = HtmlToDocx = None
 
 
 # ── Colour palette ─────────────────────────────────────────────
@@ -23,9 +22,24 @@ RED_TEXT    = (0xA9, 0x33, 0x26)
 ORANGE_TEXT = (0xB7, 0x60, 0x0E)
 GREEN_TEXT  = (0x1A, 0x7A, 0x42)
 
-NAVY_RGB  = RGBColor(*NAVY)
-WHITE_RGB = RGBColor(*WHITE)
-GRAY_RGB  = RGBColor(*MID_GRAY)
+NAVY_RGB = WHITE_RGB = GRAY_RGB = None     # RGBColor versions, set by _load_docx()
+
+
+def _load_docx():
+    """Bind the python-docx names used below; a no-op after the first call."""
+    global Document, Inches, Pt, RGBColor, WD_ALIGN_PARAGRAPH, qn, OxmlElement, HtmlToDocx
+    global NAVY_RGB, WHITE_RGB, GRAY_RGB
+    if HtmlToDocx is not None:
+        return
+    from docx import Document
+    from docx.shared import Inches, Pt, RGBColor
+    from docx.enum.text import WD_ALIGN_PARAGRAPH
+    from docx.oxml.ns import qn
+    from docx.oxml import OxmlElement
+    NAVY_RGB  = RGBColor(*NAVY)
+    WHITE_RGB = RGBColor(*WHITE)
+    GRAY_RGB  = RGBColor(*MID_GRAY)
+    from htmldocx import HtmlToDocx        # last: its binding marks the load complete
 
 
 # ── Emoji / artefact cleaning ──────────────────────────────────
@@ -212,6 +226,7 @@ def html_to_docx(html_content: str, title: str,
     bytes
         DOCX file ready for email attachment.
     """
+    _load_docx()
     if not date_str:
         date_str = datetime.now().strftime('%Y-%m-%d')
 
@@ -6,6 +6,8 @@ from email.mime.application import MIMEApplication
 from pathlib import Path
 from dotenv import load_dotenv
 
+from utils import trace
+
 load_dotenv(Path(__file__).resolve().parent.parent / '.env')
 
 SMTP_SERVER = os.getenv("SMTP_SERVER", "smtp.gmail.com")
@@ -45,16 +47,18 @@ def send_report_email(subject, body_text, recipient, attachments=None):
             part['Content-Disposition'] = f'attachment; filename="{filename}"'
             msg.attach(part)
 
+    payload_bytes = len(body_text) + sum(len(d) for _, d in attachments or [])
     try:
-        if SMTP_PORT == 465:
-            with smtplib.SMTP_SSL(SMTP_SERVER, SMTP_PORT, timeout=SMTP_TIMEOUT) as server:
-                server.login(SMTP_USERNAME, SMTP_PASSWORD)
-                server.send_message(msg)
-        else:
-            with smtplib.SMTP(SMTP_SERVER, SMTP_PORT, timeout=SMTP_TIMEOUT) as server:
-                server.starttls()
-                server.login(SMTP_USERNAME, SMTP_PASSWORD)
-                server.send_message(msg)
+        with trace.span("smtp.send", SMTP_SERVER, bytes=payload_bytes):
+            if SMTP_PORT == 465:
+                with smtplib.SMTP_SSL(SMTP_SERVER, SMTP_PORT, timeout=SMTP_TIMEOUT) as server:
+                    server.login(SMTP_USERNAME, SMTP_PASSWORD)
+                    server.send_message(msg)
+            else:
+                with smtplib.SMTP(SMTP_SERVER, SMTP_PORT, timeout=SMTP_TIMEOUT) as server:
+                    server.starttls()
+                    server.login(SMTP_USERNAME, SMTP_PASSWORD)
+                    server.send_message(msg)
         print(f"Email sent to {recipient}!")
         return True
     except Exception as e:
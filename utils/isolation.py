@@ -0,0 +1,142 @@
+"""
+Run a report section in its own worker process under a memory ceiling.
+
+The droplet has 1 GB. pandas + the Snowflake connector (pyarrow) +
+python-docx + three SDK clients in one process gets close to that, and when
+the kernel OOM killer steps in it takes the whole run — and the email — with
+it. weekly_report.py --isolate runs each section in a child process instead:
+
+  * the parent polls the child's RSS and kills it past the ceiling
+    (WORKER_MEMORY_MB); a kernel OOM kill is reported the same way
+  * the child sends back its result (a section dict: html, headline,
+    attachment bytes …) plus its trace spans and recorded cassette tapes
+  * a crash, kill or exception surfaces as an ordinary exception in the
+    calling stage, so the section degrades to the failure placeholder
+  * the child's log is captured to a file and replayed through the parent's
+    stdout, so OrderedOutput still keeps sections in order
+
+Workers are spawned (not forked): the parent is multi-threaded, and thanks to
+the lazy imports a fresh interpreter costs well under a second.
+"""
+import multiprocessing
+import os
+import signal
+import sys
+import tempfile
+import threading
+
+from utils import cassette, trace
+
+POLL_SECONDS = 0.25
+
+_live_lock = threading.Lock()
+_live: set = set()   # worker processes still running
+
+
+class WorkerFailed(RuntimeError):
+    """The worker process raised, crashed, or was killed for exceeding its memory ceiling."""
+
+
+def _rss_mb(pid):
+    """Resident set size of pid in MB, or None where /proc isn't available."""
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+def _peak_rss_mb():
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 1024   # bytes on macOS, KB on Linux
+
+
+def _child(conn, log_path, fn, args, trace_origin, tape_mode, tape_path):
+    """Worker-process body: run fn(*args) and send (status, payload, spans, tapes, peak MB) back."""
+    sys.stdout = sys.stderr = open(log_path, "w", buffering=1)
+    trace.reset(origin=trace_origin)
+    if tape_mode == "replay":
+        cassette.replay(tape_path)
+    elif tape_mode == "record":
+        cassette.record(tape_path)
+    try:
+        status, payload = "ok", fn(*args)
+    except BaseException as e:
+        import traceback; traceback.print_exc()
+        status, payload = "error", f"{type(e).__name__}: {e}"
+    conn.send((status, payload, trace.spans(), cassette.tapes(), round(_peak_rss_mb())))
+    conn.close()
+
+
+def run_isolated(fn, args=(), memory_mb=None, label="worker"):
+    """
+    Call fn(*args) in a spawned child process and return its result.
+    fn and args must be picklable (module-level functions, plain data).
+    Raises WorkerFailed if the child raises, dies, or goes over memory_mb.
+    """
+    ctx = multiprocessing.get_context("spawn")
+    parent_conn, child_conn = ctx.Pipe(duplex=False)
+    fd, log_path = tempfile.mkstemp(prefix=f"{label}-", suffix=".log")
+    os.close(fd)
+    proc = ctx.Process(
+        target=_child, name=label, daemon=True,
+        args=(child_conn, log_path, fn, args, trace.origin(), cassette.mode(), cassette.path()),
+    )
+    proc.start()
+    child_conn.close()
+    with _live_lock:
+        _live.add(proc)
+
+    message, killed_for = None, None
+    try:
+        while True:
+            if parent_conn.poll(POLL_SECONDS):
+                try:
+                    message = parent_conn.recv()
+                except EOFError:
+                    pass                     # died before sending anything
+                break
+            if not proc.is_alive():
+                break
+            rss = _rss_mb(proc.pid)
+            if memory_mb and rss is not None and rss > memory_mb:
+                killed_for = rss
+                proc.kill()
+                break
+        proc.join()
+    finally:
+        with _live_lock:
+            _live.discard(proc)
+        parent_conn.close()
+        with open(log_path) as f:
+            sys.stdout.write(f.read())
+        os.remove(log_path)
+
+    if killed_for is not None:
+        raise WorkerFailed(f"{label} used {killed_for:.0f} MB, over its {memory_mb:g} MB ceiling — killed")
+    if message is None:
+        code = proc.exitcode
+        if code is not None and code < 0:
+            name = signal.Signals(-code).name
+            hint = " — likely out of memory" if -code == signal.SIGKILL else ""
+            raise WorkerFailed(f"{label} died ({name}{hint})")
+        raise WorkerFailed(f"{label} exited with code {code} without a result")
+
+    status, payload, spans, tapes, peak_mb = message
+    trace.extend(spans)
+    cassette.merge(tapes)
+    print(f"[{label}] worker peak RSS {peak_mb} MB")
+    if status == "error":
+        raise WorkerFailed(payload)
+    return payload
+
+
+def reap() -> None:
+    """Kill workers still running (e.g. abandoned after a budget timeout)."""
+    with _live_lock:
+        procs = list(_live)
+    for proc in procs:
+        if proc.is_alive():
+            proc.kill()
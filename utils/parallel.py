@@ -0,0 +1,145 @@
+"""
+Run report work on threads without scrambling the log.
+
+Every section spends nearly all of its time waiting on I/O (Snowflake, HTTP,
+IMAP, LLM), so threads are enough to overlap them. The catch is the log: the
+bots print progress as they go, and three threads printing at once produce an
+unreadable cron log that differs run to run.
+
+OrderedOutput fixes that by routing each worker thread's stdout/stderr into a
+per-group buffer (one group per report section). Output of the first
+unfinished group streams live; later groups buffer until every group before
+them has finished, so the final log is byte-for-byte what a sequential run
+would have printed.
+
+A group given up on (cancelled on a budget timeout) is abandon()ed: its
+threads may still be running, but from then on their output is dropped —
+also after the context exits, when a thin proxy stays on sys.stdout/stderr
+until the last abandoned thread unbinds.
+"""
+from __future__ import annotations
+
+import sys
+import threading
+
+
+class _OrderedStream:
+    """File-like proxy that sends each bound thread's writes to its group slot."""
+
+    def __init__(self, real, output: "OrderedOutput"):
+        self._real = real
+        self._output = output
+
+    def write(self, text):
+        return self._output._write(self._real, text)
+
+    def flush(self):
+        self._real.flush()
+
+    def __getattr__(self, name):
+        return getattr(self._real, name)
+
+
+class OrderedOutput:
+    """
+    Context manager that keeps threaded log output in group order.
+
+        with OrderedOutput(["sales", "spend", "inventory"]) as out:
+            # in each worker thread:
+            out.bind("spend")
+            ...
+            out.unbind()
+            out.finish("spend")     # once the group has no more work
+
+    Threads that never call bind() (the main thread, library pools) write
+    straight through. out.abandon("spend") drops the group's output from then
+    on, for threads left running past the context too.
+    """
+
+    def __init__(self, groups):
+        self._index = {g: i for i, g in enumerate(groups)}
+        self._lock = threading.Lock()
+        self._owner: dict[int, int] = {}              # thread ident → group index
+        self._buffers: list[list] = [[] for _ in groups]
+        self._done = [False] * len(self._index)
+        self._head = 0                                 # group currently allowed to stream
+        self._abandoned: set[int] = set()              # group indexes whose output is dropped
+        self._closed = False
+
+    def _restore(self) -> None:
+        if isinstance(sys.stdout, _OrderedStream) and sys.stdout._output is self:
+            sys.stdout = self._real_out
+        if isinstance(sys.stderr, _OrderedStream) and sys.stderr._output is self:
+            sys.stderr = self._real_err
+
+    def __enter__(self):
+        self._real_out, self._real_err = sys.stdout, sys.stderr
+        sys.stdout = _OrderedStream(self._real_out, self)
+        sys.stderr = _OrderedStream(self._real_err, self)
+        return self
+
+    def __exit__(self, *exc):
+        with self._lock:
+            # Anything still buffered (a group that never finished) goes out in order
+            for i in range(self._head, len(self._buffers)):
+                self._flush(i)
+            self._closed = True
+            # Threads still bound were abandoned: keep the proxies until they
+            # unbind so their late output is dropped, not written unordered
+            self._abandoned.update(self._owner.values())
+            if not self._owner:
+                self._restore()
+        return False
+
+    def __contains__(self, group) -> bool:
+        return group in self._index
+
+    def emit(self, group, text) -> None:
+        """Write text as if it came from group (used for messages about a group)."""
+        with self._lock:
+            index = self._index[group]
+            if index == self._head:
+                self._real_out.write(text)
+            elif index > self._head:
+                self._buffers[index].append((self._real_out, text))
+
+    def abandon(self, group) -> None:
+        """Drop group's output from now on — its threads are no longer waited for."""
+        with self._lock:
+            self._abandoned.add(self._index[group])
+
+    def bind(self, group) -> None:
+        with self._lock:
+            self._owner[threading.get_ident()] = self._index[group]
+
+    def unbind(self) -> None:
+        with self._lock:
+            self._owner.pop(threading.get_ident(), None)
+            if self._closed and not self._owner:
+                self._restore()
+
+    def finish(self, group) -> None:
+        with self._lock:
+            self._done[self._index[group]] = True
+            # Advance past every finished group, releasing buffered output in order
+            while self._head < len(self._done) and self._done[self._head]:
+                self._head += 1
+                if self._head < len(self._done):
+                    self._flush(self._head)
+
+    def _write(self, real, text):
+        with self._lock:
+            index = self._owner.get(threading.get_ident())
+            if index in self._abandoned:
+                return len(text)
+            if index is None or index == self._head:
+                return real.write(text)
+            if index > self._head:
+                self._buffers[index].append((real, text))
+            # else: a group already finished (e.g. cancelled) — its late output is dropped
+            return len(text)
+
+    def _flush(self, index: int) -> None:
+        for real, text in self._buffers[index]:
+            real.write(text)
+        self._buffers[index].clear()
@@ -0,0 +1,89 @@
+"""
+On-disk cache of query results, keyed by SQL text + reporting week.
+
+A completed week's sales don't change, but every --dry-run or sales_bot.py
+rerun used to resume the warehouse and run the same SQL again. Results are
+kept here as one Parquet file per query:
+
+    data/query_cache/<sha256 of target_monday + SQL>.parquet
+
+A file older than QUERY_CACHE_TTL_HOURS is a miss (late cancellations and
+connector backfills still land eventually). When the directory grows past
+QUERY_CACHE_MAX_MB the oldest files are evicted first. --refresh (on
+weekly_report.py and sales_bot.py) skips lookups for the run but still
+stores the fresh results; it is passed to --isolate workers through the
+environment. pandas is imported on first lookup, so weekly_report.py can
+import this module without loading it (a --resume run never does).
+"""
+import hashlib
+import os
+import time
+from pathlib import Path
+
+CACHE_DIR = Path(__file__).parent.parent / "data" / "query_cache"
+REFRESH_ENV = "QUERY_CACHE_REFRESH"
+
+
+def _env_number(name, default):
+    try:
+        return float(os.getenv(name) or default)
+    except ValueError:
+        return default
+
+
+# 0 disables the cache (TTL) or the size bound (MAX_MB)
+TTL_HOURS = _env_number("QUERY_CACHE_TTL_HOURS", 168)
+MAX_MB = _env_number("QUERY_CACHE_MAX_MB", 64)
+
+
+def set_refresh(on=True) -> None:
+    """Bypass lookups for this process and the workers it spawns."""
+    if on:
+        os.environ[REFRESH_ENV] = "1"
+    else:
+        os.environ.pop(REFRESH_ENV, None)
+
+
+def _path(sql, target_monday) -> Path:
+    digest = hashlib.sha256(f"{target_monday}\n{sql}".encode()).hexdigest()
+    return CACHE_DIR / f"{digest}.parquet"
+
+
+def get(sql, target_monday):
+    """The cached result frame, or None on a miss, an expired entry, or --refresh."""
+    if not TTL_HOURS or os.getenv(REFRESH_ENV) == "1":
+        return None
+    import pandas as pd
+
+    path = _path(sql, target_monday)
+    try:
+        if time.time() - path.stat().st_mtime > TTL_HOURS * 3600:
+            return None
+        return pd.read_parquet(path)
+    except (OSError, ValueError):
+        return None
+
+
+def put(sql, target_monday, df) -> None:
+    """Store a result frame, then evict the oldest entries past MAX_MB."""
+    if not TTL_HOURS:
+        return
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    path = _path(sql, target_monday)
+    tmp = path.with_suffix(".tmp")
+    df.to_parquet(tmp, index=False)
+    os.replace(tmp, path)
+    _evict()
+
+
+def _evict(max_mb=None) -> None:
+    limit = (MAX_MB if max_mb is None else max_mb) * 2**20
+    if not limit:
+        return
+    files = sorted(CACHE_DIR.glob("*.parquet"), key=lambda p: p.stat().st_mtime)
+    total = sum(p.stat().st_size for p in files)
+    for old in files:
+        if total <= limit:
+            break
+        total -= old.stat().st_size
+        old.unlink(missing_ok=True)
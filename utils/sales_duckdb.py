@@ -0,0 +1,178 @@
+"""
+Offline stand-in for Snowflake on the sales path: the SHOPIFY line items in a
+local DuckDB database, behind the slice of the connector API sales_bot uses.
+
+With SALES_BACKEND=duckdb, sales_bot.snowflake_session() returns a Session
+from here instead of a Snowflake connection, so fetch_sales_data, the rollup
+sync, the mirror delta and --backfill run their unchanged SQL locally:
+
+    DAYLIGHT_SALES.CONNECTORS.SHOPIFY   loaded from SALES_DUCKDB_SOURCE (a
+                                        Parquet file or directory of line items
+                                        with the connector's columns) or, if
+                                        unset, synthetic_line_items()
+
+The SQL is shared with Snowflake; the one dialect gap it hits, DATEADD, is
+bridged with a DuckDB macro. Query ids are None, so Snowflake query telemetry
+is skipped. bench/sales_duckdb.py times the sales fetch at 10x / 100x volume.
+
+duckdb is imported on first use (pip install duckdb); nothing here is needed
+for a Snowflake run.
+"""
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+import skus
+
+SHOPIFY_TABLE = "DAYLIGHT_SALES.CONNECTORS.SHOPIFY"
+
+SHOPIFY_DDL = f"""
+CREATE TABLE {SHOPIFY_TABLE} (
+    NAME VARCHAR, LINEITEM_SKU VARCHAR, LINEITEM_PRICE DOUBLE, LINEITEM_QUANTITY DOUBLE,
+    DISCOUNT_AMOUNT DOUBLE, TAXES DOUBLE, SHIPPING DOUBLE,
+    CREATED_AT TIMESTAMP, CANCELLED_AT TIMESTAMP
+)
+"""
+
+# Snowflake functions the sales SQL uses that DuckDB spells differently
+MACROS = [
+    """CREATE MACRO dateadd(part, n, d) AS
+       CASE WHEN lower(part) = 'day' THEN CAST(d AS TIMESTAMP) + to_days(CAST(n AS INTEGER))
+            ELSE error('dateadd: only day parts are supported offline') END""",
+]
+
+# Synthetic catalogue: list price and pick weight per SKU family
+FAMILY_PRICE = {"device": 729.0, "bundle": 899.0, "accessory": 59.0, "openbox": 499.0,
+                "merch": 35.0, "deposit": 100.0, "gift": 0.0, "test": 0.0}
+FAMILY_WEIGHT = {"device": 40, "bundle": 15, "accessory": 30, "openbox": 5,
+                 "merch": 3, "deposit": 2, "gift": 4, "test": 1}
+
+
+def synthetic_line_items(end, weeks=4, orders_per_day=40, seed=0) -> pd.DataFrame:
+    """
+    Shopify-shaped line items for the `weeks` weeks before end (a date).
+
+    Orders have 1-3 lines of registry SKUs. Taxes and shipping repeat on
+    every line of an order, as in the connector. About 5% of orders are
+    cancelled two days after they were placed. The same seed always gives
+    the same rows.
+    """
+    rng = np.random.default_rng(seed)
+    days = pd.date_range(pd.Timestamp(end) - timedelta(weeks=weeks), pd.Timestamp(end),
+                         freq="D", inclusive="left")
+    n_orders = orders_per_day * len(days)
+    created = (np.repeat(days.values, orders_per_day)
+               + pd.to_timedelta(rng.integers(0, 86400, n_orders), unit="s").values)
+    cancelled = np.where(rng.random(n_orders) < 0.05, created + np.timedelta64(2, "D"), np.datetime64("NaT"))
+    taxes = rng.uniform(0, 80, n_orders).round(2)
+    shipping = rng.choice([0.0, 15.0], n_orders, p=[0.6, 0.4])
+
+    order = np.repeat(np.arange(n_orders), rng.choice([1, 2, 3], n_orders, p=[0.7, 0.2, 0.1]))
+    sku_ids = list(skus.REGISTRY)
+    families = [skus.REGISTRY[s][1] for s in sku_ids]
+    weights = np.array([FAMILY_WEIGHT[f] for f in families], dtype=float)
+    picks = rng.choice(len(sku_ids), len(order), p=weights / weights.sum())
+    price = np.array([FAMILY_PRICE[f] for f in families])[picks]
+    qty = rng.choice([1.0, 2.0], len(order), p=[0.9, 0.1])
+    return pd.DataFrame({
+        "NAME": pd.Series(order).map("#{:07d}".format).values,
+        "LINEITEM_SKU": np.array(sku_ids, dtype=object)[picks],
+        "LINEITEM_PRICE": price,
+        "LINEITEM_QUANTITY": qty,
+        "DISCOUNT_AMOUNT": np.where(rng.random(len(order)) < 0.2, (price * qty * 0.1).round(2), 0.0),
+        "TAXES": taxes[order],
+        "SHIPPING": shipping[order],
+        "CREATED_AT": created[order],
+        "CANCELLED_AT": cancelled[order],
+    })
+
+
+class Cursor:
+    """One DuckDB cursor answering the Snowflake cursor calls sales_bot makes."""
+
+    sfqid = None
+
+    def __init__(self, con):
+        self._con = con
+        self.description = None
+
+    def execute(self, sql):
+        self._con.execute(sql)
+        self.description = self._con.description
+        return self
+
+    def execute_async(self, sql):
+        # Runs to completion here; the session then reports it finished
+        return self.execute(sql)
+
+    def get_results_from_sfqid(self, qid):
+        pass
+
+    def fetch_arrow_batches(self):
+        reader = self._con.fetch_record_batch()
+        for batch in reader:
+            yield batch
+
+    def fetchone(self):
+        return self._con.fetchone()
+
+    def fetchall(self):
+        return self._con.fetchall()
+
+    def close(self):
+        self._con.close()
+
+
+class Session:
+    """A DuckDB database holding the SHOPIFY table, shaped like a Snowflake connection."""
+
+    def __init__(self, con):
+        self._con = con
+        self._closed = False
+
+    def cursor(self):
+        return Cursor(self._con.cursor())
+
+    def get_query_status_throw_if_error(self, qid):
+        return None
+
+    def is_still_running(self, status):
+        return False
+
+    def is_closed(self):
+        return self._closed
+
+    def close(self):
+        self._closed = True
+        self._con.close()
+
+
+def connect(items=None, source=None) -> Session:
+    """
+    A Session whose SHOPIFY table holds items (a DataFrame), the Parquet at
+    source, or — with neither — synthetic_line_items() for the last 4 weeks.
+    """
+    try:
+        import duckdb
+    except ImportError as e:
+        raise ImportError("SALES_BACKEND=duckdb needs the duckdb package (pip install duckdb)") from e
+
+    con = duckdb.connect()
+    con.execute("ATTACH ':memory:' AS DAYLIGHT_SALES")
+    con.execute("CREATE SCHEMA DAYLIGHT_SALES.CONNECTORS")
+    con.execute(SHOPIFY_DDL)
+    for macro in MACROS:
+        con.execute(macro)
+    if items is None and not source:
+        items = synthetic_line_items(pd.Timestamp.today().normalize())
+    if items is not None:
+        import pyarrow as pa
+        # Via Arrow: DuckDB doesn't read pandas' string dtype directly
+        con.register("line_items", pa.Table.from_pandas(items, preserve_index=False))
+        con.execute(f"INSERT INTO {SHOPIFY_TABLE} BY NAME SELECT * FROM line_items")
+        con.unregister("line_items")
+    else:
+        path = f"{source}/*.parquet" if not str(source).endswith(".parquet") else source
+        con.execute(f"INSERT INTO {SHOPIFY_TABLE} BY NAME SELECT * FROM read_parquet('{path}')")
+    return Session(con)
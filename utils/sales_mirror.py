@@ -0,0 +1,164 @@
+"""
+Local day-partitioned Parquet mirror of the Shopify line items.
+
+The sales queries only ever read nine columns of DAYLIGHT_SALES.CONNECTORS.SHOPIFY,
+and a finished day rarely changes. sales_bot keeps those columns here and asks
+Snowflake only for the days that changed since the last sync (see
+sales_bot.sync_sales_mirror); the weekly and daily metrics are then computed
+locally in pandas.
+
+Layout (one file per order day, replaced whole when that day is resynced):
+
+    data/sales_mirror/day=2026-06-15.parquet
+    data/sales_mirror/_state.json      {"watermark": ..., "start": ..., "synced_at": ...}
+
+The watermark is the latest created_at / cancelled_at seen, so a late
+cancellation of an old order marks that order's day as changed. Partitions
+are written before the state file (both atomically), so an interrupted sync
+just refetches the same delta next time.
+"""
+import json
+import os
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import pandas as pd
+
+MIRROR_DIR = Path(__file__).parent.parent / "data" / "sales_mirror"
+
+# Mirrored columns, named as in the connector table (lower-cased)
+COLUMNS = [
+    "name", "lineitem_sku", "lineitem_price", "lineitem_quantity", "discount_amount",
+    "taxes", "shipping", "created_at", "cancelled_at",
+]
+
+
+def _partition(day) -> Path:
+    return MIRROR_DIR / f"day={day.isoformat()}.parquet"
+
+
+def load_state() -> dict:
+    """The sync state, or {} before the first sync."""
+    try:
+        with open(MIRROR_DIR / "_state.json") as f:
+            return json.load(f)
+    except (json.JSONDecodeError, IOError):
+        return {}
+
+
+def _save_state(state) -> None:
+    MIRROR_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = MIRROR_DIR / "_state.json.tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f, indent=2, default=str)
+    os.replace(tmp, MIRROR_DIR / "_state.json")
+
+
+def normalize(df) -> pd.DataFrame:
+    """Delta frame from Snowflake → the mirror's column set and dtypes."""
+    df = df.rename(columns=str.lower)[COLUMNS].copy()
+    for col in ("name", "lineitem_sku"):
+        df[col] = df[col].astype("string")
+    for col in ("lineitem_price", "lineitem_quantity", "discount_amount", "taxes", "shipping"):
+        df[col] = pd.to_numeric(df[col]).astype("float64")
+    for col in ("created_at", "cancelled_at"):
+        ts = pd.to_datetime(df[col])
+        # Keep wall-clock time: the report queries compare created_at to
+        # plain dates, so the mirror stores naive timestamps too
+        df[col] = ts.dt.tz_localize(None) if ts.dt.tz is not None else ts
+    return df
+
+
+def _schema():
+    import pyarrow as pa
+
+    return pa.schema([
+        ("name", pa.string()), ("lineitem_sku", pa.string()),
+        ("lineitem_price", pa.float64()), ("lineitem_quantity", pa.float64()),
+        ("discount_amount", pa.float64()), ("taxes", pa.float64()), ("shipping", pa.float64()),
+        ("created_at", pa.timestamp("ns")), ("cancelled_at", pa.timestamp("ns")),
+    ])
+
+
+def apply_delta(delta, since, start=None) -> int:
+    """
+    Replace every day present in delta with delta's rows; returns days written.
+
+    delta is a DataFrame or an iterable of DataFrame batches (e.g. streamed
+    from fetch_arrow_batches) ordered by created_at. Batches are appended to a
+    Parquet writer per day, and a day's writer is closed once the stream moves
+    past it, so memory holds a batch and the writers of the days it spans.
+    Days are swapped in when the stream ends; a day that shows up again after
+    a later one raises ValueError.
+
+    since is the watermark the delta was fetched from; the new watermark is the
+    latest created_at / cancelled_at in the delta (or since, if none). start
+    records the earliest day the mirror covers (kept from the old state unless
+    given).
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    state = load_state()
+    batches = [delta] if isinstance(delta, pd.DataFrame) else delta
+    schema = _schema()
+    MIRROR_DIR.mkdir(parents=True, exist_ok=True)
+    writers = {}     # day → open writer, only for days the stream hasn't moved past
+    written = set()
+    watermark = pd.Timestamp(since)
+    try:
+        for batch in batches:
+            batch = normalize(batch)
+            for day, rows in batch.groupby(batch["created_at"].dt.date):
+                if day not in writers:
+                    if day in written:
+                        raise ValueError(f"delta is not ordered by created_at: {day} came back after a later day")
+                    for done in [d for d in writers if d < day]:
+                        writers.pop(done).close()
+                    writers[day] = pq.ParquetWriter(_partition(day).with_suffix(".tmp"), schema)
+                    written.add(day)
+                writers[day].write_table(pa.Table.from_pandas(rows, schema=schema, preserve_index=False))
+            seen = pd.concat([batch["created_at"], batch["cancelled_at"]]).max()
+            if pd.notna(seen):
+                watermark = max(watermark, seen)
+    except BaseException:
+        for writer in writers.values():
+            writer.close()
+        for day in written:
+            _partition(day).with_suffix(".tmp").unlink(missing_ok=True)
+        raise
+
+    for writer in writers.values():
+        writer.close()
+    for day in written:
+        os.replace(_partition(day).with_suffix(".tmp"), _partition(day))
+    _save_state({
+        "watermark": watermark.isoformat(),
+        "start": (start or state.get("start")),
+        "synced_at": datetime.now().isoformat(),
+    })
+    return len(written)
+
+
+def iter_days(start, end):
+    """Mirrored line items with start <= created_at < end (dates), one DataFrame per day."""
+    day = start
+    while day < end:
+        path = _partition(day)
+        if path.exists():
+            yield pd.read_parquet(path)
+        day += timedelta(days=1)
+
+
+def read(start, end) -> pd.DataFrame:
+    """Mirrored line items with start <= created_at < end (dates), as one frame."""
+    frames = list(iter_days(start, end))
+    if not frames:
+        return _schema().empty_table().to_pandas()
+    return pd.concat(frames, ignore_index=True)
+
+
+def covers(start) -> bool:
+    """Whether the mirror has been synced back to at least start (a date)."""
+    first = load_state().get("start")
+    return first is not None and date.fromisoformat(first) <= start
@@ -0,0 +1,220 @@
+"""
+A tiny dependency-graph scheduler for the weekly run.
+
+The weekly report is a handful of stages per section — fetch → analyze (LLM)
+→ render (DOCX + CSV) — feeding one deliver step. Modelling them as a graph
+instead of three opaque build_*_section() calls lets independent stages
+overlap (the sales DOCX renders while the spend fetch is still waiting on
+Brex), keeps failure isolation per section (a failed stage skips only its own
+downstream stages), and gives every run a measured critical path: the chain
+of stages that actually determined how long the Monday job took.
+
+    graph = StageGraph()
+    graph.add("sales.fetch", fetch_sales, group="sales")
+    graph.add("sales.analyze", analyze_sales, deps=["sales.fetch"], group="sales")
+    outcomes = graph.run()            # {name: (result, error)}
+    graph.run_inline("deliver", send, deps=["sales.analyze"], wait_only=True)
+    graph.critical_path()             # [(name, seconds), ...]
+
+A stage function receives its dependencies' results as positional arguments,
+in the order the deps were declared (None for a failed one, with wait_only).
+"""
+from __future__ import annotations
+
+import queue
+import threading
+import time
+
+from utils.parallel import OrderedOutput
+
+
+class StageTimeout(Exception):
+    """A stage was cancelled because its section (or the whole run) ran out of time."""
+
+
+class StageGraph:
+    def __init__(self):
+        self._stages: dict[str, tuple] = {}       # name → (fn, deps, group)
+        self.outcomes: dict[str, tuple] = {}      # name → (result, error)
+        self.timings: dict[str, tuple] = {}       # name → (start, end) perf_counter
+        self._degraded: set[str] = set()          # skipped, or run past a failed dependency
+        self._t0 = time.perf_counter()
+
+    def add(self, name, fn, deps=(), group=None):
+        for dep in deps:
+            if dep not in self._stages:
+                raise ValueError(f"stage {name!r} depends on unknown stage {dep!r}")
+        self._stages[name] = (fn, tuple(deps), group)
+
+    # ── execution ──────────────────────────────────────────────────────────
+    def _execute(self, name, isolate=True, wait_only=False):
+        fn, deps, _ = self._stages[name]
+        failed = next((self.outcomes[d][1] for d in deps if self.outcomes[d][1] is not None), None)
+        start = time.perf_counter()
+        if failed is not None:
+            self._degraded.add(name)
+        if failed is not None and not wait_only:
+            # Upstream failed: skip, and carry the original error downstream
+            outcome = (None, failed)
+        else:
+            try:
+                outcome = (fn(*(self.outcomes[d][0] for d in deps)), None)
+            except Exception as e:
+                if isolate:
+                    import traceback; traceback.print_exc()
+                outcome = (None, e)
+        # setdefault: a stage cancelled on timeout already has its timing recorded
+        self.timings.setdefault(name, (start, time.perf_counter()))
+        return outcome
+
+    def run(self, parallel: bool = True, budgets=None, run_budget=None) -> dict:
+        """
+        Run every stage not yet run. With parallel=True each stage starts on
+        its own thread as soon as its dependencies finish; with parallel=False
+        they run one at a time in the order they were added. Log output stays
+        in group (section) order either way. Returns {name: (result, error)}.
+
+        budgets maps group → wall-clock seconds, counted from when the group's
+        first stage starts; run_budget caps the whole call. A group that runs
+        out of time is cancelled: its unfinished stages get a StageTimeout
+        error, stages not yet started never start, and a stage already running
+        is abandoned on its daemon thread (Python can't kill a thread stuck in
+        a socket read) — its eventual result is discarded.
+        """
+        budgets = {g: b for g, b in (budgets or {}).items() if b}
+        pending = [n for n in self._stages if n not in self.outcomes]
+        max_running = None if parallel else 1
+        run_deadline = time.perf_counter() + run_budget if run_budget else None
+
+        def key(name):
+            return self._stages[name][2] or name
+
+        groups = list(dict.fromkeys(g for _, _, g in self._stages.values() if g))
+        remaining = {}
+        for name in pending:
+            remaining[key(name)] = remaining.get(key(name), 0) + 1
+
+        done_q: queue.Queue = queue.Queue()
+        with OrderedOutput(groups) as out:
+            def worker(name):
+                group = self._stages[name][2]
+                if group:
+                    out.bind(group)
+                try:
+                    outcome = self._execute(name)
+                finally:
+                    out.unbind()
+                done_q.put((name, outcome))
+
+            def settle(name):
+                k = key(name)
+                remaining[k] -= 1
+                if remaining[k] == 0 and k in out:
+                    out.finish(k)
+
+            for group in groups:
+                if not remaining.get(group):
+                    out.finish(group)
+
+            waiting = list(pending)
+            running: dict[str, float] = {}        # name → start time
+            started_at: dict[str, float] = {}     # budget key → first stage start
+            while waiting or running:
+                for name in [n for n in waiting if all(d in self.outcomes for d in self._stages[n][1])]:
+                    if max_running is not None and len(running) >= max_running:
+                        break
+                    waiting.remove(name)
+                    running[name] = time.perf_counter()
+                    started_at.setdefault(key(name), running[name])
+                    threading.Thread(target=worker, args=(name,), name=f"stage-{name}",
+                                     daemon=True).start()
+
+                deadlines = {}
+                for name in list(running) + waiting:
+                    k = key(name)
+                    limits = [started_at[k] + budgets[k]] if k in budgets and k in started_at else []
+                    if run_deadline:
+                        limits.append(run_deadline)
+                    if limits:
+                        deadlines[k] = min(limits)
+
+                timeout = None
+                if deadlines:
+                    timeout = max(0.0, min(deadlines.values()) - time.perf_counter())
+                try:
+                    name, outcome = done_q.get(timeout=timeout)
+                    if name in running:           # else: abandoned after a timeout
+                        del running[name]
+                        self.outcomes[name] = outcome
+                        settle(name)
+                except queue.Empty:
+                    pass
+
+                now = time.perf_counter()
+                for k, deadline in deadlines.items():
+                    if now < deadline:
+                        continue
+                    if k in budgets and k in started_at and started_at[k] + budgets[k] <= deadline:
+                        reason = f"{k} exceeded its {budgets[k]:g}s budget"
+                    else:
+                        reason = f"run budget of {run_budget:g}s exhausted"
+                    if k in out:
+                        out.emit(k, f"[{k}] cancelled — {reason}.\n")
+                        out.abandon(k)
+                    for name in [n for n in list(running) + waiting if key(n) == k]:
+                        self.outcomes[name] = (None, StageTimeout(reason))
+                        self.timings[name] = (running.pop(name, now), now)
+                        if name in waiting:
+                            waiting.remove(name)
+                        settle(name)
+        return dict(self.outcomes)
+
+    def run_inline(self, name, fn, deps=(), wait_only=False):
+        """
+        Add a stage and run it right now on the calling thread (e.g. deliver).
+        With wait_only=True the deps only order it: it runs even when one of
+        them failed, receiving None for that dependency's result.
+        """
+        self.add(name, fn, deps)
+        self.outcomes[name] = self._execute(name, isolate=False, wait_only=wait_only)
+        result, error = self.outcomes[name]
+        if error is not None:
+            raise error
+        return result
+
+    # ── reporting ──────────────────────────────────────────────────────────
+    def critical_path(self) -> list[tuple[str, float]]:
+        """
+        The chain of stages that determined total wall time: start from the
+        stage that finished last and walk back through whichever dependency
+        finished last (the one that actually gated it). Stages that were
+        skipped or ran past a failed dependency are left out: their timing
+        reflects the failure, not work that had to happen.
+        """
+        timings = {n: t for n, t in self.timings.items() if n not in self._degraded}
+        if not timings:
+            return []
+        name = max(timings, key=lambda n: timings[n][1])
+        path = []
+        while name is not None:
+            start, end = timings[name]
+            path.append((name, round(end - start, 3)))
+            deps = [d for d in self._stages[name][1] if d in timings]
+            name = max(deps, key=lambda d: timings[d][1]) if deps else None
+        return path[::-1]
+
+    def summary(self) -> dict:
+        """JSON-friendly record of the run: per-stage timings + critical path."""
+        return {
+            "wall_seconds": round(max((e for _, e in self.timings.values()), default=self._t0) - self._t0, 3),
+            "stages": {
+                name: {
+                    "start": round(start - self._t0, 3),
+                    "seconds": round(end - start, 3),
+                    "deps": list(self._stages[name][1]),
+                    "ok": self.outcomes.get(name, (None, None))[1] is None,
+                }
+                for name, (start, end) in self.timings.items()
+            },
+            "critical_path": [{"stage": n, "seconds": s} for n, s in self.critical_path()],
+        }
@@ -0,0 +1,129 @@
+"""
+Run trace: one timed span per external call.
+
+The cron log says what happened, not where the time went. Every call that
+leaves the process — Snowflake query, IMAP fetch, Brex/Mercury page, Sheets
+read, LLM call, SMTP send — plus the local DOCX render is wrapped in a span
+that records its duration and size (rows / bytes / tokens). weekly_report.py
+writes the spans for each run to out/trace_<week>_<timestamp>.json so latency
+regressions can be compared week over week.
+
+    with trace.span("snowflake.query", "weekly_summary") as sp:
+        df = cur.fetch_pandas_all()
+        sp["rows"] = len(df)
+
+Spans are plain dicts collected in memory (thread-safe); recording costs a
+dict append, so the bots trace unconditionally and only the orchestrator
+decides whether to write the file.
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+_lock = threading.Lock()
+_spans: list[dict] = []
+_t0 = time.perf_counter()
+
+
+@contextmanager
+def span(kind, name=None, **attrs):
+    """Time a block; the yielded dict takes extra attributes (rows, bytes, tokens …)."""
+    record = {"kind": kind, "name": name, **attrs}
+    start = time.perf_counter()
+    try:
+        yield record
+    except BaseException as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _close(record, start)
+
+
+def record(kind, name, start, **attrs) -> dict:
+    """Record a span that began at perf_counter() value start and ends now.
+
+    For work that doesn't fit one with-block — e.g. an async Snowflake query
+    submitted in one loop and collected in another.
+    """
+    return _close({"kind": kind, "name": name, **attrs}, start)
+
+
+def _close(record, start) -> dict:
+    record["thread"] = threading.current_thread().name
+    record["start"] = round(start - _t0, 4)
+    record["seconds"] = round(time.perf_counter() - start, 4)
+    with _lock:
+        _spans.append(record)
+    return record
+
+
+def frame_size(df) -> dict:
+    """rows + in-memory bytes of a DataFrame, for span attributes."""
+    return {"rows": len(df), "bytes": int(df.memory_usage(deep=True).sum())}
+
+
+def llm_usage(response) -> dict:
+    """Token counts from an Anthropic (input/output) or OpenAI (prompt/completion) response."""
+    usage = getattr(response, "usage", None)
+    tokens_in = getattr(usage, "input_tokens", None) or getattr(usage, "prompt_tokens", None)
+    tokens_out = getattr(usage, "output_tokens", None) or getattr(usage, "completion_tokens", None)
+    return {"input_tokens": tokens_in if isinstance(tokens_in, int) else None,
+            "output_tokens": tokens_out if isinstance(tokens_out, int) else None}
+
+
+def spans() -> list[dict]:
+    """Snapshot of the spans recorded so far, ordered by start time."""
+    with _lock:
+        return sorted(_spans, key=lambda s: s["start"])
+
+
+def reset(origin=None) -> None:
+    """Clear recorded spans; origin (a perf_counter value) lets a worker process share the parent's clock."""
+    global _t0
+    with _lock:
+        _spans.clear()
+        _t0 = time.perf_counter() if origin is None else origin
+
+
+def origin() -> float:
+    return _t0
+
+
+def extend(records) -> None:
+    """Add spans recorded elsewhere (a worker process) to this run's trace."""
+    with _lock:
+        _spans.extend(records)
+
+
+def summarize(records) -> dict:
+    """Totals per span kind: {kind: {count, seconds, rows, bytes, tokens}}."""
+    totals: dict[str, dict] = {}
+    for rec in records:
+        t = totals.setdefault(rec["kind"], {"count": 0, "seconds": 0.0})
+        t["count"] += 1
+        t["seconds"] = round(t["seconds"] + rec["seconds"], 4)
+        for size in ("rows", "bytes", "input_tokens", "output_tokens"):
+            if isinstance(rec.get(size), (int, float)):
+                t[size] = t.get(size, 0) + rec[size]
+    return totals
+
+
+def write_trace(out_dir, label, extra=None) -> str:
+    """Write this run's spans (+ per-kind totals and any extra sections) as JSON; returns the path."""
+    records = spans()
+    payload = {
+        "label": label,
+        "written_at": datetime.now().isoformat(timespec="seconds"),
+        "totals": summarize(records),
+        "spans": records,
+        **(extra or {}),
+    }
+    os.makedirs(out_dir, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%dT%H%M%S")
+    path = os.path.join(out_dir, f"trace_{label}_{stamp}.json")
+    with open(path, "w") as f:
+        json.dump(payload, f, indent=2, default=str)
+    return path
@@ -26,6 +26,8 @@ from email.mime.text import MIMEText
 from email.mime.application import MIMEApplication
 from email.mime.image import MIMEImage
 
+from utils import trace
+
 
 NAVY = "#1E3A5F"
 SOFT_BG = "#F8F9FA"
@@ -165,9 +167,9 @@ HEAD_STYLE = f"""
 def compose_weekly_email(
     *,
     week_monday: str,
-    sales: dict,
-    spend: dict,
-    inventory: dict,
+    sales: dict | None,
+    spend: dict | None,
+    inventory: dict | None,
 ) -> tuple[str, list]:
     """
     Build the HTML body.
@@ -176,6 +178,10 @@ def compose_weekly_email(
       - 'html' (str)                — LLM-generated report HTML
       - 'headline' (dict, optional) — headline metrics for the top KPI strip
 
+    A section passed as None (not selected for this run, e.g.
+    weekly_report.py --only inventory) is left out entirely — its KPI cards,
+    body and attachment list.
+
     Returns
     -------
     (html_body, inline_images)
@@ -186,9 +192,9 @@ def compose_weekly_email(
     generated_at = datetime.now().strftime("%B %d, %Y · %I:%M %p")
 
     # --- Exec snapshot cards --------------------------------------
-    sales_h = sales.get("headline") or {}
-    spend_h = spend.get("headline") or {}
-    inv_h = inventory.get("headline") or {}
+    sales_h = (sales or {}).get("headline") or {}
+    spend_h = (spend or {}).get("headline") or {}
+    inv_h = (inventory or {}).get("headline") or {}
 
     rev_value = _fmt_currency(sales_h.get("gross_sales_dc1"))
     rev_sub, rev_col = _fmt_pct(
@@ -223,33 +229,47 @@ def compose_weekly_email(
     reorder_sub = inv_h.get("critical_sub", "—")
     reorder_col = CRIT if critical_reorders > 0 else GOOD
 
-    kpi_row_1 = f"""
-    <tr>
-      {_kpi_card("Revenue (DC-1)", rev_value, rev_sub, rev_col)}
-      {_kpi_card("Total Spend", spend_value, spend_sub, spend_col)}
-      {_kpi_card("Cash Runway", runway_val, runway_sub, runway_col)}
-    </tr>
-    """
-    kpi_row_2 = f"""
-    <tr>
-      {_kpi_card("Orders", str(sales_h.get("order_count", "—")),
-                 f"AOV {_fmt_currency(sales_h.get('aov'))}", MUTED)}
-      {_kpi_card("Kids Revenue",
-                 _fmt_currency(sales_h.get("kids_rev")),
-                 f"{sales_h.get('kids_pct', '—')} of total", MUTED)}
-      {_kpi_card("Reorders Due Now", str(critical_reorders),
-                 reorder_sub, reorder_col)}
-    </tr>
-    """
+    # Cards in display order, tagged by the section they belong to; rows of
+    # three, so a single-section run just gets a shorter strip.
+    cards = [
+        (sales, _kpi_card("Revenue (DC-1)", rev_value, rev_sub, rev_col)),
+        (spend, _kpi_card("Total Spend", spend_value, spend_sub, spend_col)),
+        (spend, _kpi_card("Cash Runway", runway_val, runway_sub, runway_col)),
+        (sales, _kpi_card("Orders", str(sales_h.get("order_count", "—")),
+                          f"AOV {_fmt_currency(sales_h.get('aov'))}", MUTED)),
+        (sales, _kpi_card("Kids Revenue",
+                          _fmt_currency(sales_h.get("kids_rev")),
+                          f"{sales_h.get('kids_pct', '—')} of total", MUTED)),
+        (inventory, _kpi_card("Reorders Due Now", str(critical_reorders),
+                              reorder_sub, reorder_col)),
+    ]
+    cards = [card for section, card in cards if section is not None]
+    kpi_rows = "".join(
+        f"<tr>{''.join(cards[i:i + 3])}</tr>" for i in range(0, len(cards), 3)
+    )
 
     # --- Assemble final HTML --------------------------------------
-    sales_html = _sanitize_html_body(sales.get("html", ""))
-    spend_html = _sanitize_html_body(spend.get("html", ""))
-    inv_html = _sanitize_html_body(inventory.get("html", ""))
+    section_blocks = [
+        (sales, "📈", "Sales", f"DC-1 · Week of {week_monday}"),
+        (spend, "💰", "Spend", "Brex · Mercury · Rippling"),
+        (inventory, "📦", "Inventory", "Stockout ETA · Reorder Queue"),
+    ]
+    sections_html = "".join(
+        f"""
+      <!-- {title} -->
+      {_section_header(emoji, title, subtitle)}
+      {_wrap_report_section(_sanitize_html_body(section.get("html", "")))}
+"""
+        for section, emoji, title, subtitle in section_blocks
+        if section is not None
+    )
 
-    attachments_summary = sales.get("attachment_names", []) + \
-                          spend.get("attachment_names", []) + \
-                          inventory.get("attachment_names", [])
+    attachments_summary = [
+        name
+        for section, *_ in section_blocks
+        if section is not None
+        for name in section.get("attachment_names", [])
+    ]
 
     attachments_list_html = "".join(
         f'<li style="margin:3px 0;">{name}</li>' for name in attachments_summary
@@ -301,23 +321,11 @@ def compose_weekly_email(
           Executive Snapshot
         </div>
         <table width="100%" cellpadding="0" cellspacing="0" border="0">
-          {kpi_row_1}
-          {kpi_row_2}
+          {kpi_rows}
         </table>
       </td></tr>
 
-      <!-- Sales -->
-      {_section_header("📈", "Sales", f"DC-1 · Week of {week_monday}")}
-      {_wrap_report_section(sales_html)}
-
-      <!-- Spend -->
-      {_section_header("💰", "Spend", "Brex · Mercury · Rippling")}
-      {_wrap_report_section(spend_html)}
-
-      <!-- Inventory -->
-      {_section_header("📦", "Inventory", "Stockout ETA · Reorder Queue")}
-      {_wrap_report_section(inv_html)}
-
+{sections_html}
       <!-- Attachments footer -->
       <tr><td style="background:{SOFT_BG}; padding:20px 30px;
                      border-top:1px solid {BORDER}; font-size:12px;
@@ -404,16 +412,19 @@ def send_unified_email(
         part["Content-Disposition"] = f'attachment; filename="{filename}"'
         root.attach(part)
 
+    payload_bytes = (len(html_body) + sum(len(d) for _, d, _ in inline_images)
+                     + sum(len(d) for _, d in file_attachments))
     try:
-        if smtp_port == 465:
-            with smtplib.SMTP_SSL(smtp_server, smtp_port, timeout=60) as s:
-                s.login(smtp_username, smtp_password)
-                s.send_message(root)
-        else:
-            with smtplib.SMTP(smtp_server, smtp_port, timeout=60) as s:
-                s.starttls()
-                s.login(smtp_username, smtp_password)
-                s.send_message(root)
+        with trace.span("smtp.send", smtp_server, bytes=payload_bytes):
+            if smtp_port == 465:
+                with smtplib.SMTP_SSL(smtp_server, smtp_port, timeout=60) as s:
+                    s.login(smtp_username, smtp_password)
+                    s.send_message(root)
+            else:
+                with smtplib.SMTP(smtp_server, smtp_port, timeout=60) as s:
+                    s.starttls()
+                    s.login(smtp_username, smtp_password)
+                    s.send_message(root)
         print(f"Unified weekly report sent to {recipient}.")
         return True
     except Exception as e:
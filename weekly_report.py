@@ -13,10 +13,11 @@ without calling their solo send_report_email() path.
 from __future__ import annotations
 
 import io
+import json
 import os
 import sys
+from datetime import datetime
 
-import pandas as pd
 from dotenv import load_dotenv
 
 from utils.history import (
@@ -26,27 +27,9 @@ from utils.history import (
 )
 from utils.docx_generator import html_to_docx
 from utils.unified_email import compose_weekly_email, send_unified_email
-
-# Import each bot's building blocks (reused, not their main())
-from spend_bot import (
-    generate_spend_report,
-    CASH_BALANCE_USD,
-)
-from adapters.brex import fetch_brex_transactions
-from adapters.mercury import fetch_mercury_transactions
-from adapters.rippling import fetch_rippling_expenses
-
-from sales_bot import (
-    fetch_sales_data,
-    generate_sales_report,
-    parse_metrics_from_results,
-)
-
-from inventory_bot import (
-    fetch_latest_emails,
-    generate_llm_report as generate_inventory_report,
-)
-
+from utils.stages import StageGraph
+from utils.checkpoint import save_section, load_section
+from utils import cassette, isolation, query_cache, trace
 
 load_dotenv(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".env"), override=True)
 
@@ -57,32 +40,102 @@ MERCURY_API_KEY = os.getenv("MERCURY_API_KEY")
 RIPPLING_API_KEY = os.getenv("RIPPLING_API_KEY")
 
 
-# ── Per-bot orchestration steps ────────────────────────────────────────────
-def build_spend_section():
-    """Run spend bot data pipeline; return dict + attachments list."""
-    print("[spend] fetching Brex / Mercury / Rippling …")
-    brex_df = fetch_brex_transactions(BREX_API_KEY, days_back=30)
-    mercury_df = fetch_mercury_transactions(MERCURY_API_KEY)
-    rippling_df = fetch_rippling_expenses(RIPPLING_API_KEY)
+def _env_number(name, default):
+    """Number (budget seconds, memory MB) from env; unset → default, empty or 0 → no limit."""
+    raw = os.getenv(name)
+    if raw is None:
+        return default
+    try:
+        return float(raw) or None
+    except ValueError:
+        return default
+
+
+# Wall-clock budgets. A section that overruns is cancelled and shows the
+# failure placeholder; when the whole run's budget is spent every unfinished
+# section is cancelled — either way the email still goes out on time.
+# Per-section overrides: SALES_BUDGET_SECONDS / SPEND_BUDGET_SECONDS /
+# INVENTORY_BUDGET_SECONDS.
+SECTION_BUDGET_SECONDS = _env_number("SECTION_BUDGET_SECONDS", 900)
+RUN_BUDGET_SECONDS = _env_number("RUN_BUDGET_SECONDS", 1200)
+
+# RSS ceiling per section worker process with --isolate (0 = no ceiling)
+WORKER_MEMORY_MB = _env_number("WORKER_MEMORY_MB", 450)
+
+# Spend sources (brex, mercury) whose credentials failed --preflight, comma
+# separated; set by main() and read in the spend stages, --isolate workers too
+SKIPPED_SOURCES_ENV = "WEEKLY_SKIPPED_SOURCES"
+
+
+def _skipped_sources() -> list[str]:
+    return [s for s in os.getenv(SKIPPED_SOURCES_ENV, "").split(",") if s]
 
-    for df, name in [(brex_df, "Brex"), (mercury_df, "Mercury"), (rippling_df, "Rippling")]:
+
+# ── Per-bot stages: fetch → analyze → (shared) render ─────────────────────
+# Each section is split into the stages the scheduler runs independently:
+#   fetch   — pull raw data from the source (network only, no LLM)
+#   analyze — history + LLM report + headline; returns an "analysis" dict
+#   render  — DOCX + CSV attachments from the analysis (shared by all sections)
+# An analysis dict carries html / headline / snapshot plus what render needs:
+# docx_title (None = nothing to render) and frames, a list of (csv name, df).
+# complete=False marks a degraded section (no source data, or the LLM call
+# failed): it is still emailed, but never checkpointed, so --resume retries it.
+
+def _empty_analysis(html: str) -> dict:
+    return {"html": html, "headline": {}, "snapshot": {}, "docx_title": None, "frames": [],
+            "complete": False}
+
+
+def _llm_failed(report_html: str) -> bool:
+    """The bots' generate_*_report return an error paragraph instead of raising."""
+    return "Error generating report" in report_html
+
+
+# Each bot's building blocks (reused, not their main()) are imported inside
+# the stage that needs them, so a section excluded with --only / --skip never
+# imports its SDKs, opens its connections or pays for its LLM call. pandas is
+# deferred the same way: a --resume run rebuilds the email without it.
+# (python bench/import_time.py shows what each entry point loads.)
+
+def fetch_spend():
+    import pandas as pd
+    from adapters.brex import fetch_brex_transactions
+    from adapters.mercury import fetch_mercury_transactions
+    from adapters.rippling import fetch_rippling_expenses
+
+    sources = {
+        "Brex": lambda: fetch_brex_transactions(BREX_API_KEY, days_back=30),
+        "Mercury": lambda: fetch_mercury_transactions(MERCURY_API_KEY),
+        "Rippling": lambda: fetch_rippling_expenses(RIPPLING_API_KEY),
+    }
+    skipped = _skipped_sources()
+    print("[spend] fetching Brex / Mercury / Rippling …")
+    frames = []
+    for name, fetch in sources.items():
+        if name.lower() in skipped:
+            print(f"[spend] {name} skipped — its credentials failed preflight.")
+            continue
+        df = fetch()
         if not df.empty and "Source" not in df.columns:
             df["Source"] = name
+        frames.append(df)
+
+    return pd.concat(frames, ignore_index=True)
 
-    unified_df = pd.concat([brex_df, mercury_df, rippling_df], ignore_index=True)
+
+def analyze_spend(unified_df):
     if unified_df.empty:
         print("[spend] no data from any source — skipping spend section.")
-        return {
-            "html": "<p><i>No spend data returned from any connected source (Brex / Mercury / Rippling).</i></p>",
-            "headline": {},
-            "attachments": [],
-            "attachment_names": [],
-            "snapshot": {},
-        }
+        return _empty_analysis(
+            "<p><i>No spend data returned from any connected source (Brex / Mercury / Rippling).</i></p>"
+        )
+
+    from spend_bot import generate_spend_report
 
     # Exclude this week's own snapshot so a re-run doesn't compare against itself
     history = load_history("spend", exclude_week=get_week_monday())
-    report_html, curr_df, snapshot = generate_spend_report(unified_df, history=history)
+    report_html, curr_df, snapshot = generate_spend_report(unified_df, history=history,
+                                                           skipped_sources=_skipped_sources())
 
     # Headline for KPI strip
     headline = {
@@ -91,47 +144,35 @@ def build_spend_section():
         "runway": snapshot.get("runway") or {},
     }
 
-    # Attachments
-    week_monday = get_week_monday()
-    date_str = week_monday.isoformat()
-
-    docx_bytes = html_to_docx(report_html, "Weekly Spend Analysis", date_str)
-
-    curr_csv = io.BytesIO()
-    curr_df.to_csv(curr_csv, index=False)
-
-    full_csv = io.BytesIO()
-    unified_df.to_csv(full_csv, index=False)
-
-    attachments = [
-        (f"weekly_spend_report_{date_str}.docx", docx_bytes),
-        ("analyzed_spend_7_days.csv", curr_csv.getvalue()),
-        ("full_30_days_raw.csv", full_csv.getvalue()),
-    ]
-
     return {
         "html": report_html,
         "headline": headline,
-        "attachments": attachments,
-        "attachment_names": [a[0] for a in attachments],
         "snapshot": snapshot,
+        "docx_title": "Weekly Spend Analysis",
+        "docx_name": "weekly_spend_report",
+        "frames": [
+            ("analyzed_spend_7_days.csv", curr_df),
+            ("full_30_days_raw.csv", unified_df),
+        ],
+        "complete": not _llm_failed(report_html),
     }
 
 
-def build_sales_section():
-    """Run sales bot data pipeline; return dict with html + chart + attachments."""
+def fetch_sales():
+    from sales_bot import fetch_sales_data
+
     print("[sales] querying Snowflake …")
-    df, daily_df = fetch_sales_data()
+    return fetch_sales_data()
+
+
+def analyze_sales(fetched):
+    df, daily_df = fetched
     if df.empty:
         print("[sales] no data — skipping sales section.")
-        return {
-            "html": "<p><i>No sales data returned from Snowflake this week.</i></p>",
-            "headline": {},
-            "attachments": [],
-            "attachment_names": [],
-            "snapshot": {},
-            "chart_png": None,
-        }
+        return _empty_analysis("<p><i>No sales data returned from Snowflake this week.</i></p>")
+
+    from sales_bot import (format_daily_breakdown, format_sales_summary, format_sku_breakdown,
+                           generate_sales_report)
 
     history = load_history("sales", exclude_week=get_week_monday())
     report_html, metrics = generate_sales_report(df, daily_df=daily_df, history=history)
@@ -160,49 +201,37 @@ def build_sales_section():
         "kids_pct": kids_pct_str,
     }
 
-    # Attachments
-    week_monday = get_week_monday()
-    date_str = week_monday.isoformat()
-
-    docx_bytes = html_to_docx(report_html, "Weekly Sales Summary", date_str)
-
-    csv_io = io.BytesIO()
-    df.to_csv(csv_io, index=False)
-
-    daily_csv_io = io.BytesIO()
-    daily_has = daily_df is not None and not daily_df.empty
-    if daily_has:
-        daily_df.to_csv(daily_csv_io, index=False)
-
-    attachments = [
-        (f"weekly_sales_report_{date_str}.docx", docx_bytes),
-        ("sales_summary.csv", csv_io.getvalue()),
-    ]
-    if daily_has:
-        attachments.append(("sales_daily_breakdown.csv", daily_csv_io.getvalue()))
+    frames = [("sales_summary.csv", format_sales_summary(df))]
+    if daily_df is not None and not daily_df.empty:
+        frames.append(("sales_daily_breakdown.csv", format_daily_breakdown(daily_df)))
+    sku_df = format_sku_breakdown(df)
+    if not sku_df.empty:
+        frames.append(("sales_by_sku.csv", sku_df))
 
     return {
         "html": report_html,
         "headline": headline,
-        "attachments": attachments,
-        "attachment_names": [a[0] for a in attachments],
         "snapshot": metrics,
+        "docx_title": "Weekly Sales Summary",
+        "docx_name": "weekly_sales_report",
+        "frames": frames,
+        "complete": not _llm_failed(report_html),
     }
 
 
-def build_inventory_section():
-    """Run inventory bot data pipeline; return dict + attachments list."""
+def fetch_inventory():
+    from inventory_bot import fetch_latest_emails
+
     print("[inventory] fetching DCL inventory emails …")
-    data = fetch_latest_emails(limit=4)
+    return fetch_latest_emails(limit=4)
+
+
+def analyze_inventory(data):
     if len(data) == 0:
         print("[inventory] no emails found — skipping inventory section.")
-        return {
-            "html": "<p><i>No DCL inventory emails found this week — check IMAP filters.</i></p>",
-            "headline": {},
-            "attachments": [],
-            "attachment_names": [],
-            "snapshot": {},
-        }
+        return _empty_analysis("<p><i>No DCL inventory emails found this week — check IMAP filters.</i></p>")
+
+    from inventory_bot import generate_llm_report as generate_inventory_report
 
     history = load_history("inventory", exclude_week=get_week_monday())
     report_html, summary_df, snapshot = generate_inventory_report(data, history=history)
@@ -226,95 +255,247 @@ def build_inventory_section():
         "critical_sub": critical_sub,
     }
 
-    # Attachments
-    week_monday = get_week_monday()
-    date_str = week_monday.isoformat()
-
-    docx_bytes = html_to_docx(report_html, "Weekly Inventory Report", date_str)
-
-    attachments: list[tuple[str, bytes]] = [
-        (f"weekly_inventory_report_{date_str}.docx", docx_bytes),
-    ]
-    summary_csv = io.BytesIO()
-    summary_df.to_csv(summary_csv, index=False)
-    attachments.append(("inventory_analytical_summary.csv", summary_csv.getvalue()))
-
+    frames = [("inventory_analytical_summary.csv", summary_df)]
     for date, raw_df in data:
-        raw_csv = io.BytesIO()
-        raw_df.to_csv(raw_csv, index=False)
-        attachments.append((f"inventory_raw_{date.strftime('%Y%m%d')}.csv", raw_csv.getvalue()))
+        frames.append((f"inventory_raw_{date.strftime('%Y%m%d')}.csv", raw_df))
 
     return {
         "html": report_html,
         "headline": headline,
+        "snapshot": snapshot,
+        "docx_title": "Weekly Inventory Report",
+        "docx_name": "weekly_inventory_report",
+        "frames": frames,
+        "complete": not _llm_failed(report_html),
+    }
+
+
+def render_section(analysis: dict) -> dict:
+    """Turn an analysis dict into the final section dict (DOCX + CSV attachments)."""
+    attachments: list[tuple[str, bytes]] = []
+    if analysis.get("docx_title"):
+        date_str = get_week_monday().isoformat()
+        with trace.span("docx.render", analysis["docx_name"]) as sp:
+            docx_bytes = html_to_docx(analysis["html"], analysis["docx_title"], date_str)
+            sp["bytes"] = len(docx_bytes)
+        attachments.append((f"{analysis['docx_name']}_{date_str}.docx", docx_bytes))
+        for fname, frame in analysis["frames"]:
+            buf = io.BytesIO()
+            frame.to_csv(buf, index=False)
+            attachments.append((fname, buf.getvalue()))
+
+    return {
+        "html": analysis["html"],
+        "headline": analysis["headline"],
         "attachments": attachments,
         "attachment_names": [a[0] for a in attachments],
-        "snapshot": snapshot,
+        "snapshot": analysis["snapshot"],
+        "complete": analysis.get("complete", True),
     }
 
 
 # ── Top-level orchestrator ────────────────────────────────────────────────
-def main(test_mode: bool = False, dry_run: bool = False) -> None:
-    print("=" * 70)
-    print(f" Weekly unified report · {get_week_monday().isoformat()}"
-          + (" · DRY RUN" if dry_run else ""))
-    print("=" * 70)
+OUT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "out")
 
-    if not REPORT_RECIPIENT and not dry_run:
-        print("Error: REPORT_RECIPIENT not set.")
-        sys.exit(1)
+SECTION_STAGES = (
+    ("sales", fetch_sales, analyze_sales),
+    ("spend", fetch_spend, analyze_spend),
+    ("inventory", fetch_inventory, analyze_inventory),
+)
+SECTION_NAMES = tuple(name for name, _, _ in SECTION_STAGES)
+
+
+def select_sections(only=None, skip=None) -> tuple[str, ...]:
+    """Resolve --only / --skip into the sections to run, in report order."""
+    chosen = [n for n in SECTION_NAMES if not only or n in only]
+    chosen = [n for n in chosen if not skip or n not in skip]
+    if not chosen:
+        raise ValueError("--only/--skip left no sections to run")
+    return tuple(chosen)
+
+
+def _failed_section(name: str, error: BaseException | str) -> dict:
+    """Placeholder section shown in the email when a stage raised (or preflight dropped it)."""
+    return {
+        "html": f"<p><b>{name.title()} section failed:</b> {error}</p>",
+        "headline": {},
+        "attachments": [],
+        "attachment_names": [],
+        "snapshot": {},
+    }
+
+
+def _checkpoint(week_monday, name: str, section: dict) -> None:
+    """Checkpoint a finished section — unless it is degraded, so --resume rebuilds it."""
+    if section.get("complete", True):
+        save_section(week_monday, name, section)
+    else:
+        print(f"[{name}] degraded — not checkpointed, --resume will rebuild it.")
+
+
+def _render_and_checkpoint(name: str, week_monday):
+    """Render stage for one section; checkpoints the result the moment it exists."""
+    def render(analysis):
+        section = render_section(analysis)
+        _checkpoint(week_monday, name, section)
+        return section
+    return render
+
+
+def build_section(fetch, analyze) -> dict:
+    """A whole section in one call — what an --isolate worker process runs."""
+    return render_section(analyze(fetch()))
+
+
+def _isolated_worker(name: str, fetch, analyze, week_monday, checkpoint: bool):
+    """Worker stage for --isolate: build the section in a child process, checkpoint it here."""
+    def worker():
+        section = isolation.run_isolated(build_section, (fetch, analyze),
+                                         memory_mb=WORKER_MEMORY_MB, label=name)
+        if checkpoint:
+            _checkpoint(week_monday, name, section)
+        return section
+    return worker
+
+
+def _final_stage(name: str, outcomes) -> str:
+    """The stage whose result is the finished section dict."""
+    return f"{name}.worker" if f"{name}.worker" in outcomes else f"{name}.render"
 
+
+def build_stage_graph(resume: bool = False, sections=None,
+                      checkpoint: bool = True, isolate: bool = False) -> tuple[StageGraph, dict]:
+    """
+    Lay out fetch → analyze → render for every selected section (default:
+    all) that still needs building. Returns (graph, resumed) where resumed
+    maps section name → checkpointed section dict for sections loaded
+    instead of rebuilt. checkpoint=False renders without saving checkpoints
+    (dry runs and cassette replays must not end up in a real --resume send).
+
+    isolate=True makes each section a single "<name>.worker" stage that runs
+    fetch → analyze → render in its own process under WORKER_MEMORY_MB.
+    """
     week_monday = get_week_monday()
-    date_str = week_monday.isoformat()
+    graph = StageGraph()
+    resumed = {}
+    for name, fetch, analyze in SECTION_STAGES:
+        if sections is not None and name not in sections:
+            continue
+        cached = load_section(week_monday, name) if resume else None
+        if cached is not None:
+            print(f"[{name}] resumed from checkpoint — skipping fetch + LLM.")
+            resumed[name] = cached
+            continue
+        if isolate:
+            graph.add(f"{name}.worker", _isolated_worker(name, fetch, analyze, week_monday, checkpoint),
+                      group=name)
+            continue
+        graph.add(f"{name}.fetch", fetch, group=name)
+        graph.add(f"{name}.analyze", analyze, deps=[f"{name}.fetch"], group=name)
+        render = _render_and_checkpoint(name, week_monday) if checkpoint else render_section
+        graph.add(f"{name}.render", render, deps=[f"{name}.analyze"], group=name)
+    return graph, resumed
+
+
+def section_budgets() -> dict:
+    """Per-section wall-clock budget in seconds (None = unlimited)."""
+    return {
+        name: _env_number(f"{name.upper()}_BUDGET_SECONDS", SECTION_BUDGET_SECONDS)
+        for name in SECTION_NAMES
+    }
 
-    # Run each bot section; any single failure shouldn't kill the whole email
-    try:
-        sales = build_sales_section()
-    except Exception as e:
-        import traceback; traceback.print_exc()
-        sales = {"html": f"<p><b>Sales section failed:</b> {e}</p>", "headline": {}, "attachments": [], "attachment_names": [], "snapshot": {}}
 
-    try:
-        spend = build_spend_section()
-    except Exception as e:
-        import traceback; traceback.print_exc()
-        spend = {"html": f"<p><b>Spend section failed:</b> {e}</p>", "headline": {}, "attachments": [], "attachment_names": [], "snapshot": {}}
+def run_sections(graph: StageGraph, resumed: dict, parallel: bool = True,
+                 budgets=None, run_budget=None) -> dict:
+    """
+    Run the stage graph, isolating failures so one bad source can't sink the
+    email: a failed stage skips only its own section's later stages, and that
+    section becomes a placeholder. With parallel=True independent stages
+    overlap, so the run takes as long as the slowest chain; the log still
+    reads in sales → spend → inventory order either way.
 
+    A section that exceeds its budget (or is still running when run_budget
+    is spent) is cancelled and becomes the same failure placeholder.
+    """
     try:
-        inventory = build_inventory_section()
-    except Exception as e:
-        import traceback; traceback.print_exc()
-        inventory = {"html": f"<p><b>Inventory section failed:</b> {e}</p>", "headline": {}, "attachments": [], "attachment_names": [], "snapshot": {}}
-
-    # Compose the unified HTML + inline images
+        outcomes = graph.run(parallel=parallel, budgets=budgets, run_budget=run_budget)
+    finally:
+        isolation.reap()                 # workers abandoned on a budget timeout
+    sections = {}
+    for name, _, _ in SECTION_STAGES:
+        if _final_stage(name, outcomes) not in outcomes and name not in resumed:
+            continue                     # not selected this run
+        if name in resumed:
+            sections[name] = resumed[name]
+            continue
+        result, error = outcomes[_final_stage(name, outcomes)]
+        sections[name] = result if error is None else _failed_section(name, error)
+    return sections
+
+
+def _record_run(graph: StageGraph) -> None:
+    """
+    Print the critical path, append this run's stage timings to
+    out/stage_runs.jsonl and each Snowflake query's telemetry to
+    out/snowflake_queries.jsonl, and write the per-call span trace to
+    out/trace_<week>_<timestamp>.json.
+    """
+    summary = graph.summary()
+    if not summary["critical_path"]:
+        return
+    chain = " → ".join(f"{p['stage']} {p['seconds']:.1f}s" for p in summary["critical_path"])
+    print(f"Critical path ({summary['wall_seconds']:.1f}s wall): {chain}")
+    os.makedirs(OUT_DIR, exist_ok=True)
+    run = {"week_monday": get_week_monday().isoformat(),
+           "run_at": datetime.now().isoformat(timespec="seconds")}
+    with open(os.path.join(OUT_DIR, "stage_runs.jsonl"), "a") as f:
+        f.write(json.dumps({**run, **summary}) + "\n")
+    queries = [sp for sp in trace.spans() if sp["kind"] == "snowflake.query" and sp.get("query_id")]
+    if queries:
+        with open(os.path.join(OUT_DIR, "snowflake_queries.jsonl"), "a") as f:
+            for sp in queries:
+                f.write(json.dumps({**run, **sp}, default=str) + "\n")
+
+    path = trace.write_trace(OUT_DIR, get_week_monday().isoformat(), extra={"stages": summary})
+    slowest = sorted(trace.spans(), key=lambda sp: sp["seconds"], reverse=True)[:3]
+    print(f"Trace: {path}")
+    if slowest:
+        print("  slowest calls: " + ", ".join(
+            f"{sp['kind']}[{sp['name']}] {sp['seconds']:.1f}s" for sp in slowest))
+
+
+def deliver(sections: dict, test_mode: bool = False, dry_run: bool = False) -> bool:
+    """Compose the unified email and send it (or write it to ./out/). Returns True if delivered."""
+    date_str = get_week_monday().isoformat()
+
+    # Compose the unified HTML + inline images (only the sections that ran)
     html_body, inline_images = compose_weekly_email(
         week_monday=date_str,
-        sales=sales,
-        spend=spend,
-        inventory=inventory,
+        sales=sections.get("sales"),
+        spend=sections.get("spend"),
+        inventory=sections.get("inventory"),
     )
 
     # Gather all file attachments
     file_attachments: list[tuple[str, bytes]] = []
-    file_attachments += sales.get("attachments", [])
-    file_attachments += spend.get("attachments", [])
-    file_attachments += inventory.get("attachments", [])
+    for name in SECTION_NAMES:
+        if name in sections:
+            file_attachments += sections[name].get("attachments", [])
 
     if dry_run:
         # Write everything to ./out/ for inspection instead of emailing.
-        # No snapshots are saved either — a dry run leaves no state behind.
-        out_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "out")
-        os.makedirs(out_dir, exist_ok=True)
-        html_path = os.path.join(out_dir, f"weekly_report_{date_str}.html")
+        # No snapshots are saved either — a dry run leaves no history behind.
+        os.makedirs(OUT_DIR, exist_ok=True)
+        html_path = os.path.join(OUT_DIR, f"weekly_report_{date_str}.html")
         with open(html_path, "w") as f:
             f.write(html_body)
         for fname, data in file_attachments:
-            with open(os.path.join(out_dir, fname), "wb") as f:
+            with open(os.path.join(OUT_DIR, fname), "wb") as f:
                 f.write(data)
         print(f"\nDry run complete — no email sent, no snapshots saved.")
         print(f"  Report: {html_path}")
-        print(f"  Attachments ({len(file_attachments)}): {out_dir}/")
-        return
+        print(f"  Attachments ({len(file_attachments)}): {OUT_DIR}/")
+        return True
 
     # Plaintext fallback (very short — the HTML is the experience)
     plain = (
@@ -327,8 +508,10 @@ def main(test_mode: bool = False, dry_run: bool = False) -> None:
 
     subject_prefix = "[TEST] " if test_mode else ""
     subject = f"{subject_prefix}Daylight Weekly Report — {date_str}"
+    if len(sections) < len(SECTION_NAMES):
+        subject += f" ({' + '.join(n.title() for n in SECTION_NAMES if n in sections)} only)"
 
-    sent = send_unified_email(
+    return send_unified_email(
         subject=subject,
         html_body=html_body,
         plain_fallback=plain,
@@ -336,18 +519,92 @@ def main(test_mode: bool = False, dry_run: bool = False) -> None:
         file_attachments=file_attachments,
         inline_images=inline_images,
     )
+
+
+def main(test_mode: bool = False, dry_run: bool = False, parallel: bool = True,
+         resume: bool = False, only=None, skip=None, record=None, replay=None,
+         isolate: bool = False, preflight: bool = False, refresh: bool = False) -> None:
+    selected = select_sections(only, skip)
+    if refresh:
+        query_cache.set_refresh()
+    if replay:
+        # Offline rerun: every external response comes from the cassette, and
+        # nothing leaves the machine — no email, no snapshots, no checkpoints.
+        meta = cassette.replay(replay)
+        dry_run = True
+        print(f"Replaying cassette {replay} (recorded {meta.get('recorded_at')}, "
+              f"week of {meta.get('week_monday')})")
+    elif record is not None:
+        record = record or os.path.join(OUT_DIR, f"cassette_{get_week_monday().isoformat()}.pkl")
+        cassette.record(record, week_monday=get_week_monday().isoformat(), sections=list(selected))
+    print("=" * 70)
+    print(f" Weekly unified report · {get_week_monday().isoformat()}"
+          + (" · DRY RUN" if dry_run else "")
+          + (" · RESUME" if resume else "")
+          + (" · REPLAY" if replay else " · RECORD" if record else "")
+          + (" · ISOLATED" if isolate else "")
+          + (" · REFRESH" if refresh else "")
+          + (f" · {' + '.join(selected)} only" if len(selected) < len(SECTION_NAMES) else ""))
+    print("=" * 70)
+
+    if not REPORT_RECIPIENT and not dry_run:
+        print("Error: REPORT_RECIPIENT not set.")
+        sys.exit(1)
+
+    week_monday = get_week_monday()
+
+    # Preflight: check every credential the run needs before any LLM money is spent
+    preflight_skipped = {}
+    if preflight and replay:
+        print("Preflight skipped — replaying a cassette makes no external calls.")
+    elif preflight:
+        import preflight as pf
+        results = pf.run_checks(pf.checks_for(selected, need_delivery=not dry_run))
+        print(f"Preflight ({pf.PREFLIGHT_MODE} mode):\n{pf.report(results)}")
+        selected, preflight_skipped, abort = pf.plan(results, selected, need_delivery=not dry_run)
+        if abort:
+            print(f"Error: {abort}. Nothing was fetched or sent to an LLM.")
+            sys.exit(1)
+        for name, reason in preflight_skipped.items():
+            print(f"[{name}] skipped — {reason}")
+        sources = pf.failed_sources(results)
+        for source, reason in sources.items():
+            print(f"[spend] running without {source} — preflight failed: {reason}")
+        os.environ[SKIPPED_SOURCES_ENV] = ",".join(sources)
+
+    # Run each bot section; any single failure shouldn't kill the whole email
+    trace.reset()
+    graph, resumed = build_stage_graph(resume=resume, sections=selected, checkpoint=not dry_run,
+                                       isolate=isolate)
+    sections = run_sections(graph, resumed, parallel=parallel,
+                            budgets=section_budgets(), run_budget=RUN_BUDGET_SECONDS)
+    for name, reason in preflight_skipped.items():
+        sections[name] = _failed_section(name, reason)
+
+    # deliver only waits for the renders: a failed or cancelled section is
+    # already its placeholder in sections, and the email goes out regardless
+    renders = [_final_stage(n, graph.outcomes) for n in SECTION_NAMES
+               if _final_stage(n, graph.outcomes) in graph.outcomes]
+    try:
+        sent = graph.run_inline("deliver", lambda *_: deliver(sections, test_mode, dry_run),
+                                deps=renders, wait_only=True)
+    finally:
+        _record_run(graph)
+        if cassette.mode() == "record":
+            print(f"Cassette: {cassette.save()}")
+        cassette.stop()
+
+    if dry_run:
+        return
     if not sent:
         print("Email was not sent — snapshots NOT saved, exiting non-zero.")
         sys.exit(1)
 
     # Save snapshots only after the email actually went out, so a failed
     # send doesn't leave this week's history written as if it succeeded.
-    if sales.get("snapshot"):
-        save_weekly_snapshot("sales", week_monday, sales["snapshot"])
-    if spend.get("snapshot"):
-        save_weekly_snapshot("spend", week_monday, spend["snapshot"])
-    if inventory.get("snapshot"):
-        save_weekly_snapshot("inventory", week_monday, inventory["snapshot"])
+    for name in sections:
+        if sections[name].get("snapshot"):
+            save_weekly_snapshot(name, week_monday, sections[name]["snapshot"])
 
 
 if __name__ == "__main__":
@@ -356,5 +613,34 @@ if __name__ == "__main__":
     parser.add_argument("--test", action="store_true", help="prefix the subject with [TEST]")
     parser.add_argument("--dry-run", action="store_true",
                         help="build the full report and write it to ./out/ instead of emailing; saves no snapshots")
+    parser.add_argument("--sequential", action="store_true",
+                        help="build the sections one after another instead of concurrently")
+    parser.add_argument("--resume", action="store_true",
+                        help="reuse this week's checkpointed sections instead of re-fetching them "
+                             "(e.g. after a failed send); only missing sections are rebuilt")
+    parser.add_argument("--only", nargs="+", choices=SECTION_NAMES, metavar="SECTION",
+                        help=f"run just these sections ({', '.join(SECTION_NAMES)}); the others "
+                             "are never imported, fetched or sent to an LLM")
+    parser.add_argument("--skip", nargs="+", choices=SECTION_NAMES, metavar="SECTION",
+                        help="run every section except these")
+    parser.add_argument("--isolate", action="store_true",
+                        help="build each section in its own worker process, killed past "
+                             "WORKER_MEMORY_MB; a crash or OOM degrades to the failure placeholder")
+    parser.add_argument("--preflight", action="store_true",
+                        help="check Snowflake / IMAP / SMTP / Brex / Mercury / Sheets credentials in "
+                             "parallel first; on failure abort or drop the affected sections "
+                             "(PREFLIGHT_MODE=abort|degrade)")
+    parser.add_argument("--refresh", action="store_true",
+                        help="re-run the Snowflake queries instead of using cached results "
+                             "(data/query_cache/)")
+    tape = parser.add_mutually_exclusive_group()
+    tape.add_argument("--record", nargs="?", const="", metavar="PATH",
+                      help="save every external response (Snowflake, IMAP, Brex/Mercury, LLM …) "
+                           "to a cassette (default: out/cassette_<week>.pkl)")
+    tape.add_argument("--replay", metavar="PATH",
+                      help="rerun offline from a recorded cassette; implies --dry-run")
     args = parser.parse_args()
-    main(test_mode=args.test, dry_run=args.dry_run)
+    main(test_mode=args.test, dry_run=args.dry_run, parallel=not args.sequential,
+         resume=args.resume, only=args.only, skip=args.skip,
+         record=args.record, replay=args.replay, isolate=args.isolate,
+         preflight=args.preflight, refresh=args.refresh)